@@ -1,6 +1,7 @@
 import numpy as np
 from pathlib import Path
 import quadruped_reactive_walking as qrw
+from quadruped_reactive_walking.tools.utils import TEMP_DIRNAME
 import argparse
 import crocoddyl
 import example_robot_data as erd
@@ -15,7 +16,7 @@ params = qrw.Params.create_from_file()
 WBC_RATIO = params.mpc_wbc_ratio
 print(WBC_RATIO)
 
-TMPDIR = Path.home() / ".tmp"
+TMPDIR = TEMP_DIRNAME
 print("TMPDIR =", TMPDIR)
 
 ALLLOGS = list(TMPDIR.glob("logs/2023_*"))
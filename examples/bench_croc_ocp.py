@@ -1,7 +1,10 @@
+"""
+Solve and evaluation times of the fixed-base OCP (reduced state) compared with the
+walking OCP.
+"""
 import quadruped_reactive_walking as qrw
-from quadruped_reactive_walking.wb_mpc import CrocOCP as OCP
-from quadruped_reactive_walking.wb_mpc.task_spec import TaskSpecFull
-from quadruped_reactive_walking.wb_mpc.target import Target
+from quadruped_reactive_walking.wb_mpc import CrocOCP, CrocFixedBaseOCP
+from quadruped_reactive_walking.wb_mpc.target import Target, make_footsteps_and_refs
 
 import crocoddyl
 import sys
@@ -11,20 +14,16 @@ T = int(sys.argv[1]) if (len(sys.argv) > 1) else int(5e3)  # number of trials
 MAXITER = 1
 
 
-def createProblem():
+def createProblem(OCP):
     params = qrw.Params.create_from_file()
-    pd = TaskSpecFull(params)
-    target = Target(params)
+    footsteps, base_refs = make_footsteps_and_refs(params, Target(params))
+    ocp = OCP(params, footsteps, base_refs)
 
-    x0 = pd.x0_reduced
-
-    ocp = OCP(target)
-    ocp.push_node()
-    ocp.x0 = x0
-
-    xs = [x0] * (ocp.ddp.problem.T + 1)
-    us = ocp.ddp.problem.quasiStatic([x0] * ocp.ddp.problem.T)
-    return xs, us, ocp.problem
+    problem = ocp.croc_problem
+    x0 = problem.x0
+    xs = [x0] * (problem.T + 1)
+    us = problem.quasiStatic([x0] * problem.T)
+    return xs, us, problem
 
 
 def runDDPSolveBenchmark(xs, us, problem):
@@ -72,26 +71,29 @@ def runShootingProblemCalcDiffBenchmark(xs, us, problem):
 
 
 print("\033[1m")
-print("Python bindings:")
-xs, us, problem = createProblem()
-avrg_duration, min_duration, max_duration = runDDPSolveBenchmark(xs, us, problem)
-print(
-    "  DDP.solve [ms]: {0} ({1}, {2})".format(avrg_duration, min_duration, max_duration)
-)
-avrg_duration, min_duration, max_duration = runShootingProblemCalcBenchmark(
-    xs, us, problem
-)
-print(
-    "  ShootingProblem.calc [ms]: {0} ({1}, {2})".format(
-        avrg_duration, min_duration, max_duration
+for name, OCP in [("Walking OCP", CrocOCP), ("Fixed-base OCP", CrocFixedBaseOCP)]:
+    xs, us, problem = createProblem(OCP)
+    print("{} (nx = {}, T = {}):".format(name, problem.nx, problem.T))
+    avrg_duration, min_duration, max_duration = runDDPSolveBenchmark(xs, us, problem)
+    print(
+        "  DDP.solve [ms]: {0} ({1}, {2})".format(
+            avrg_duration, min_duration, max_duration
+        )
+    )
+    avrg_duration, min_duration, max_duration = runShootingProblemCalcBenchmark(
+        xs, us, problem
+    )
+    print(
+        "  ShootingProblem.calc [ms]: {0} ({1}, {2})".format(
+            avrg_duration, min_duration, max_duration
+        )
+    )
+    avrg_duration, min_duration, max_duration = runShootingProblemCalcDiffBenchmark(
+        xs, us, problem
     )
-)
-avrg_duration, min_duration, max_duration = runShootingProblemCalcDiffBenchmark(
-    xs, us, problem
-)
-print(
-    "  ShootingProblem.calcDiff [ms]: {0} ({1}, {2})".format(
-        avrg_duration, min_duration, max_duration
+    print(
+        "  ShootingProblem.calcDiff [ms]: {0} ({1}, {2})".format(
+            avrg_duration, min_duration, max_duration
+        )
     )
-)
 print("\033[0m")
@@ -0,0 +1,70 @@
+"""
+Scaling of the Crocoddyl path of the walking OCP (CrocOCP) with the number of threads
+of the shooting problem (params.ocp.num_threads), up to the number of cores.
+Crocoddyl must be built with multithreading for the thread count to have an effect.
+"""
+import quadruped_reactive_walking as qrw
+from quadruped_reactive_walking.wb_mpc import CrocOCP as OCP
+from quadruped_reactive_walking.wb_mpc.target import Target, make_footsteps_and_refs
+
+import os
+import sys
+import time
+
+T = int(sys.argv[1]) if (len(sys.argv) > 1) else int(1e3)  # number of trials
+MAXITER = 1
+
+
+def createProblem():
+    params = qrw.Params.create_from_file()
+    footsteps, base_refs = make_footsteps_and_refs(params, Target(params))
+    ocp = OCP(params, footsteps, base_refs)
+
+    x0 = ocp.task.x0
+    problem = ocp.croc_problem
+    xs = [x0] * (problem.T + 1)
+    us = problem.quasiStatic([x0] * problem.T)
+    return xs, us, ocp
+
+
+def runBenchmark(fn):
+    duration = []
+    for _ in range(T):
+        c_start = time.time()
+        fn()
+        c_end = time.time()
+        duration.append(1e3 * (c_end - c_start))
+
+    avrg_duration = sum(duration) / len(duration)
+    min_duration = min(duration)
+    max_duration = max(duration)
+    return avrg_duration, min_duration, max_duration
+
+
+xs, us, ocp = createProblem()
+problem = ocp.croc_problem
+benchmarks = [
+    ("FDDP.solve", lambda: ocp.ddp.solve(xs, us, MAXITER, False)),
+    ("ShootingProblem.calc", lambda: problem.calc(xs, us)),
+    ("ShootingProblem.calcDiff", lambda: problem.calcDiff(xs, us)),
+]
+
+print("\033[1m")
+print("Thread scaling (params.ocp.num_threads: {}):".format(ocp.params.ocp.num_threads))
+reference = {}
+for num_threads in range(1, os.cpu_count() + 1):
+    problem.nthreads = num_threads
+    print("  {} thread(s), nthreads = {}".format(num_threads, problem.nthreads))
+    for name, fn in benchmarks:
+        avrg_duration, min_duration, max_duration = runBenchmark(fn)
+        reference.setdefault(name, avrg_duration)
+        print(
+            "    {0} [ms]: {1} ({2}, {3}), speedup {4:.2f}".format(
+                name,
+                avrg_duration,
+                min_duration,
+                max_duration,
+                reference[name] / avrg_duration,
+            )
+        )
+print("\033[0m")
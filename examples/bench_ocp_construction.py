@@ -0,0 +1,60 @@
+"""
+Measure the construction time of the walking OCP as a function of the horizon length
+(N_periods) and of the duration of each phase of the gait.
+"""
+import quadruped_reactive_walking as qrw
+from quadruped_reactive_walking.ocp_defs.walking import WalkingOCPBuilder
+from quadruped_reactive_walking.wb_mpc.target import Target, make_footsteps_and_refs
+
+import sys
+import time
+import yaml
+
+T = int(sys.argv[1]) if (len(sys.argv) > 1) else 5  # number of trials
+N_PERIODS = [1, 2, 3]
+PHASE_SCALES = [0.5, 1, 2]
+
+
+def make_params(base_params, n_periods, phase_scale):
+    config = yaml.safe_load(base_params.raw_str)
+    robot = config["robot"]
+    gait = list(robot["gait"])
+    for i in range(0, len(gait), 5):
+        gait[i] = max(1, int(gait[i] * phase_scale))
+    robot["gait"] = gait
+    robot["N_periods"] = n_periods
+    return qrw.Params.create_from_str(yaml.dump(config))
+
+
+def runConstructionBenchmark(params):
+    footsteps, base_refs = make_footsteps_and_refs(params, Target(params))
+    duration = []
+    for _ in range(T):
+        c_start = time.time()
+        WalkingOCPBuilder(params, footsteps, base_refs)
+        c_end = time.time()
+        duration.append(1e3 * (c_end - c_start))
+
+    avrg_duration = sum(duration) / len(duration)
+    min_duration = min(duration)
+    max_duration = max(duration)
+    return avrg_duration, min_duration, max_duration
+
+
+base_params = qrw.Params.create_from_file()
+print("\033[1m")
+print("WalkingOCPBuilder construction:")
+for n_periods in N_PERIODS:
+    for phase_scale in PHASE_SCALES:
+        params = make_params(base_params, n_periods, phase_scale)
+        avrg_duration, min_duration, max_duration = runConstructionBenchmark(params)
+        print(
+            "  N_gait = {0:4d} (gait length {1:3d}) [ms]: {2} ({3}, {4})".format(
+                params.N_gait,
+                params.gait.shape[0],
+                avrg_duration,
+                min_duration,
+                max_duration,
+            )
+        )
+print("\033[0m")
@@ -0,0 +1,56 @@
+"""
+Overhead of one MPC cycle (push_node, solve, get_results) outside of the solver, for
+the Python CrocOCP and its C++ counterpart CrocNativeOCP.
+"""
+import quadruped_reactive_walking as qrw
+from quadruped_reactive_walking.wb_mpc import get_ocp_from_str
+from quadruped_reactive_walking.wb_mpc.target import Target, make_footsteps_and_refs
+
+import sys
+import time
+
+T = int(sys.argv[1]) if (len(sys.argv) > 1) else int(1e3)  # number of trials
+OCP_TYPES = ["croc", "croc-native"]
+
+
+def runCycleBenchmark(ocp, footsteps, base_refs):
+    x0 = ocp.task.x0
+    ocp.push_node(0, x0, footsteps[0], base_refs[0])
+    ocp.solve(0)
+    ocp.get_results()
+
+    total, overhead = [], []
+    for k in range(1, T + 1):
+        t = k % len(footsteps)
+        c_start = time.time()
+        ocp.push_node(k * ocp.params.mpc_wbc_ratio, x0, footsteps[t], base_refs[t])
+        ocp.solve(k)
+        ocp.get_results(ocp.params.window_size)
+        c_end = time.time()
+        total.append(1e6 * (c_end - c_start))
+        overhead.append(total[-1] - 1e6 * ocp.t_ddp)
+
+    return (
+        sum(total) / len(total),
+        sum(overhead) / len(overhead),
+        min(overhead),
+        max(overhead),
+    )
+
+
+params = qrw.Params.create_from_file()
+footsteps, base_refs = make_footsteps_and_refs(params, Target(params))
+
+print("\033[1m")
+print("MPC cycle [us]: total, overhead (min, max)")
+for type_str in OCP_TYPES:
+    ocp = get_ocp_from_str(type_str)(params, footsteps, base_refs)
+    avrg_total, avrg_overhead, min_overhead, max_overhead = runCycleBenchmark(
+        ocp, footsteps, base_refs
+    )
+    print(
+        "  {0}: {1}, {2} ({3}, {4})".format(
+            type_str, avrg_total, avrg_overhead, min_overhead, max_overhead
+        )
+    )
+print("\033[0m")
@@ -0,0 +1,89 @@
+"""
+Micro-benchmark of the update of one stage of the walking OCP: name-based lookup of
+every contact and cost (as done when a stage is created) against the precomputed
+stage handles used by update_model, and of the complete CrocOCP.push_node.
+"""
+import quadruped_reactive_walking as qrw
+from quadruped_reactive_walking.wb_mpc import CrocOCP as OCP
+from quadruped_reactive_walking.wb_mpc.target import Target, make_footsteps_and_refs
+from quadruped_reactive_walking.ocp_defs.walking import get_active_feet
+
+import numpy as np
+import sys
+import time
+
+T = int(sys.argv[1]) if (len(sys.argv) > 1) else int(5e3)  # number of trials
+
+
+def update_by_name(builder, model, feet_pos, base_vel_ref, support_feet):
+    for i in builder.task.feet_ids:
+        name = builder.rmodel.frames[i].name + "_contact"
+        model.differential.contacts.changeContactStatus(name, i in support_feet)
+    builder.update_tracking_costs(
+        model.differential.costs, feet_pos, base_vel_ref, support_feet
+    )
+
+
+def update_with_handles(builder, model, feet_pos, base_vel_ref, support_feet):
+    builder.update_model(model, feet_pos, base_vel_ref, support_feet)
+
+
+def runUpdateBenchmark(update, builder, footsteps, base_refs):
+    feet_ids = np.asarray(builder.task.feet_ids)
+    models = builder.life_rm
+    gait = builder.life_gait
+    duration = []
+    for k in range(T):
+        t = k % len(models)
+        support_feet = feet_ids[gait[t] == 1]
+        feet_pos = get_active_feet(footsteps[t], support_feet)
+        c_start = time.time()
+        update(builder, models[t], feet_pos, base_refs[t], support_feet)
+        c_end = time.time()
+        duration.append(1e6 * (c_end - c_start))
+
+    avrg_duration = sum(duration) / len(duration)
+    min_duration = min(duration)
+    max_duration = max(duration)
+    return avrg_duration, min_duration, max_duration
+
+
+def runPushNodeBenchmark(ocp, footsteps, base_refs):
+    x0 = ocp.task.x0
+    duration = []
+    for k in range(1, T + 1):
+        t = k % len(footsteps)
+        c_start = time.time()
+        ocp.push_node(k * ocp.params.mpc_wbc_ratio, x0, footsteps[t], base_refs[t])
+        c_end = time.time()
+        duration.append(1e6 * (c_end - c_start))
+
+    avrg_duration = sum(duration) / len(duration)
+    min_duration = min(duration)
+    max_duration = max(duration)
+    return avrg_duration, min_duration, max_duration
+
+
+params = qrw.Params.create_from_file()
+footsteps, base_refs = make_footsteps_and_refs(params, Target(params))
+ocp = OCP(params, footsteps, base_refs)
+builder = ocp._builder
+
+print("\033[1m")
+print("Stage update [us]:")
+for name, update in [("by name", update_by_name), ("handles", update_with_handles)]:
+    avrg_duration, min_duration, max_duration = runUpdateBenchmark(
+        update, builder, footsteps, base_refs
+    )
+    print(
+        "  {0}: {1} ({2}, {3})".format(name, avrg_duration, min_duration, max_duration)
+    )
+avrg_duration, min_duration, max_duration = runPushNodeBenchmark(
+    ocp, footsteps, base_refs
+)
+print(
+    "CrocOCP.push_node [us]: {0} ({1}, {2})".format(
+        avrg_duration, min_duration, max_duration
+    )
+)
+print("\033[0m")
@@ -0,0 +1,123 @@
+"""
+Compare the cost of encoding, serializing, deserializing and decoding the MPC solve
+request and response with the Float64MultiArray messages (multiarray transport) and
+with the packed byte payload (binary transport).
+Only the message generation of the package is needed, not a running ROS master.
+"""
+import quadruped_reactive_walking as qrw
+from quadruped_reactive_walking.wb_mpc.task_spec import TaskSpec
+from quadruped_reactive_walking.srv import (
+    MPCSolveRequest,
+    MPCSolveResponse,
+    MPCSolveBinaryRequest,
+    MPCSolveBinaryResponse,
+)
+from quadruped_reactive_walking.tools.ros_tools import (
+    numpy_to_multiarray_float64,
+    multiarray_to_numpy_float64,
+    listof_numpy_to_multiarray_float64,
+    multiarray_to_listof_numpy_float64,
+)
+from quadruped_reactive_walking.tools.serialization import pack_arrays, unpack_arrays
+
+from io import BytesIO
+import numpy as np
+import sys
+import time
+
+T = int(sys.argv[1]) if (len(sys.argv) > 1) else int(1e3)  # number of trials
+
+
+def make_data():
+    params = qrw.Params.create_from_file()
+    pd = TaskSpec(params)
+    W = params.window_size
+    x0 = pd.x0
+    footstep = np.random.randn(3, 4)
+    base_ref = np.random.randn(6)
+    gait = np.ones((params.N_gait + 1, 4), dtype=np.int32)
+    xs = [np.random.randn(pd.nx) for _ in range(W + 1)]
+    us = [np.random.randn(pd.nu) for _ in range(W)]
+    K = [np.random.randn(pd.nu, pd.ndx) for _ in range(W)]
+    return (x0, footstep, base_ref), (gait, xs, us, K)
+
+
+def roundtrip(msg, msg_cls):
+    buff = BytesIO()
+    msg.serialize(buff)
+    return msg_cls().deserialize(buff.getvalue())
+
+
+def multiarray_roundtrip(request, response):
+    x0, footstep, base_ref = request
+    req = roundtrip(
+        MPCSolveRequest(
+            k=0,
+            x0=numpy_to_multiarray_float64(x0),
+            footstep=numpy_to_multiarray_float64(footstep),
+            base_ref=numpy_to_multiarray_float64(base_ref),
+        ),
+        MPCSolveRequest,
+    )
+    multiarray_to_numpy_float64(req.x0)
+    multiarray_to_numpy_float64(req.footstep)
+    multiarray_to_numpy_float64(req.base_ref)
+
+    gait, xs, us, K = response
+    res = roundtrip(
+        MPCSolveResponse(
+            run_success=True,
+            gait=numpy_to_multiarray_float64(gait),
+            xs=listof_numpy_to_multiarray_float64(xs),
+            us=listof_numpy_to_multiarray_float64(us),
+            K=listof_numpy_to_multiarray_float64(K),
+        ),
+        MPCSolveResponse,
+    )
+    multiarray_to_numpy_float64(res.gait).astype(np.int32)
+    multiarray_to_listof_numpy_float64(res.xs)
+    multiarray_to_listof_numpy_float64(res.us)
+    multiarray_to_listof_numpy_float64(res.K)
+    return len(req.x0.data) + len(res.K.data)
+
+
+def binary_roundtrip(request, response):
+    req = roundtrip(
+        MPCSolveBinaryRequest(k=0, data=pack_arrays(request)), MPCSolveBinaryRequest
+    )
+    unpack_arrays(req.data)
+
+    res = roundtrip(
+        MPCSolveBinaryResponse(run_success=True, data=pack_arrays(response)),
+        MPCSolveBinaryResponse,
+    )
+    gait, xs, us, K = unpack_arrays(res.data)
+    list(xs), list(us), list(K)
+    return len(req.data) + len(res.data)
+
+
+def runBenchmark(fun, request, response):
+    duration = []
+    for _ in range(T):
+        c_start = time.time()
+        fun(request, response)
+        c_end = time.time()
+        duration.append(1e3 * (c_end - c_start))
+
+    avrg_duration = sum(duration) / len(duration)
+    min_duration = min(duration)
+    max_duration = max(duration)
+    return avrg_duration, min_duration, max_duration
+
+
+request, response = make_data()
+print("\033[1m")
+print("MPC solve message round trip:")
+for name, fun in [("multiarray", multiarray_roundtrip), ("binary", binary_roundtrip)]:
+    avrg_duration, min_duration, max_duration = runBenchmark(fun, request, response)
+    print(
+        "  {0} [ms]: {1} ({2}, {3})".format(
+            name, avrg_duration, min_duration, max_duration
+        )
+    )
+print("\033[0m")
@@ -0,0 +1,78 @@
+"""
+Benchmark the socket MPC transport on one machine: a server is started in a child
+process on a loopback address, and the round trip of each solve is compared to the
+solve time reported by the server and to a local synchronous solve.
+
+Usage: python bench_socket_mpc.py [number of solves] [address]
+"""
+import quadruped_reactive_walking as qrw
+from quadruped_reactive_walking.wb_mpc import CrocOCP as OCP
+from quadruped_reactive_walking.wb_mpc.target import Target, make_footsteps_and_refs
+from quadruped_reactive_walking.wbmpc_wrapper_sync import SyncMPCWrapper
+from quadruped_reactive_walking.wbmpc_wrapper_socket import (
+    SocketMPCServer,
+    SocketMPCWrapperClient,
+)
+
+from multiprocessing import Event, Process
+import numpy as np
+import sys
+import time
+
+T = int(sys.argv[1]) if (len(sys.argv) > 1) else 200  # number of solves
+ADDRESS = sys.argv[2] if (len(sys.argv) > 2) else "tcp://127.0.0.1:5555"
+
+
+def serve(address, ready):
+    server = SocketMPCServer(address)
+    ready.set()
+    server.serve_one()
+
+
+def runBenchmark(mpc, footsteps, base_refs):
+    x0 = mpc.pd.x0
+    duration = []
+    solving_duration = []
+    for k in range(T):
+        i = k % len(footsteps)
+        c_start = time.time()
+        mpc.solve(k * mpc.params.mpc_wbc_ratio, x0, footsteps[i], base_refs[i])
+        res = mpc.get_latest_result()
+        c_end = time.time()
+        duration.append(1e3 * (c_end - c_start))
+        solving_duration.append(1e3 * res.solving_duration)
+    return np.array(duration), np.array(solving_duration)
+
+
+def printStats(name, duration):
+    print(
+        "  {0} [ms]: {1} ({2}, {3})".format(
+            name, np.mean(duration), np.min(duration), np.max(duration)
+        )
+    )
+
+
+if __name__ == "__main__":
+    params = qrw.Params.create_from_file()
+    footsteps, base_refs = make_footsteps_and_refs(params, Target(params))
+
+    ready = Event()
+    server = Process(target=serve, args=(ADDRESS, ready))
+    server.start()
+    ready.wait()
+
+    client = SocketMPCWrapperClient(params, footsteps, base_refs, OCP, address=ADDRESS)
+    remote, remote_solve = runBenchmark(client, footsteps, base_refs)
+    client.stop_parallel_loop()
+    server.join()
+
+    local = SyncMPCWrapper(params, footsteps, base_refs, OCP)
+    local_duration, local_solve = runBenchmark(local, footsteps, base_refs)
+
+    print("\033[1m")
+    print("MPC over {}:".format(ADDRESS))
+    printStats("remote round trip", remote)
+    printStats("remote solve", remote_solve)
+    printStats("transport overhead", remote - remote_solve)
+    printStats("local solve", local_duration)
+    print("\033[0m")
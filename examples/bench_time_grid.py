@@ -0,0 +1,98 @@
+"""
+MPC on time grids covering the same horizon (starting_nodes * dt_mpc) with fewer
+nodes, the steps growing from dt_mpc: solve time and tracking of a constant base
+velocity reference.
+
+The MPC runs in closed loop on the model of the OCP: at each iteration the problem is
+moved forward by dt_mpc (WalkingOCPBuilder.update_horizon, with the warm start shifted
+on the grid), solved from the current state with max_iter iterations, and the first
+control is applied for dt_mpc. The tracking error is the RMS error of the base velocity
+of the closed-loop states with respect to the reference, once the start phase is over.
+"""
+import quadruped_reactive_walking as qrw
+from quadruped_reactive_walking.ocp_defs.walking import WalkingOCPBuilder
+from quadruped_reactive_walking.ocp_defs.time_grid import (
+    geometric_time_grid,
+    shift_points,
+    shift_trajectory,
+    uniform_time_grid,
+)
+from quadruped_reactive_walking.wb_mpc.target import Target, make_footsteps_and_refs
+
+import crocoddyl
+import numpy as np
+import pinocchio as pin
+import sys
+import time
+
+N_GAITS = int(sys.argv[1]) if (len(sys.argv) > 1) else int(4)  # gait periods
+INIT_MAX_ITER = 100
+V_REF = pin.Motion(np.array([0.2, 0.0, 0.0, 0.0, 0.0, 0.0]))
+
+
+def runMPCBenchmark(params, time_grid):
+    footsteps, base_refs = make_footsteps_and_refs(params, Target(params))
+    builder = WalkingOCPBuilder(params, footsteps, base_refs, time_grid=time_grid)
+    problem = builder.problem
+    ddp = crocoddyl.SolverFDDP(problem)
+    points = shift_points(time_grid, params.dt_mpc)
+    # The first node lasts dt_mpc: its model moves the plant forward
+    plant = problem.runningModels[0]
+    plant_data = plant.createData()
+
+    x = builder.x0
+    xs = [x] * (problem.T + 1)
+    ddp.solve(xs, problem.quasiStatic(xs[:-1]), INIT_MAX_ITER, False)
+
+    S = params.starting_nodes
+    nq = builder.rmodel.nq
+    num_steps = S + N_GAITS * len(params.gait)
+    duration, num_iters, v_base = [], [], []
+    for t in range(num_steps):
+        k = (t + 1) * params.mpc_wbc_ratio
+        plant.calc(plant_data, x, ddp.us[0])
+        x = plant_data.xnext.copy()
+
+        xs, us = shift_trajectory(plant.state, ddp.xs, ddp.us, points)
+        builder.update_horizon(k, np.zeros((3, 4)), V_REF)
+        problem.x0 = x
+        xs[0] = x
+
+        c_start = time.time()
+        ddp.solve(xs, us, params.ocp.max_iter, False)
+        duration.append(1e3 * (time.time() - c_start))
+        num_iters.append(ddp.iter)
+        if t >= S:
+            v_base.append(x[nq : nq + 6])
+
+    error = np.sqrt(np.mean(np.sum((np.array(v_base) - V_REF.vector) ** 2, axis=1)))
+    return np.mean(duration), np.mean(num_iters), error
+
+
+params = qrw.Params.create_from_file()
+dt = params.dt_mpc
+num_nodes = params.starting_nodes
+horizon = num_nodes * dt
+grids = [("uniform", uniform_time_grid(dt, num_nodes))]
+for n in [3 * num_nodes // 4, num_nodes // 2, num_nodes // 4]:
+    grids.append(("geometric", geometric_time_grid(dt, horizon, n)))
+
+print("\033[1m")
+print(
+    "MPC over {:.3f} s horizons, {} gait periods: solve time [ms], iterations, "
+    "base velocity RMS error".format(horizon, N_GAITS)
+)
+for name, time_grid in grids:
+    avrg_duration, avrg_iters, error = runMPCBenchmark(params, time_grid)
+    print(
+        "  {0} {1} nodes (dt {2:.4f} to {3:.4f}): {4:.2f}, {5:.1f}, {6:.4f}".format(
+            name,
+            len(time_grid),
+            time_grid[0],
+            time_grid[-1],
+            avrg_duration,
+            avrg_iters,
+            error,
+        )
+    )
+print("\033[0m")
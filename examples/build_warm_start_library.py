@@ -0,0 +1,93 @@
+"""
+Build the warm-start library used by the OCPs when ocp.warm_start_library is enabled.
+
+For each velocity of a grid, walk in open loop at this constant velocity reference
+until the start of the walk has left the horizon, then store the converged horizon
+after each node of one gait cycle.
+
+The grid holds the velocities of v_switch, or when predefined_vel is false, a grid of
+n (default 3) values per axis over the ranges of the joystick. The footstep targets
+are those the Controller sends for params.movement, and the library is only loaded by
+the OCP type it was built with.
+
+Usage: python build_warm_start_library.py [ocp type] [n]
+"""
+import quadruped_reactive_walking as qrw
+from quadruped_reactive_walking.wb_mpc import get_ocp_from_str
+from quadruped_reactive_walking.wb_mpc.target import Target, make_footsteps_and_refs
+from quadruped_reactive_walking.wb_mpc.warm_start import WarmStartLibrary
+
+import itertools
+import sys
+import time
+import numpy as np
+
+OCP_TYPE = sys.argv[1] if (len(sys.argv) > 1) else "croc"
+N_PER_AXIS = int(sys.argv[2]) if (len(sys.argv) > 2) else 3
+# Forward, lateral and yaw velocity ranges of the joystick (see Joystick.hpp)
+JOYSTICK_LIMITS = {0: 0.5, 1: 0.3, 5: 1.0}
+MAX_ITER = 100
+
+
+def velocity_grid(params):
+    if params.predefined_vel:
+        return np.unique(np.asarray(params.v_switch).T, axis=0)
+    velocities = []
+    axes = [np.linspace(-lim, lim, N_PER_AXIS) for lim in JOYSTICK_LIMITS.values()]
+    for values in itertools.product(*axes):
+        v = np.zeros(6)
+        v[list(JOYSTICK_LIMITS)] = values
+        velocities.append(v)
+    return np.array(velocities)
+
+
+def footstep_target(params, target, k):
+    """Footstep targets of the request of iteration k, as sent by the Controller."""
+    if params.movement == "base_circle" or params.movement == "walk":
+        return np.zeros((3, 4))
+    return target.compute(k + params.N_gait * params.mpc_wbc_ratio)
+
+
+def walk_at(params, v, footsteps, base_refs):
+    """Converged horizons after each node of the second gait cycle of the walk."""
+    ocp = get_ocp_from_str(OCP_TYPE)(params, footsteps, base_refs)
+    ocp.max_iter = MAX_ITER
+    schedule = ocp._builder.schedule
+    S, L = params.starting_nodes, len(params.gait)
+    if schedule.life_index[S + 2 * L - 1] < 0:
+        raise ValueError("The walk must last at least 2 gait cycles.")
+
+    xs = np.empty((L, params.N_gait + 1, ocp.task.nx))
+    us = np.empty((L, params.N_gait, ocp.task.nu))
+    target = Target(params)
+    x = ocp.task.x0
+    ocp.push_node(0, x, footsteps[0], v)
+    ocp.solve(0)
+    for t in range(S + 2 * L):
+        k = (t + 1) * params.mpc_wbc_ratio
+        ocp.push_node(k, x, footstep_target(params, target, k), v)
+        ocp.solve(t + 1)
+        horizon_xs, horizon_us = ocp.get_horizon()
+        x = horizon_xs[1]
+        if t >= S + L:
+            xs[schedule.life_index[t]] = horizon_xs
+            us[schedule.life_index[t]] = horizon_us
+    return xs, us
+
+
+params = qrw.Params.create_from_file()
+footsteps, base_refs = make_footsteps_and_refs(params, Target(params))
+velocities = velocity_grid(params)
+
+print("\033[1m")
+print("Building the warm-start library of {} velocities".format(len(velocities)))
+start = time.time()
+results = [walk_at(params, v, footsteps, base_refs) for v in velocities]
+library = WarmStartLibrary(
+    velocities,
+    np.stack([xs for xs, _ in results]),
+    np.stack([us for _, us in results]),
+)
+library.save(params, OCP_TYPE)
+print("Done in {:.1f} s".format(time.time() - start))
+print("\033[0m")
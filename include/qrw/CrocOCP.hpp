@@ -0,0 +1,105 @@
+#pragma once
+
+#include "qrw/IOCPAbstract.hpp"
+
+#include <deque>
+#include <unordered_map>
+#include <crocoddyl/core/action-base.hpp>
+#include <crocoddyl/core/optctrl/shooting.hpp>
+#include <crocoddyl/core/solvers/fddp.hpp>
+#include <crocoddyl/core/costs/cost-sum.hpp>
+#include <crocoddyl/multibody/contacts/multiple-contacts.hpp>
+#include <crocoddyl/multibody/residuals/frame-translation.hpp>
+#include <crocoddyl/multibody/residuals/frame-velocity.hpp>
+
+namespace qrw {
+
+/// \brief Walking OCP whose receding-horizon cycle (push_node, solve,
+/// get_results) runs entirely in C++.
+///
+/// The stages are built beforehand (by the Python WalkingOCPBuilder) and
+/// handed over with the gait schedule; this class only selects, updates and
+/// appends them, and calls the FDDP solver.
+class CrocOCP : public IOCPAbstract {
+ public:
+  using ActionModel = crocoddyl::ActionModelAbstract;
+  using ActionData = crocoddyl::ActionDataAbstract;
+  using ModelPtr = boost::shared_ptr<ActionModel>;
+  using DataPtr = boost::shared_ptr<ActionData>;
+
+  /// Phases of the walk, as in ocp_defs/gait_schedule.py
+  enum Phase { START = 0, LIFE = 1, END = 2 };
+
+  /// \param problem Shooting problem holding the starting stages
+  /// \param life_models Stages of the gait cycle
+  /// \param end_models Stages of the end of the walk
+  /// \param foot_names Frame names of the feet
+  /// \param phase Phase of each node of the walk
+  /// \param model_index Index of the model of each node (-1: leaving stage)
+  /// \param timeline Gait of the initial horizon followed by the gait of
+  /// each node
+  CrocOCP(Params const& params, pinocchio::Model const& model,
+          boost::shared_ptr<crocoddyl::ShootingProblem> problem,
+          std::vector<ModelPtr> const& life_models,
+          std::vector<ModelPtr> const& end_models,
+          std::vector<std::string> const& foot_names, VectorNi const& phase,
+          VectorNi const& model_index, MatrixN4i const& timeline);
+
+  void push_node(uint k, const ConstVecRefN& x0, Matrix34 footsteps,
+                 Motion base_vel_ref) override;
+  void solve(std::size_t k) override;
+
+  /// \brief Gait over the horizon once the last node has been pushed.
+  MatrixN4i current_gait() const;
+
+  boost::shared_ptr<crocoddyl::ShootingProblem> problem;
+  boost::shared_ptr<crocoddyl::SolverFDDP> ddp;
+  pinocchio::Model rmodel;
+  pinocchio::Data rdata;
+  VectorN x0;
+
+  double t_update = 0.;
+  double t_warm_start = 0.;
+  double t_ddp = 0.;
+  double t_solve = 0.;
+
+  /// Number of stage datas created after the construction
+  std::size_t num_created = 0;
+
+ protected:
+  /// What update_model needs to update a stage, resolved on first use.
+  struct StageHandles {
+    boost::shared_ptr<crocoddyl::ContactModelMultiple> contacts;
+    boost::shared_ptr<crocoddyl::CostModelSum> costs;
+    std::vector<std::vector<std::string>> swing_cost_names;
+    std::vector<boost::shared_ptr<crocoddyl::ResidualModelFrameTranslation>>
+        foot_tracking;
+    boost::shared_ptr<crocoddyl::ResidualModelFrameVelocity> base_velocity;
+    std::vector<bool> support;
+  };
+
+  StageHandles& get_handles(ModelPtr const& model);
+  void update_model(ModelPtr const& model, Matrix34 const& footsteps,
+                    Motion const* base_vel_ref,
+                    std::vector<bool> const& support);
+  DataPtr cycle_stage(ModelPtr const& model);
+
+  std::vector<ModelPtr> life_models_;
+  std::vector<ModelPtr> end_models_;
+  std::vector<std::string> contact_names_;
+  std::vector<std::string> force_reg_names_;
+  std::vector<std::string> foot_names_;
+  VectorNi phase_;
+  VectorNi model_index_;
+  MatrixN4i timeline_;
+  Eigen::Index horizon_;
+  Eigen::Index t_last_ = -1;
+
+  std::unordered_map<ActionModel const*, StageHandles> handles_;
+  /// Running stages of the problem, as (model, data) pairs
+  std::deque<std::pair<ModelPtr, DataPtr>> stages_;
+  /// Unused datas of each model
+  std::unordered_map<ActionModel const*, std::vector<DataPtr>> free_;
+};
+
+}  // namespace qrw
@@ -2,6 +2,7 @@
 
 #include "qrw/Params.hpp"
 #include <pinocchio/spatial/motion.hpp>
+#include <pinocchio/multibody/model.hpp>
 #include <pinocchio/multibody/data.hpp>
 #include <exception>
 
@@ -28,9 +29,9 @@ class IOCPAbstract {
   bool warm_start_empty() const;
   void cycle_warm_start();
 
-  inline void _check_ws_dim() const {
-    auto N = (std::size_t)params_.N_gait;
-    if ((xs_init.size() != N + 1) && (us_init.size() != N)) {
+  /// Check the warm start against the number of nodes T of the problem.
+  inline void _check_ws_dim(std::size_t T) const {
+    if ((xs_init.size() != T + 1) || (us_init.size() != T)) {
       throw std::runtime_error("Warm-start size wrong.");
     }
   }
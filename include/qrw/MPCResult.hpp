@@ -1,29 +1,93 @@
 #pragma once
 
+#include <sstream>
+#include <stdexcept>
 #include <vector>
 #include "qrw/Types.hpp"
 
 static constexpr uint NUM_GAIT_COLS = 4;
 
+/// Results of the MPC. The trajectories are stored in row-major matrices (one
+/// row per node), and each feedback gain K_i in row i of Ks_data, flattened in
+/// row-major order. The states cover window_size + 1 nodes, the controls and
+/// feedback gains only the first feedback_window nodes.
 struct MPCResult {
   MatrixNi gait;
-  std::vector<VectorN> xs;
-  std::vector<VectorN> us;
-  std::vector<MatrixN> Ks;
+  RowMatrixN xs_data;
+  RowMatrixN us_data;
+  RowMatrixN Ks_data;
+  uint nu;
+  uint ndx;
   double solving_duration = 0.0;
   uint num_iters = 0;
   bool new_result = false;
 
-  MPCResult(uint Ngait, uint nx, uint nu, uint ndx, uint window_size)
+  MPCResult(uint Ngait, uint nx, uint nu, uint ndx, uint window_size,
+            uint feedback_window)
       : gait(Ngait + 1, NUM_GAIT_COLS),
-        xs(window_size + 1, VectorN::Zero(nx)),
-        us(window_size, VectorN::Zero(nu)),
-        Ks(window_size, MatrixN::Zero(nu, ndx)) {
+        xs_data(RowMatrixN::Zero(window_size + 1, nx)),
+        us_data(RowMatrixN::Zero(feedback_window, nu)),
+        Ks_data(RowMatrixN::Zero(feedback_window, nu * ndx)),
+        nu(nu),
+        ndx(ndx) {
     gait.setZero();
   }
 
+  MPCResult(uint Ngait, uint nx, uint nu, uint ndx, uint window_size)
+      : MPCResult(Ngait, nx, nu, ndx, window_size, window_size) {}
+
   MPCResult(uint Ngait, uint nx, uint nu, uint ndx)
       : MPCResult(Ngait, nx, nu, ndx, Ngait) {}
 
-  uint get_window_size() { return static_cast<uint>(us.size()); }
+  uint get_window_size() { return static_cast<uint>(xs_data.rows() - 1); }
+  uint get_feedback_window() { return static_cast<uint>(us_data.rows()); }
+
+  /// \brief Feedback gain of node i, as a (nu, ndx) view.
+  Eigen::Map<RowMatrixN> K(Index i) {
+    return Eigen::Map<RowMatrixN>(Ks_data.row(i).data(), nu, ndx);
+  }
+
+  /// List-style accessors, copying the rows of the matrices.
+  std::vector<VectorN> get_xs() const { return rows(xs_data); }
+  std::vector<VectorN> get_us() const { return rows(us_data); }
+  std::vector<MatrixN> get_Ks() const {
+    std::vector<MatrixN> Ks;
+    for (Index i = 0; i < Ks_data.rows(); i++) {
+      Ks.push_back(
+          Eigen::Map<const RowMatrixN>(Ks_data.row(i).data(), nu, ndx));
+    }
+    return Ks;
+  }
+
+  /// The setters throw std::invalid_argument if the number of nodes differs.
+  void set_xs(std::vector<VectorN> const &xs) { set_rows(xs_data, xs); }
+  void set_us(std::vector<VectorN> const &us) { set_rows(us_data, us); }
+  void set_Ks(std::vector<MatrixN> const &Ks) {
+    check_size(Ks_data, Ks.size());
+    for (std::size_t i = 0; i < Ks.size(); i++) K((Index)i) = Ks[i];
+  }
+
+ private:
+  static std::vector<VectorN> rows(RowMatrixN const &data) {
+    std::vector<VectorN> out;
+    for (Index i = 0; i < data.rows(); i++) out.push_back(data.row(i));
+    return out;
+  }
+
+  static void set_rows(RowMatrixN &data, std::vector<VectorN> const &rows) {
+    check_size(data, rows.size());
+    for (std::size_t i = 0; i < rows.size(); i++) {
+      data.row((Index)i) = rows[i].transpose();
+    }
+  }
+
+  static void check_size(RowMatrixN const &data, std::size_t size) {
+    if ((std::size_t)data.rows() != size) {
+      std::ostringstream ss;
+      ss << "vector size is non-mutable (";
+      ss << "expected " << data.rows();
+      ss << ", got " << size << ").";
+      throw std::invalid_argument(ss.str());
+    }
+  }
 };
@@ -43,6 +43,20 @@ struct OCPParams {
   uint init_max_iters;
   bool verbose;
   double tol;
+  VectorNi cpu_affinity_controller;      // Cores of the control loop
+  VectorNi cpu_affinity_mpc;             // Cores of the MPC worker process
+  VectorNi cpu_affinity_solver_threads;  // Cores of the solver thread pool
+  int rt_priority_controller;  // SCHED_FIFO priority of the control loop
+  int rt_priority_mpc;         // SCHED_FIFO priority of the MPC worker
+  std::string overrun_policy;  // What to do with requests when the MPC is late
+  uint num_speculative_workers;  // Extra MPC workers solving other velocities
+  VectorNi cpu_affinity_speculative;  // Cores of the speculative workers (one
+                                      // per worker, cycled)
+  bool warm_start_library;  // Warm-start from the library on velocity jumps
+  double warm_start_jump;   // Velocity reference change counted as a jump
+  bool rti;  // Real-time iteration: prepare the next solve after the results
+  double time_budget;    // Wall-clock budget of a solve, 0 for max_iter
+  uint time_grid_nodes;  // Nodes of the geometric time grid, 0 for uniform
 };
 
 std::ostream &operator<<(std::ostream &oss, const OCPParams &p);
@@ -118,6 +132,16 @@ struct Params {
   bool asynchronous_mpc;  // Run the MPC in an asynchronous process parallel of
                           // the main loop
   bool mpc_in_rosnode;    // Run the MPC on a separate rosnode
+  std::string ros_transport;       // Encoding of the MPC rosnode messages
+                                   // (multiarray, binary or stream)
+  std::string mpc_remote_address;  // Address of a socket MPC server, empty to
+                                   // solve the MPC locally
+  bool delay_compensation;  // Predict the initial state of the asynchronous MPC
+                            // forward by the expected solver latency
+  uint feedback_window;     // Number of nodes whose controls and feedback gains
+                            // are sent to the controller
+  uint horizon_log_period;  // Send the whole horizon to the logger every n MPC
+                            // results (0: never)
 
   // General control parameters
   VectorN q_init;  // Initial articular positions
@@ -12,6 +12,7 @@ void exposeEstimator();
 void exposeFilter();
 void exposeMPCResult();
 void exposeSolverInterface();
+void exposeCrocOCP();
 void exposeMPCInterface();
 void exposeResidualFlyHigh();
 }  // namespace qrw
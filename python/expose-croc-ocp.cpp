@@ -0,0 +1,95 @@
+#include "qrw/CrocOCP.hpp"
+
+#include "qrw/bindings/python.hpp"
+#include <eigenpy/optional.hpp>
+
+namespace qrw {
+
+namespace {
+
+std::vector<CrocOCP::ModelPtr> to_models(bp::list const &models) {
+  std::vector<CrocOCP::ModelPtr> out;
+  for (long i = 0; i < bp::len(models); i++) {
+    out.push_back(bp::extract<CrocOCP::ModelPtr>(models[i]));
+  }
+  return out;
+}
+
+boost::shared_ptr<CrocOCP> make_croc_ocp(
+    Params const &params, pinocchio::Model const &model,
+    boost::shared_ptr<crocoddyl::ShootingProblem> problem,
+    bp::list const &life_models, bp::list const &end_models,
+    bp::list const &foot_names, VectorNi const &phase,
+    VectorNi const &model_index, MatrixN4i const &timeline) {
+  std::vector<std::string> names;
+  for (long i = 0; i < bp::len(foot_names); i++) {
+    names.push_back(bp::extract<std::string>(foot_names[i]));
+  }
+  return boost::make_shared<CrocOCP>(
+      params, model, problem, to_models(life_models), to_models(end_models),
+      names, phase, model_index, timeline);
+}
+
+void push_node(CrocOCP &self, uint k, const ConstVecRefN &x0,
+               Matrix34 footsteps, bp::object base_vel_ref) {
+  bp::extract<Motion> motion(base_vel_ref);
+  if (motion.check()) {
+    self.push_node(k, x0, footsteps, motion());
+  } else {
+    Vector6 v = bp::extract<Vector6>(base_vel_ref);
+    self.push_node(k, x0, footsteps, Motion(v));
+  }
+}
+
+bp::tuple get_results(CrocOCP &self,
+                      boost::optional<uint> window_size = boost::none) {
+  self.xs_init = self.ddp->get_xs();
+  self.us_init = self.ddp->get_us();
+  const std::size_t w = window_size ? *window_size : self.us_init.size();
+  bp::list xs, us, K;
+  for (std::size_t i = 0; i < w + 1; i++) xs.append(self.xs_init[i]);
+  for (std::size_t i = 0; i < w; i++) {
+    us.append(self.us_init[i]);
+    K.append(MatrixN(self.ddp->get_K()[i]));
+  }
+  return bp::make_tuple(self.current_gait(), xs, us, K, self.t_ddp);
+}
+
+}  // namespace
+
+void exposeCrocOCP() {
+  bp::register_ptr_to_python<boost::shared_ptr<CrocOCP>>();
+  bp::class_<CrocOCP, bp::bases<IOCPAbstract>, boost::noncopyable>(
+      "CrocOCPNative",
+      "Walking OCP whose push_node/solve/get_results cycle runs in C++.",
+      bp::no_init)
+      .def("__init__", bp::make_constructor(
+                           &make_croc_ocp, bp::default_call_policies(),
+                           bp::args("params", "model", "problem", "life_models",
+                                    "end_models", "foot_names", "phase",
+                                    "model_index", "timeline")))
+      .def("push_node", &push_node,
+           bp::args("self", "k", "x0", "footsteps", "base_vel_ref"),
+           "Push a new node to the OCP.")
+      .def("solve", &CrocOCP::solve, bp::args("self", "k"))
+      .def("get_results", &get_results,
+           (bp::arg("self"), bp::arg("window_size") = boost::none),
+           "Fetch the results of the latest MPC iteration.")
+      .add_property("current_gait", &CrocOCP::current_gait)
+      .add_property(
+          "problem",
+          bp::make_getter(&CrocOCP::problem,
+                          bp::return_value_policy<bp::return_by_value>()))
+      .add_property("ddp", bp::make_getter(
+                               &CrocOCP::ddp,
+                               bp::return_value_policy<bp::return_by_value>()))
+      .def_readonly("x0", &CrocOCP::x0)
+      .def_readonly("t_update", &CrocOCP::t_update)
+      .def_readonly("t_warm_start", &CrocOCP::t_warm_start)
+      .def_readonly("t_ddp", &CrocOCP::t_ddp)
+      .def_readonly("t_solve", &CrocOCP::t_solve)
+      .def_readonly("num_created", &CrocOCP::num_created,
+                    "Number of stage datas created after the construction.");
+}
+
+}  // namespace qrw
@@ -1,28 +1,77 @@
 #include "qrw/MPCResult.hpp"
 
 #include "qrw/bindings/python.hpp"
-#include "qrw/bindings/custom-members.hpp"
 
 namespace qrw {
 
+namespace {
+
+/// Getter returning a numpy view (without copy) of a matrix member.
+template <RowMatrixN MPCResult::*member>
+Eigen::Ref<RowMatrixN> get_array(MPCResult &self) {
+  return self.*member;
+}
+
+/// Setter copying an array into a matrix member, without resizing it.
+template <RowMatrixN MPCResult::*member>
+void set_array(MPCResult &self, Eigen::Ref<const RowMatrixN> const &value) {
+  RowMatrixN &data = self.*member;
+  if (value.rows() != data.rows() || value.cols() != data.cols()) {
+    std::ostringstream ss;
+    ss << "array shape is non-mutable (";
+    ss << "expected (" << data.rows() << ", " << data.cols() << ")";
+    ss << ", got (" << value.rows() << ", " << value.cols() << ")).";
+    throw std::invalid_argument(ss.str());
+  }
+  data = value;
+}
+
+bp::object get_K_array(MPCResult &self) {
+  bp::object flat(Eigen::Ref<RowMatrixN>(self.Ks_data));
+  return flat.attr("reshape")(self.Ks_data.rows(), self.nu, self.ndx);
+}
+
+void set_K_array(MPCResult &self, bp::object value) {
+  bp::object array = bp::import("numpy").attr("asarray")(value);
+  set_array<&MPCResult::Ks_data>(
+      self, bp::extract<RowMatrixN>(
+                array.attr("reshape")(array.attr("shape")[0], -1))());
+}
+
+}  // namespace
+
 void exposeMPCResult() {
+  using custodian = bp::with_custodian_and_ward_postcall<0, 1>;
   bp::class_<MPCResult>(
       "MPCResult", "MPC result struct.",
-      bp::init<uint, uint, uint, uint, bp::optional<uint>>(
-          bp::args("self", "Ngait", "nx", "nu", "ndx", "window_size")))
+      bp::init<uint, uint, uint, uint, bp::optional<uint, uint>>(
+          bp::args("self", "Ngait", "nx", "nu", "ndx", "window_size",
+                   "feedback_window")))
       .def_readwrite("gait", &MPCResult::gait)
-      .add_property("xs", bp::make_getter(&MPCResult::xs),
-                    make_non_resizable_vec_member(&MPCResult::xs),
-                    "Predicted future trajectory.")
-      .add_property("us", bp::make_getter(&MPCResult::us),
-                    make_non_resizable_vec_member(&MPCResult::us),
-                    "Predicted feedforward controls.")
-      .add_property("K", bp::make_getter(&MPCResult::Ks),
-                    make_non_resizable_vec_member(&MPCResult::Ks),
-                    "Feedback gains for the controller.")
+      .add_property("xs", &MPCResult::get_xs, &MPCResult::set_xs,
+                    "Predicted future trajectory (list of states).")
+      .add_property("us", &MPCResult::get_us, &MPCResult::set_us,
+                    "Predicted feedforward controls (list of controls).")
+      .add_property("K", &MPCResult::get_Ks, &MPCResult::set_Ks,
+                    "Feedback gains for the controller (list of matrices).")
+      .add_property(
+          "xs_array",
+          bp::make_function(&get_array<&MPCResult::xs_data>, custodian()),
+          &set_array<&MPCResult::xs_data>,
+          "Predicted future trajectory, as a (window_size + 1, nx) view.")
+      .add_property(
+          "us_array",
+          bp::make_function(&get_array<&MPCResult::us_data>, custodian()),
+          &set_array<&MPCResult::us_data>,
+          "Predicted feedforward controls, as a (feedback_window, nu) view.")
+      .add_property("K_array", bp::make_function(&get_K_array, custodian()),
+                    &set_K_array,
+                    "Feedback gains, as a (feedback_window, nu, ndx) view.")
       .def_readwrite("solving_duration", &MPCResult::solving_duration)
       .def_readonly("window_size", &MPCResult::get_window_size,
                     "Size of the window to pass back to the MPC controller.")
+      .def_readonly("feedback_window", &MPCResult::get_feedback_window,
+                    "Number of nodes with feedforward controls and gains.")
       .def_readwrite("num_iters", &MPCResult::num_iters)
       .def_readwrite("new_result", &MPCResult::new_result);
 }
@@ -79,6 +79,11 @@ void exposeParams() {
       .def_readonly("enable_pyb_GUI", &Params::enable_pyb_GUI)
       .def_readonly("asynchronous_mpc", &Params::asynchronous_mpc)
       .def_readonly("mpc_in_rosnode", &Params::mpc_in_rosnode)
+      .def_readonly("ros_transport", &Params::ros_transport)
+      .def_readonly("mpc_remote_address", &Params::mpc_remote_address)
+      .def_readonly("delay_compensation", &Params::delay_compensation)
+      .def_readonly("feedback_window", &Params::feedback_window)
+      .def_readonly("horizon_log_period", &Params::horizon_log_period)
       .def_readonly("perfect_estimator", &Params::perfect_estimator)
       .def_readonly("use_qualisys", &Params::use_qualisys)
       .def_readonly("ocp", &Params::ocp)
@@ -97,6 +102,24 @@ void exposeParams() {
       .def_readonly("init_max_iters", &OCPParams::init_max_iters)
       .def_readonly("verbose", &OCPParams::verbose)
       .def_readonly("tol", &OCPParams::tol)
+      .def_readonly("cpu_affinity_controller",
+                    &OCPParams::cpu_affinity_controller)
+      .def_readonly("cpu_affinity_mpc", &OCPParams::cpu_affinity_mpc)
+      .def_readonly("cpu_affinity_solver_threads",
+                    &OCPParams::cpu_affinity_solver_threads)
+      .def_readonly("rt_priority_controller",
+                    &OCPParams::rt_priority_controller)
+      .def_readonly("rt_priority_mpc", &OCPParams::rt_priority_mpc)
+      .def_readonly("overrun_policy", &OCPParams::overrun_policy)
+      .def_readonly("num_speculative_workers",
+                    &OCPParams::num_speculative_workers)
+      .def_readonly("cpu_affinity_speculative",
+                    &OCPParams::cpu_affinity_speculative)
+      .def_readonly("warm_start_library", &OCPParams::warm_start_library)
+      .def_readonly("warm_start_jump", &OCPParams::warm_start_jump)
+      .def_readonly("rti", &OCPParams::rti)
+      .def_readonly("time_budget", &OCPParams::time_budget)
+      .def_readonly("time_grid_nodes", &OCPParams::time_grid_nodes)
       .def(bp::self_ns::str(bp::self));
 }
 
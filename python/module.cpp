@@ -13,6 +13,7 @@ BOOST_PYTHON_MODULE(quadruped_reactive_walking_pywrap) {
 
   eigenpy::enableEigenPySpecific<Vector6>();
   eigenpy::enableEigenPySpecific<RowMatrix6N>();
+  eigenpy::enableEigenPySpecific<RowMatrixN>();
   using StdVecVectorN = std::vector<VectorN>;
   using StdVecMatrixN = std::vector<MatrixN>;
   eigenpy::StdVectorPythonVisitor<StdVecVectorN, true>::expose("StdVecVectorN");
@@ -26,6 +27,7 @@ BOOST_PYTHON_MODULE(quadruped_reactive_walking_pywrap) {
   qrw::exposeFilter();
   qrw::exposeMPCResult();
   qrw::exposeSolverInterface();
+  qrw::exposeCrocOCP();
   qrw::exposeMPCInterface();
   qrw::exposeResidualFlyHigh();
 }
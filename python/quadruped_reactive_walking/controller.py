@@ -31,6 +31,32 @@ class ControllerResult:
         self.tau_ff = np.zeros(12)
 
 
+class LatencyHistogram:
+    """
+    Histogram of the delay (in control ticks) between an MPC request and the moment
+    its result is available to the control loop
+    """
+
+    def __init__(self, max_ticks):
+        self.counts = np.zeros(max_ticks + 1, dtype=np.int64)
+
+    def add(self, ticks):
+        self.counts[min(max(ticks, 0), len(self.counts) - 1)] += 1
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def quantile(self, q):
+        """
+        Smallest delay that is not exceeded by a fraction q of the measures
+        (0 if nothing was measured yet)
+        """
+        if self.total == 0:
+            return 0
+        return int(np.searchsorted(np.cumsum(self.counts), q * self.total))
+
+
 class DummyDevice:
     def __init__(self, h):
         self.imu = self.IMU()
@@ -62,6 +88,10 @@ def get_x_arr_no_base(xs):
 class Controller:
     t_mpc = 0.0
     q_security = np.array([1.2, 2.1, 3.14] * 4)
+    # Delays longer than this number of MPC periods are counted in the last bin
+    MAX_DELAY_PERIODS = 4
+    # Quantile of the latency histogram used as the expected delay
+    DELAY_QUANTILE = 0.5
 
     def __init__(
         self, params: qrw.Params, q_init, solver_cls: Type[wb_mpc.OCPAbstract]
@@ -113,6 +143,12 @@ class Controller:
         self.mpc_solved = False
         self.k_result = 0
         self.k_solve = 0
+        self.delay_compensation = params.delay_compensation and params.asynchronous_mpc
+        self.latency_histogram = LatencyHistogram(
+            self.MAX_DELAY_PERIODS * params.mpc_wbc_ratio
+        )
+        # Delay predicted for each pending request, indexed by the request iteration
+        self.predicted_delays = {}
         if self.params.interpolate_mpc:
             x_arr_nobase = get_x_arr_no_base([self.task.x0, self.task.x0, self.task.x0])
             q_arr_nobase = x_arr_nobase[:12]
@@ -120,7 +156,6 @@ class Controller:
                 q_arr_nobase,
                 np.array([0.0, params.dt_mpc, 2 * params.dt_mpc]),
             )
-        # TODO: reload warm starts here
 
         self.filter_q = qrw.LowPassFilter(params)
         self.filter_v = qrw.LowPassFilter(params)
@@ -130,8 +165,24 @@ class Controller:
         self.compute(device)
 
     def _create_mpc(self, solver_cls):
-        if self.params.mpc_in_rosnode:
-            if self.params.asynchronous_mpc:
+        if self.params.mpc_remote_address:
+            from .wbmpc_wrapper_socket import SocketMPCWrapperClient
+
+            return SocketMPCWrapperClient(
+                self.params,
+                self.footsteps,
+                self.base_refs,
+                solver_cls,
+                synchronous=not self.params.asynchronous_mpc,
+            )
+        elif self.params.mpc_in_rosnode:
+            if self.params.asynchronous_mpc and self.params.ros_transport == "stream":
+                from .wbmpc_wrapper_ros import ROSMPCWrapperClient
+
+                return ROSMPCWrapperClient(
+                    self.params, self.footsteps, self.base_refs, solver_cls, False
+                )
+            elif self.params.asynchronous_mpc:
                 from .wbmpc_wrapper_ros_mp import ROSMPCAsyncClient
 
                 return ROSMPCAsyncClient(
@@ -144,7 +195,11 @@ class Controller:
                     self.params, self.footsteps, self.base_refs, solver_cls, True
                 )
         else:
-            if self.params.asynchronous_mpc:
+            if self.params.asynchronous_mpc and self.params.ocp.num_speculative_workers:
+                from .wbmpc_wrapper_speculative import (
+                    SpeculativeMPCWrapper as MPCWrapper,
+                )
+            elif self.params.asynchronous_mpc:
                 from .wbmpc_wrapper_multiprocess import (
                     MultiprocessMPCWrapper as MPCWrapper,
                 )
@@ -187,13 +242,16 @@ class Controller:
 
         if self.k % self.params.mpc_wbc_ratio == 0:
             if self.mpc_solved:
-                self.k_solve = self.k
+                if not self.delay_compensation:
+                    self.k_solve = self.k
                 self.mpc_solved = False
 
             if self.params.closed_loop or not self.initialized:
                 x = self.x_estim
+                if self.delay_compensation and self.initialized:
+                    x = self.predict_state(x)
             else:
-                x = self.mpc_result.xs[1]
+                x = self.mpc_result.xs_array[1].copy()
 
             try:
                 self.t_mpc_start = time.time()
@@ -211,14 +269,13 @@ class Controller:
         if not self.error:
             self.mpc_result: MPCResult = self.mpc.get_latest_result()
             self.gait[:, :] = self.mpc_result.gait
-            xs = self.mpc_result.xs
+            xs = self.mpc_result.xs_array
             if self.mpc_result.new_result:
                 self.mpc_solved = True
                 self.k_new = self.k
                 self.t_mpc = t_mpc - self.t_mpc_start
-
-            if not self.initialized and self.params.save_guess:
-                self.save_guess()
+                if self.delay_compensation:
+                    self.reindex_result()
 
             # Compute feedforward torque
             self.result.tau_ff[:] = self.compute_torque()
@@ -249,7 +306,7 @@ class Controller:
                     x_arr_nobase = get_x_arr_no_base(xs)
                     q_arr_nobase = x_arr_nobase[:12]
                     self.interpolator_ = ndcurves.exact_cubic(q_arr_nobase, t_wp)
-            t = (self.k - self.k_solve + 1) * self.params.dt_wbc
+            t = max(self.k - self.k_solve + 1, 0) * self.params.dt_wbc
             q = self.interpolator_(t)
             v = self.interpolator_.derivate(t, 1)
         else:
@@ -355,16 +412,6 @@ class Controller:
         self.result.v_des[:] = 0.0
         self.result.tau_ff[:] = 0.0
 
-    def save_guess(self, filename="/tmp/init_guess.npy"):
-        """
-        Save the result of the MPC in a file called /tmp/init_guess.npy
-        """
-        np.save(
-            open(filename, "wb"),
-            {"xs": self.mpc_result.xs, "us": self.mpc_result.us},
-        )
-        print("Initial guess saved")
-
     def run_estimator(
         self, device, q_perfect=np.zeros(6), b_baseVel_perfect=np.zeros(3)
     ):
@@ -433,10 +480,49 @@ class Controller:
         """
         Compute the feedforward torque using ricatti gains
         """
-        x_diff = self.state.diff(self.x_estim, self.mpc_result.xs[0])
-        tau = self.mpc_result.us[0] + np.dot(self.mpc_result.K[0], x_diff)
+        i = self.result_node() if self.delay_compensation else 0
+        x_diff = self.state.diff(self.x_estim, self.mpc_result.xs_array[i])
+        tau = self.mpc_result.us_array[i] + np.dot(self.mpc_result.K_array[i], x_diff)
         return tau
 
+    def result_node(self):
+        """
+        Index of the node of the last MPC result that corresponds to the current
+        iteration
+        """
+        elapsed = max(self.k - self.k_solve, 0) // self.params.mpc_wbc_ratio
+        return min(elapsed, self.mpc_result.feedback_window - 1)
+
+    def predict_state(self, x):
+        """
+        Predict the state of the robot at the time the result of the current request
+        is expected, by following the velocity of the last MPC trajectory during the
+        expected solver latency
+
+        Args:
+            x (array): current estimated state
+        """
+        delay = self.latency_histogram.quantile(self.DELAY_QUANTILE)
+        self.predicted_delays[self.k] = delay
+        if delay == 0:
+            return x
+        xs = self.mpc_result.xs_array
+        i = self.result_node()
+        dx = self.state.diff(xs[i], xs[i + 1]) / self.params.dt_mpc
+        return self.state.integrate(x, dx * delay * self.params.dt_wbc)
+
+    def reindex_result(self):
+        """
+        Record the latency of the new MPC result and shift its time origin to the
+        iteration its initial state was predicted for
+        """
+        k_request = self.mpc.last_result_k
+        self.latency_histogram.add(self.k - k_request)
+        self.k_solve = k_request + self.predicted_delays.pop(k_request, 0)
+        # Older requests were dropped or superseded and will never be answered
+        for k in [k for k in self.predicted_delays if k < k_request]:
+            del self.predicted_delays[k]
+
     def integrate_x(self):
         """
         Integrate the position and velocity using the acceleration computed from the
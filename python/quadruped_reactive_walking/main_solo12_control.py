@@ -16,6 +16,13 @@ from quadruped_reactive_walking.wb_mpc import (
     get_ocp_from_str,
     get_ocp_list_str,
 )
+from quadruped_reactive_walking.tools.realtime import (
+    set_cpu_affinity,
+    set_realtime_priority,
+    pin_new_threads,
+    get_thread_ids,
+    placement_report,
+)
 
 import tqdm
 import argparse
@@ -169,6 +176,26 @@ def get_device(is_simulation: bool, record_video=False) -> tuple:
     return (device, qc)
 
 
+def place_control_loop(params, known_tids):
+    """
+    Put the control loop (the calling thread) on its cores and scheduling policy.
+    Called once the device is initialized, so that the threads of the device do not
+    inherit them. When the MPC runs in this process, its thread pool (the threads
+    spawned since known_tids were listed, by the first solve in the Controller
+    constructor) is moved to the solver cores.
+    """
+    ocp_params = params.ocp
+    if (
+        not params.asynchronous_mpc
+        and not params.mpc_in_rosnode
+        and not params.mpc_remote_address
+    ):
+        pin_new_threads(ocp_params.cpu_affinity_solver_threads, known_tids)
+    set_cpu_affinity(ocp_params.cpu_affinity_controller)
+    set_realtime_priority(ocp_params.rt_priority_controller)
+    print(placement_report("controller"))
+
+
 def main(args):
     """
     Main function that calibrates the robot, get it into a default waiting position then launch
@@ -184,6 +211,7 @@ def main(args):
     q_init = params.q_init
     solver_cls = get_ocp_from_str(args.solver)
 
+    known_tids = set(get_thread_ids())
     controller = Controller(params, q_init, solver_cls)
     device, qc = get_device(params.SIMULATION, sim_params["record_video"])
 
@@ -207,6 +235,7 @@ def main(args):
         device.joints.set_zero_commands()
         device.parse_sensor_data()
         put_on_the_floor(device, q_init)
+    place_control_loop(params, known_tids)
 
     # CONTROL LOOP ***************************************************
     t = 0.0
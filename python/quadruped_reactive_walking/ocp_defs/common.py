@@ -1,3 +1,5 @@
+from collections import deque
+
 from quadruped_reactive_walking import Params
 
 
@@ -6,3 +8,62 @@ class OCPBuilder:
         self.params = params
         self.task = None
         self.problem = None
+        self._components = {}
+
+    def _shared(self, key, build):
+        """
+        Return the component stored under `key`, building it on first use.
+        Shared components must not be modified once created.
+        """
+        component = self._components.get(key)
+        if component is None:
+            component = self._components[key] = build()
+        return component
+
+
+class StageRing:
+    """
+    Mirror of the running stages of a receding-horizon problem, as (model, data) pairs.
+
+    When a stage is pushed, the data of the stage leaving the horizon is reused if it
+    was created by the same model, and otherwise kept aside until that model comes back.
+    Once every model has been seen, cycling does not allocate any data.
+    """
+
+    def __init__(self, models, datas):
+        self._stages = deque(zip(models, datas))
+        # id(model) -> (model, list of unused datas of this model)
+        self._free = {}
+        self.num_created = 0
+
+    def __len__(self):
+        return len(self._stages)
+
+    @property
+    def front_model(self):
+        return self._stages[0][0]
+
+    def release(self, model, data):
+        """Keep a data of `model` for later use."""
+        self._free.setdefault(id(model), (model, []))[1].append(data)
+
+    def cycle(self, model, create_data):
+        """
+        Drop the first stage and append a stage with `model`.
+        Return the data to use for the new stage, calling create_data(model) only if
+        no data of this model is available.
+        """
+        old_model, old_data = self._stages.popleft()
+        if old_model is model:
+            data = old_data
+        else:
+            if old_data is not None:
+                self.release(old_model, old_data)
+            _, free = self._free.get(id(model), (None, None))
+            if free:
+                data = free.pop()
+            else:
+                data = create_data(model)
+                self.num_created += 1
+        self._stages.append((model, data))
+        return data
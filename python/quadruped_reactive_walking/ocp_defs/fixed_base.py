@@ -0,0 +1,163 @@
+import numpy as np
+import pinocchio as pin
+import crocoddyl
+
+from quadruped_reactive_walking import Params
+from ..wb_mpc import task_spec
+from .common import OCPBuilder, StageRing
+from crocoddyl import (
+    ActivationBounds,
+    ActivationModelWeightedQuad,
+    StateMultibody,
+    CostModelResidual,
+    CostModelSum,
+    DifferentialActionModelFreeFwdDynamics,
+    IntegratedActionModelEuler,
+    ResidualModelState,
+    ResidualModelControl,
+)
+
+# Layout of the free-flyer state: [base pose (7), joints (12), base velocity (6),
+# joints (12)]
+_NQ_BASE = 7
+_NV_BASE = 6
+_NJ = 12
+
+
+def reduce_state(x):
+    """Joint positions and velocities (24) of a free-flyer state (37)."""
+    return np.concatenate(
+        [x[_NQ_BASE : _NQ_BASE + _NJ], x[_NQ_BASE + _NJ + _NV_BASE :]]
+    )
+
+
+def lift_state(x_reduced, base_pose):
+    """Free-flyer state with the given base pose (7), at rest, and joint state (24)."""
+    return np.concatenate(
+        [base_pose, x_reduced[:_NJ], np.zeros(_NV_BASE), x_reduced[_NJ:]]
+    )
+
+
+def lift_gains(K_reduced):
+    """Feedback gains (nu, 36) on the free-flyer state, zero on the base."""
+    K = np.zeros((K_reduced.shape[0], 2 * (_NV_BASE + _NJ)))
+    K[:, _NV_BASE : _NV_BASE + _NJ] = K_reduced[:, :_NJ]
+    K[:, 2 * _NV_BASE + _NJ :] = K_reduced[:, _NJ:]
+    return K
+
+
+class FixedBaseOCPBuilder(OCPBuilder):
+    """
+    Builder class to define the fixed-base OCP, on the reduced model of TaskSpecFull
+    (the base is frozen in its reference placement): free dynamics of the legs with
+    foot tracking, state and control regularization.
+
+    All the stages have the same costs; only the references of the foot tracking are
+    updated per stage. The feet without target (zero footstep) are kept in their
+    initial position.
+    """
+
+    def __init__(self, params: Params, footsteps):
+        super().__init__(params)
+        self.task = task_spec.TaskSpecFull(params)
+        self.state = StateMultibody(self.rmodel)
+        self.actuation = crocoddyl.ActuationModelFull(self.state)
+        self.rdata = self.rmodel.createData()
+        pin.framesForwardKinematics(self.rmodel, self.rdata, self.task.q0_reduced)
+        self.start_feet_pos = {
+            i: self.rdata.oMf[i].translation.copy() for i in self.task.feet_ids
+        }
+        # id(model) -> foot tracking residuals of the stage
+        self._foot_tracking = {}
+
+        self.x0 = self.task.x0_reduced
+        running_models = [
+            self.make_running_model(
+                footsteps[t] if t < len(footsteps) else np.zeros((3, 4))
+            )
+            for t in range(params.N_gait)
+        ]
+        self.problem = crocoddyl.ShootingProblem(
+            self.x0, running_models, self.make_terminal_model()
+        )
+        self.stages = StageRing(self.problem.runningModels, self.problem.runningDatas)
+
+    @property
+    def rmodel(self):
+        return self.task.model
+
+    def _create_standard_model(self):
+        nu = self.actuation.nu
+        costs = CostModelSum(self.state, nu)
+
+        def make_state_reg():
+            residual = ResidualModelState(self.state, self.task.xref, nu)
+            activation = ActivationModelWeightedQuad(self.task.state_reg_w**2)
+            return CostModelResidual(self.state, activation, residual)
+
+        costs.addCost("state_reg", self._shared("state_reg", make_state_reg), 1)
+        diff = DifferentialActionModelFreeFwdDynamics(self.state, self.actuation, costs)
+        return IntegratedActionModelEuler(diff, self.params.dt_mpc)
+
+    def make_running_model(self, footsteps):
+        """
+        Running model tracking the foot targets of footsteps (3, 4).
+        """
+        model = self._create_standard_model()
+        costs = model.differential.costs
+        nu = costs.nu
+        residuals = []
+        if self.task.foot_tracking_w > 0:
+            for i in self.task.feet_ids:
+                residual = crocoddyl.ResidualModelFrameTranslation(
+                    self.state, i, self.start_feet_pos[i], nu
+                )
+                costs.addCost(
+                    self.rmodel.frames[i].name + "_foot_tracking",
+                    CostModelResidual(self.state, residual),
+                    self.task.foot_tracking_w,
+                )
+                residuals.append(residual)
+        self._foot_tracking[id(model)] = residuals
+
+        control_reg = self._shared(
+            "control_reg",
+            lambda: CostModelResidual(
+                self.state, ResidualModelControl(self.state, self.task.uref)
+            ),
+        )
+        costs.addCost("control_reg", control_reg, self.task.control_reg_w)
+
+        def make_control_bound():
+            activation = crocoddyl.ActivationModelQuadraticBarrier(
+                ActivationBounds(-self.task.effort_limit, self.task.effort_limit)
+            )
+            return CostModelResidual(
+                self.state, activation, ResidualModelControl(self.state, nu)
+            )
+
+        control_bound = self._shared("control_bound", make_control_bound)
+        costs.addCost("control_bound", control_bound, self.task.control_bound_w)
+
+        self.update_model(model, footsteps)
+        return model
+
+    def make_terminal_model(self):
+        """
+        Add the final velocity cost to the terminal model
+        """
+        model = self._create_standard_model()
+        nu = model.differential.actuation.nu
+        residual = ResidualModelState(self.state, self.task.xref, nu)
+        activation = ActivationModelWeightedQuad(self.task.terminal_velocity_w**2)
+        model.differential.costs.addCost(
+            "terminal_velocity", CostModelResidual(self.state, activation, residual), 1
+        )
+        return model
+
+    def update_model(self, model, footsteps):
+        """Set the foot tracking references of a running model from footsteps (3, 4)."""
+        residuals = self._foot_tracking[id(model)]
+        for j, (i, residual) in enumerate(zip(self.task.feet_ids, residuals)):
+            target = footsteps[:, j]
+            residual.reference = target if np.any(target) else self.start_feet_pos[i]
@@ -0,0 +1,94 @@
+"""
+Precomputed timeline of the gait of the walking OCP.
+"""
+import numpy as np
+
+# Phases of the walk
+START = 0
+LIFE = 1
+END = 2
+
+
+def switch_rows(gait):
+    """
+    Mask of the rows of a gait in which the contact status of at least one foot differs
+    from the previous row (the first row is compared with the last one).
+    """
+    return np.any(gait != np.roll(gait, 1, axis=0), axis=1)
+
+
+class GaitSchedule:
+    """
+    Gait of every node pushed in the walking OCP, for the whole walk, stored as arrays.
+
+    Node t (pushed at MPC iteration k, with t = k / mpc_wbc_ratio - 1) uses:
+        - during the start (t < S): row t of the life gait, with life model t,
+        - while walking (t < S + L * R): row (t - S) % L of the life gait, with the
+            model leaving the horizon (model index -1),
+        - at the end: the first row of the ending gait with the first ending model,
+            then the second ones for all the following nodes.
+    where S is the number of starting nodes, L the length of the life gait and R the
+    number of gait repetitions. While walking, life_index gives the row (t - S) % L of
+    the life gait used by node t (-1 for the other nodes).
+    """
+
+    def __init__(self, life_gait, starting_gait, ending_gait, repetitions):
+        S, L = len(starting_gait), len(life_gait)
+        if S > L:
+            raise ValueError(
+                "The number of starting nodes ({}) exceeds the length of the gait ({})".format(
+                    S, L
+                )
+            )
+
+        # Gait over the horizon before the first node is pushed
+        initial = np.append(starting_gait, ending_gait[:1], axis=0).astype(np.int32)
+        self.horizon = len(initial)
+
+        # The tables end once the horizon only contains the last ending node
+        n_walk = S + L * repetitions
+        t = np.arange(n_walk + 1 + self.horizon)
+
+        self.phase = np.full(len(t), LIFE, dtype=np.int32)
+        self.phase[:S] = START
+        self.phase[n_walk:] = END
+
+        self.model_index = np.full(len(t), -1, dtype=np.int32)
+        self.model_index[:S] = t[:S]
+        self.model_index[n_walk] = 0
+        self.model_index[n_walk + 1 :] = 1
+
+        self.life_index = np.full(len(t), -1, dtype=np.int32)
+        self.life_index[S:n_walk] = (t[S:n_walk] - S) % L
+
+        self.rows = np.empty((len(t), 4), dtype=np.int32)
+        self.rows[:S] = life_gait[:S]
+        self.rows[S:n_walk] = life_gait[self.life_index[S:n_walk]]
+        self.rows[n_walk] = ending_gait[0]
+        self.rows[n_walk + 1 :] = ending_gait[min(1, len(ending_gait) - 1)]
+        self.support = self.rows == 1
+
+        self._timeline = np.append(initial, self.rows, axis=0)
+        self._timeline.flags.writeable = False
+
+        previous = self._timeline[self.horizon - 1 : -1]
+        self.switch = np.any(self.rows != previous, axis=1)
+
+    @property
+    def timeline(self):
+        """Read-only gait of the initial horizon followed by the gait of each node."""
+        return self._timeline
+
+    def __len__(self):
+        return len(self.rows)
+
+    def clamp(self, t):
+        """Index of node t in the tables (the last node is repeated forever)."""
+        return min(t, len(self.rows) - 1)
+
+    def current_gait(self, t):
+        """
+        Read-only view of the gait over the horizon once node t has been pushed
+        (t = -1 for the initial horizon).
+        """
+        return self._timeline[t + 1 : t + 1 + self.horizon]
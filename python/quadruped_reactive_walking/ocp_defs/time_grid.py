@@ -0,0 +1,74 @@
+"""
+Non-uniform time grids of the OCP, given as the time step of each running node.
+"""
+import numpy as np
+
+
+def uniform_time_grid(dt, num_nodes):
+    return np.full(num_nodes, dt)
+
+
+def geometric_time_grid(dt, duration, num_nodes):
+    """
+    Time grid of num_nodes steps covering duration, the first step being dt and each
+    following one r times longer than the previous (r >= 1).
+    """
+    if num_nodes * dt > duration * (1 + 1e-9):
+        raise ValueError(
+            "{} steps of {} s are longer than the duration ({} s)".format(
+                num_nodes, dt, duration
+            )
+        )
+    # dt * (1 + r + ... + r^(n-1)) = duration
+    roots = np.roots([dt] * (num_nodes - 1) + [dt - duration])
+    roots = roots[np.isreal(roots)].real
+    r = max(1.0, roots[roots > 0].max()) if num_nodes > 1 else 1.0
+    return dt * r ** np.arange(num_nodes)
+
+
+def node_times(time_grid):
+    """Start time of each node of the grid."""
+    return np.concatenate([[0.0], np.cumsum(time_grid)[:-1]])
+
+
+def node_rows(time_grid, dt):
+    """Index of the step of dt the start of each node of the grid falls on."""
+    return np.round(node_times(time_grid) / dt).astype(int)
+
+
+def resample_gait(gait, time_grid, dt):
+    """
+    Rows of a gait defined every dt, taken at the start time of each node of the grid
+    (the last row is repeated past the end of the gait).
+    """
+    return gait[np.minimum(node_rows(time_grid, dt), len(gait) - 1)]
+
+
+def shift_points(time_grid, dt):
+    """
+    Where the start of each node of the grid, and the end of the horizon, fall once
+    moved forward by dt: index of the node of the grid and elapsed fraction of its
+    step (1 past the end of the horizon).
+    """
+    bounds = np.append(node_times(time_grid), np.sum(time_grid))
+    times = bounds + dt
+    # the tolerance puts the times on a bound in the node starting there
+    index = np.searchsorted(bounds, times + 1e-9 * dt, side="right") - 1
+    index = np.minimum(index, len(time_grid) - 1)
+    alpha = np.clip((times - bounds[index]) / time_grid[index], 0.0, 1.0)
+    return index, alpha
+
+
+def shift_trajectory(state, xs, us, points):
+    """
+    Trajectory (xs, us) on a grid moved forward by dt, given the shift_points of the
+    grid: the states are interpolated in the steps of the grid, the controls are
+    those of the steps the nodes start in.
+    """
+    index, alpha = points
+    xs = [
+        state.integrate(xs[i], a * state.diff(xs[i], xs[i + 1]))
+        for i, a in zip(index, alpha)
+    ]
+    us = [np.array(us[i]) for i in index[:-1]]
+    return xs, us
@@ -1,3 +1,4 @@
+import collections
 import numpy as np
 import pinocchio as pin
 import crocoddyl
@@ -5,8 +6,9 @@ import crocoddyl
 from typing import List, Optional
 from quadruped_reactive_walking import Params, ResidualModelFlyHigh
 from ..wb_mpc import task_spec
-from ..tools.utils import no_copy_roll, no_copy_roll_insert
-from .common import OCPBuilder
+from .common import OCPBuilder, StageRing
+from .gait_schedule import GaitSchedule, START, LIFE, END, switch_rows
+from .time_grid import node_rows, resample_gait
 from crocoddyl import (
     ActivationBounds,
     ActivationModelWeightedQuad,
@@ -21,81 +23,196 @@ from crocoddyl import (
 
 
 class WalkingOCPBuilder(OCPBuilder):
-    """Builder class to define the walking OCP."""
-
-    def __init__(self, params: Params, footsteps, base_vel_refs):
+    """
+    Builder class to define the walking OCP.
+
+    The components of the stages that are never modified after their creation
+    (actuation, contacts, most costs) are built once and shared between the stages.
+    Only the costs whose reference is updated for each stage (foot and base velocity
+    tracking) are created per stage.
+
+    The problem can use a non-uniform time grid (time step of each node, dt_mpc by
+    default) covering the same horizon (starting_nodes * dt_mpc), e.g. with fewer
+    nodes. Each node then keeps its model, of fixed time step, and update_horizon
+    updates all of them as the horizon moves forward: the gait is sampled at the
+    start time of each node, as well as the references pushed every dt_mpc.
+    """
+
+    def __init__(
+        self,
+        params: Params,
+        footsteps,
+        base_vel_refs,
+        time_grid=None,
+        reserve_life_datas=True,
+    ):
         super().__init__(params)
         self.task = task_spec.TaskSpec(params)
         self.state = StateMultibody(self.rmodel)
         self.rdata = self.rmodel.createData()
-
+        pin.forwardKinematics(self.rmodel, self.rdata, self.task.q0)
+        pin.updateFramePlacements(self.rmodel, self.rdata)
+        # Feet positions in the initial configuration (rdata is updated by the OCP)
+        self.start_feet_pos = {
+            i: self.rdata.oMf[i].translation.copy() for i in self.task.feet_ids
+        }
+        self.foot_names = {i: self.rmodel.frames[i].name for i in self.task.feet_ids}
+        # id(model) -> (model, StageHandles)
+        self._handles = {}
+
+        self.feet_ids = np.asarray(self.task.feet_ids)
         self.life_gait = params.gait
         self.starting_gait = np.ones((params.starting_nodes, 4), dtype=np.int32)
         self.ending_gait = np.ones((params.ending_nodes, 4), dtype=np.int32)
-        self.current_gait = np.append(
+        self.schedule = GaitSchedule(
+            self.life_gait,
             self.starting_gait,
-            self.ending_gait[0].reshape(1, -1),
-            axis=0,
-        )
-
-        self.life_rm, self.life_tm = self.initialize_models_from_gait(
-            self.life_gait, footsteps, base_vel_refs
+            self.ending_gait,
+            params.gait_repetitions,
         )
-        self.start_rm, self.start_tm = self.initialize_models_from_gait(
-            self.starting_gait
-        )
-        self.end_rm, self.end_tm = self.initialize_models_from_gait(self.ending_gait)
+        self.current_gait = self.schedule.current_gait(-1)
+        # Index in the schedule of the last selected node
+        self.node = -1
+
+        self.time_grid = time_grid
+        if time_grid is None:
+            self.life_rm, self.life_tm = self.initialize_models_from_gait(
+                self.life_gait, footsteps, base_vel_refs
+            )
+            self.start_rm, self.start_tm = self.initialize_models_from_gait(
+                self.starting_gait
+            )
+            self.end_rm, self.end_tm = self.initialize_models_from_gait(
+                self.ending_gait
+            )
+        else:
+            # The models of the nodes are never cycled
+            S, dt = params.starting_nodes, params.dt_mpc
+            if not np.isclose(np.sum(time_grid), S * dt):
+                raise ValueError(
+                    "The time grid lasts {} s instead of the horizon ({} s)".format(
+                        np.sum(time_grid), S * dt
+                    )
+                )
+            self.life_rm, self.life_tm = [], None
+            self.end_rm, self.end_tm = [], None
+            self.start_rm, self.start_tm = self.initialize_models_from_gait(
+                resample_gait(self.starting_gait, time_grid, dt),
+                time_grid=time_grid,
+            )
+            # Step of dt_mpc each node starts at, gait of these steps (the starting
+            # gait, then the gait of each pushed node) and references (footsteps,
+            # base velocity) of the last S steps
+            self._grid_rows = node_rows(time_grid, dt)
+            self._grid_gait = np.append(
+                self.starting_gait, self.schedule.rows, axis=0
+            ).astype(bool)
+            rest = np.array([self.start_feet_pos[i] for i in self.task.feet_ids]).T
+            self._references = collections.deque(
+                [(rest, pin.Motion.Zero())] * S, maxlen=S
+            )
 
         self.x0 = self.task.x0
         self.problem = crocoddyl.ShootingProblem(self.x0, self.start_rm, self.start_tm)
-
-    def select_next_model(self, k, current_gait, base_vel_ref):
-        feet_ids = np.asarray(self.task.feet_ids)
-
-        t = int(k / self.params.mpc_wbc_ratio) - 1
-
-        if t < len(self.start_rm):
-            mask = self.life_gait[t] == 1
-            support_feet = feet_ids[mask]
-            model = self.life_rm[t]
-            no_copy_roll_insert(current_gait, self.life_gait[t])
-
-        elif t < len(self.start_rm) + len(self.life_rm) * self.params.gait_repetitions:
-            no_copy_roll(self.life_gait)
-            mask = self.life_gait[-1] == 1
-            support_feet = feet_ids[mask]
-            model = self.problem.runningModels[0]
-            no_copy_roll_insert(current_gait, self.life_gait[-1])
-
+        self.stages = StageRing(self.problem.runningModels, self.problem.runningDatas)
+        # The life models enter the horizon first: create their data beforehand (not
+        # needed when the stages are cycled by another owner, e.g. the C++ OCP)
+        if reserve_life_datas:
+            for model in self.life_rm:
+                self.stages.release(model, model.createData())
+
+    def select_next_model(self, k, base_vel_ref):
+        """
+        Pick the model of the node pushed at iteration k, and the corresponding support
+        feet, from the gait schedule. Also moves current_gait forward. Only for the
+        uniform time grid (see update_horizon).
+        """
+        schedule = self.schedule
+        t = self.node = schedule.clamp(int(k / self.params.mpc_wbc_ratio) - 1)
+        support_feet = self.feet_ids[schedule.support[t]]
+        phase = schedule.phase[t]
+
+        if phase == START:
+            model = self.life_rm[schedule.model_index[t]]
+        elif phase == LIFE:
+            model = self.stages.front_model
         else:
-            i = (
-                0
-                if t
-                == len(self.start_rm) + len(self.life_rm) * self.params.gait_repetitions
-                else 1
-            )
-            # choose to pich the node with impact or not
-            support_feet = feet_ids[self.ending_gait[i] == 1]
-            model = self.end_rm[i]
-            no_copy_roll_insert(current_gait, self.ending_gait[i])
+            # with or without impact
+            model = self.end_rm[schedule.model_index[t]]
             base_vel_ref = None
+        self.current_gait = schedule.current_gait(t)
 
         if base_vel_ref is not None:
             base_vel_ref = pin.Motion(base_vel_ref)
         return model, support_feet, base_vel_ref
 
+    def update_horizon(self, k, footsteps, base_vel_ref):
+        """
+        Move the horizon of a non-uniform time grid forward to iteration k, the
+        references footsteps (3, 4) and base_vel_ref (None for the last one) being
+        those of the node pushed at k on the uniform grid. Each node takes the support
+        feet and the references of the step of dt_mpc it starts at, and has its impact
+        costs when the support changed since the previous node.
+        """
+        schedule = self.schedule
+        t = self.node = schedule.clamp(int(k / self.params.mpc_wbc_ratio) - 1)
+        self.current_gait = schedule.current_gait(t)
+        if schedule.phase[t] == END:
+            base_vel_ref = pin.Motion.Zero()
+        elif base_vel_ref is None:
+            base_vel_ref = self._references[-1][1]
+        self._references.append((footsteps, pin.Motion(base_vel_ref)))
+
+        support = self._grid_gait[t + 1 + self._grid_rows]
+        previous = np.append(
+            self._grid_gait[t + self._grid_rows[:1]], support[:-1], axis=0
+        )
+        impact = support & np.any(support != previous, axis=1, keepdims=True)
+        for j, model in enumerate(self.start_rm):
+            feet, ref = self._references[self._grid_rows[j]]
+            support_feet = self.feet_ids[support[j]]
+            self.update_model(
+                model,
+                get_active_feet(feet, support_feet),
+                ref,
+                support_feet,
+                impact_feet=self.feet_ids[impact[j]],
+            )
+
+    def make_problem(self, gait, time_grid, base_vel_ref):
+        """
+        Standalone shooting problem from x0, following a gait given every dt_mpc on the
+        nodes of time_grid, with a constant base velocity reference. Its stages are not
+        those of the receding-horizon problem.
+        """
+        gait = resample_gait(gait, time_grid, self.params.dt_mpc)
+        num_nodes = len(time_grid)
+        running_models, terminal_model = self.initialize_models_from_gait(
+            gait,
+            [np.zeros((3, 4))] * num_nodes,
+            [base_vel_ref] * num_nodes,
+            time_grid,
+        )
+        return crocoddyl.ShootingProblem(self.x0, running_models, terminal_model)
+
     @property
     def rmodel(self):
         return self.task.model
 
-    def initialize_models_from_gait(self, gait, footsteps=None, base_vel_refs=None):
-        """Create action models (problem stages) from a gait matrix and other optional data."""
+    def initialize_models_from_gait(
+        self, gait, footsteps=None, base_vel_refs=None, time_grid=None
+    ):
+        """
+        Create action models (problem stages) from a gait matrix and other optional data.
+        The time step of row t is time_grid[t] (dt_mpc if time_grid is None).
+        """
         # both or neither must be none
         assert (footsteps is None) == (base_vel_refs is None)
         if footsteps is not None:
             assert len(footsteps) == len(base_vel_refs)
         running_models = []
-        feet_ids = np.asarray(self.task.feet_ids)
+        feet_ids = self.feet_ids
+        switched = switch_rows(gait)
         for t in range(gait.shape[0]):
             support_feet_ids = feet_ids[gait[t] == 1]
             feet_pos = (
@@ -104,12 +221,11 @@ class WalkingOCPBuilder(OCPBuilder):
                 else []
             )
             base_vel_ref = base_vel_refs[t] if base_vel_refs is not None else None
-            has_switched = np.any(gait[t] != gait[t - 1])
-            switch_matrix = gait[t] if has_switched else np.array([])
-            switch_feet = feet_ids[switch_matrix == 1]
+            switch_feet = feet_ids[(gait[t] == 1) & switched[t]]
+            dt = time_grid[t] if time_grid is not None else None
             running_models.append(
                 self.make_running_model(
-                    support_feet_ids, switch_feet, feet_pos, base_vel_ref
+                    support_feet_ids, switch_feet, feet_pos, base_vel_ref, dt
                 )
             )
 
@@ -119,56 +235,64 @@ class WalkingOCPBuilder(OCPBuilder):
         return running_models, terminal_model
 
     def _create_standard_model(
-        self, support_feet
+        self, support_feet, dt=None
     ) -> crocoddyl.IntegratedActionModelAbstract:
         """
         Create a standard integrated action model, to be modified by the callee.
 
         :param state: swinging foot task
         :param support_feet: list of support feet ids
+        :param dt: time step (dt_mpc if None)
         :return action model for a swing foot phase
         """
-        pin.forwardKinematics(self.rmodel, self.rdata, self.task.q0)
-        pin.updateFramePlacements(self.rmodel, self.rdata)
-        actuation = crocoddyl.ActuationModelFloatingBase(self.state)
+        actuation = self._shared(
+            "actuation", lambda: crocoddyl.ActuationModelFloatingBase(self.state)
+        )
         nu = actuation.nu
 
-        zero_vec = np.zeros(3)
-
         contacts = crocoddyl.ContactModelMultiple(self.state, nu)
         for i in self.task.feet_ids:
             name = self.rmodel.frames[i].name + "_contact"
-            contact = crocoddyl.ContactModel3D(
-                self.state,
-                i,
-                zero_vec,
-                pin.LOCAL_WORLD_ALIGNED,
-                nu,
-                self.task.baumgarte_gains,
+            contact = self._shared(
+                ("contact", i),
+                lambda: crocoddyl.ContactModel3D(
+                    self.state,
+                    i,
+                    np.zeros(3),
+                    pin.LOCAL_WORLD_ALIGNED,
+                    nu,
+                    self.task.baumgarte_gains,
+                ),
             )
             contacts.addContact(name, contact)
             contacts.changeContactStatus(name, i in support_feet)
 
         costs = CostModelSum(self.state, nu)
-        residual = ResidualModelState(self.state, self.task.xref, nu)
-        activation = ActivationModelWeightedQuad(self.task.state_reg_w**2)
-        state_cost = CostModelResidual(self.state, activation, residual)
+        state_cost = self._shared("state_reg", lambda: self._make_state_reg(nu))
         costs.addCost("state_reg", state_cost, 1)
 
-        state_bound_residual = ResidualModelState(self.state, self.task.xref, nu)
-        activation = crocoddyl.ActivationModelWeightedQuadraticBarrier(
-            ActivationBounds(-self.task.state_limit, self.task.state_limit),
-            self.task.state_bound_w**2,
-        )
-        state_bound_cost = CostModelResidual(
-            self.state, activation, state_bound_residual
+        state_bound_cost = self._shared(
+            "state_limitBound", lambda: self._make_state_bound(nu)
         )
         costs.addCost("state_limitBound", state_bound_cost, 1)
 
         diff = DifferentialActionModelContactFwdDynamics(
             self.state, actuation, contacts, costs, 0.0, True
         )
-        return IntegratedActionModelEuler(diff, self.params.dt_mpc)
+        return IntegratedActionModelEuler(diff, dt or self.params.dt_mpc)
+
+    def _make_state_reg(self, nu):
+        residual = ResidualModelState(self.state, self.task.xref, nu)
+        activation = ActivationModelWeightedQuad(self.task.state_reg_w**2)
+        return CostModelResidual(self.state, activation, residual)
+
+    def _make_state_bound(self, nu):
+        residual = ResidualModelState(self.state, self.task.xref, nu)
+        activation = crocoddyl.ActivationModelWeightedQuadraticBarrier(
+            ActivationBounds(-self.task.state_limit, self.task.state_limit),
+            self.task.state_bound_w**2,
+        )
+        return CostModelResidual(self.state, activation, residual)
 
     def make_running_model(
         self,
@@ -176,14 +300,15 @@ class WalkingOCPBuilder(OCPBuilder):
         switch_feet,
         feet_pos: List[np.ndarray],
         base_vel_ref: Optional[pin.Motion],
+        dt=None,
     ):
         """
-        Add all the costs to the running models
+        Add all the costs to the running models (of time step dt, dt_mpc if None)
         """
-        model = self._create_standard_model(support_feet)
+        model = self._create_standard_model(support_feet, dt)
         costs = model.differential.costs
         for i in self.task.feet_ids:
-            start_pos = self.rdata.oMf[i].translation
+            start_pos = self.start_feet_pos[i]
 
             self._add_friction_cost(i, support_feet, costs)
             self._add_force_reg(i, model)
@@ -195,9 +320,13 @@ class WalkingOCPBuilder(OCPBuilder):
                 self._add_fly_high_cost(i, costs)
             self._add_vert_velocity_cost(i, costs)
 
-            # Fake impact
-            if i in switch_feet and i in support_feet:
-                self._add_impact_costs(i, costs, start_pos)
+            # Fake impact (on all the feet on a non-uniform grid, where update_model
+            # changes their status)
+            impact = i in switch_feet and i in support_feet
+            if impact or self.time_grid is not None:
+                self._add_impact_costs(
+                    i, costs, start_pos, dt or self.params.dt_mpc, impact
+                )
 
         if self.has_base_vel_cost:
             if base_vel_ref is not None:
@@ -213,17 +342,23 @@ class WalkingOCPBuilder(OCPBuilder):
 
     def _add_control_costs(self, costs: CostModelSum):
         nu = costs.nu
-        control_reg = CostModelResidual(
-            self.state, ResidualModelControl(self.state, self.task.uref)
+        control_reg = self._shared(
+            "control_reg",
+            lambda: CostModelResidual(
+                self.state, ResidualModelControl(self.state, self.task.uref)
+            ),
         )
         costs.addCost("control_reg", control_reg, self.task.control_reg_w)
 
-        control_bound_activation = crocoddyl.ActivationModelQuadraticBarrier(
-            ActivationBounds(-self.task.effort_limit, self.task.effort_limit)
-        )
-        control_bound = CostModelResidual(
-            self.state, control_bound_activation, ResidualModelControl(self.state, nu)
-        )
+        def make_control_bound():
+            activation = crocoddyl.ActivationModelQuadraticBarrier(
+                ActivationBounds(-self.task.effort_limit, self.task.effort_limit)
+            )
+            return CostModelResidual(
+                self.state, activation, ResidualModelControl(self.state, nu)
+            )
+
+        control_bound = self._shared("control_bound", make_control_bound)
         costs.addCost("control_bound", control_bound, self.task.control_bound_w)
 
     def make_terminal_model(self, support_feet):
@@ -232,23 +367,33 @@ class WalkingOCPBuilder(OCPBuilder):
         """
         model = self._create_standard_model(support_feet)
         nu = model.differential.actuation.nu
-        residual = ResidualModelState(self.state, self.task.xref, nu)
-        activation = ActivationModelWeightedQuad(self.task.terminal_velocity_w**2)
-        state_cost = CostModelResidual(self.state, activation, residual)
+
+        def make_terminal_velocity():
+            residual = ResidualModelState(self.state, self.task.xref, nu)
+            activation = ActivationModelWeightedQuad(self.task.terminal_velocity_w**2)
+            return CostModelResidual(self.state, activation, residual)
+
+        state_cost = self._shared("terminal_velocity", make_terminal_velocity)
         model.differential.costs.addCost("terminal_velocity", state_cost, 1)
         return model
 
     def _add_friction_cost(self, i: int, support_feet, costs: CostModelSum):
         nu = costs.nu
-        # Contact forces
-        cone = crocoddyl.FrictionCone(
-            self.task.Rsurf, self.task.friction_mu, 4, False, 3
-        )
-        residual = crocoddyl.ResidualModelContactFrictionCone(self.state, i, cone, nu)
-        activation = crocoddyl.ActivationModelQuadraticBarrier(
-            ActivationBounds(cone.lb, cone.ub)
-        )
-        friction_cost = CostModelResidual(self.state, activation, residual)
+
+        def make_friction_cost():
+            # Contact forces
+            cone = crocoddyl.FrictionCone(
+                self.task.Rsurf, self.task.friction_mu, 4, False, 3
+            )
+            residual = crocoddyl.ResidualModelContactFrictionCone(
+                self.state, i, cone, nu
+            )
+            activation = crocoddyl.ActivationModelQuadraticBarrier(
+                ActivationBounds(cone.lb, cone.ub)
+            )
+            return CostModelResidual(self.state, activation, residual)
+
+        friction_cost = self._shared(("friction", i), make_friction_cost)
         friction_name = self.rmodel.frames[i].name + "_friction_cost"
         costs.addCost(friction_name, friction_cost, self.task.friction_cone_w)
         costs.changeCostStatus(friction_name, i in support_feet)
@@ -258,12 +403,16 @@ class WalkingOCPBuilder(OCPBuilder):
         nu = costs.nu
         name = "{}_forceReg".format(self.rmodel.frames[i].name)
         nc = len(m.differential.contacts.active_set)
-        ref_force = np.array([0, 0, self.task.robot_weight / nc])
-        ref_force = pin.Force(ref_force, ref_force * 0.0)
-        force_reg = CostModelResidual(
-            self.state,
-            crocoddyl.ResidualModelContactForce(self.state, i, ref_force, 3, nu),
-        )
+
+        def make_force_reg():
+            ref_force = np.array([0, 0, self.task.robot_weight / nc])
+            ref_force = pin.Force(ref_force, ref_force * 0.0)
+            return CostModelResidual(
+                self.state,
+                crocoddyl.ResidualModelContactForce(self.state, i, ref_force, 3, nu),
+            )
+
+        force_reg = self._shared(("forceReg", i, nc), make_force_reg)
         costs.addCost(name, force_reg, self.task.force_reg_w)
         costs.changeCostStatus(name, False)
 
@@ -285,18 +434,19 @@ class WalkingOCPBuilder(OCPBuilder):
     def _add_ground_coll_penalty(self, i: int, costs: CostModelSum, start_pos):
         nu = costs.nu
 
-        # Swing foot
-        ground_coll_res = crocoddyl.ResidualModelFrameTranslation(
-            self.state, i, start_pos, nu
-        )
+        def make_ground_coll_cost():
+            # Swing foot
+            ground_coll_res = crocoddyl.ResidualModelFrameTranslation(
+                self.state, i, start_pos, nu
+            )
 
-        bounds = ActivationBounds(
-            np.array([-1000, -1000, start_pos[2]]), np.array([1000, 1000, 1000])
-        )
-        ground_coll_activ = crocoddyl.ActivationModelQuadraticBarrier(bounds)
-        ground_coll_cost = CostModelResidual(
-            self.state, ground_coll_activ, ground_coll_res
-        )
+            bounds = ActivationBounds(
+                np.array([-1000, -1000, start_pos[2]]), np.array([1000, 1000, 1000])
+            )
+            ground_coll_activ = crocoddyl.ActivationModelQuadraticBarrier(bounds)
+            return CostModelResidual(self.state, ground_coll_activ, ground_coll_res)
+
+        ground_coll_cost = self._shared(("groundCol", i), make_ground_coll_cost)
 
         name = "{}_groundCol".format(self.rmodel.frames[i].name)
         costs.addCost(
@@ -312,9 +462,12 @@ class WalkingOCPBuilder(OCPBuilder):
 
     def _add_fly_high_cost(self, i: int, costs: CostModelSum):
         nu = costs.nu
-        fly_high_cost = CostModelResidual(
-            self.state,
-            ResidualModelFlyHigh(self.state, i, self.task.fly_high_slope / 2.0, nu),
+        fly_high_cost = self._shared(
+            ("flyHigh", i),
+            lambda: CostModelResidual(
+                self.state,
+                ResidualModelFlyHigh(self.state, i, self.task.fly_high_slope / 2.0, nu),
+            ),
         )
         name = "{}_flyHigh".format(self.rmodel.frames[i].name)
         costs.addCost(
@@ -330,22 +483,27 @@ class WalkingOCPBuilder(OCPBuilder):
 
     def _add_vert_velocity_cost(self, i: int, costs: CostModelSum):
         nu = costs.nu
-        vertical_velocity_reg_residual = crocoddyl.ResidualModelFrameVelocity(
-            self.state,
-            i,
-            pin.Motion.Zero(),
-            pin.ReferenceFrame.WORLD,
-            nu,
-        )
-        vertical_velocity_activation = ActivationModelWeightedQuad(
-            np.array([0, 0, 1, 0, 0, 0])
-        )
+
+        def make_vertical_velocity_reg_cost():
+            vertical_velocity_reg_residual = crocoddyl.ResidualModelFrameVelocity(
+                self.state,
+                i,
+                pin.Motion.Zero(),
+                pin.ReferenceFrame.WORLD,
+                nu,
+            )
+            vertical_velocity_activation = ActivationModelWeightedQuad(
+                np.array([0, 0, 1, 0, 0, 0])
+            )
+            return CostModelResidual(
+                self.state,
+                vertical_velocity_activation,
+                vertical_velocity_reg_residual,
+            )
 
         name = "{}_vel_zReg".format(self.rmodel.frames[i].name)
-        vertical_velocity_reg_cost = CostModelResidual(
-            self.state,
-            vertical_velocity_activation,
-            vertical_velocity_reg_residual,
+        vertical_velocity_reg_cost = self._shared(
+            ("vel_zReg", i), make_vertical_velocity_reg_cost
         )
         costs.addCost(
             name,
@@ -361,36 +519,47 @@ class WalkingOCPBuilder(OCPBuilder):
     def has_impact_vel_cost(self):
         return self.task.impact_velocity_w > 0
 
-    def _add_impact_costs(self, i: int, costs: CostModelSum, start_pos):
+    def _add_impact_costs(
+        self, i: int, costs: CostModelSum, start_pos, dt, active=True
+    ):
         nu = costs.nu
         if self.has_impact_alt_cost:
-            impact_activ = ActivationModelWeightedQuad(np.array([0, 0, 1]))
-            impact_alt_cost = CostModelResidual(
-                self.state,
-                impact_activ,
-                crocoddyl.ResidualModelFrameTranslation(self.state, i, start_pos, nu),
+            impact_alt_cost = self._shared(
+                ("altitudeimpact", i),
+                lambda: CostModelResidual(
+                    self.state,
+                    ActivationModelWeightedQuad(np.array([0, 0, 1])),
+                    crocoddyl.ResidualModelFrameTranslation(
+                        self.state, i, start_pos, nu
+                    ),
+                ),
             )
             costs.addCost(
                 "{}_altitudeimpact".format(self.rmodel.frames[i].name),
                 impact_alt_cost,
-                self.task.impact_altitude_w / self.params.dt_mpc,
+                self.task.impact_altitude_w / dt,
+                active,
             )
 
         if self.has_impact_vel_cost:
-            impact_vel_cost = CostModelResidual(
-                self.state,
-                crocoddyl.ResidualModelFrameVelocity(
+            impact_vel_cost = self._shared(
+                ("velimpact", i),
+                lambda: CostModelResidual(
                     self.state,
-                    i,
-                    pin.Motion.Zero(),
-                    pin.ReferenceFrame.WORLD,
-                    nu,
+                    crocoddyl.ResidualModelFrameVelocity(
+                        self.state,
+                        i,
+                        pin.Motion.Zero(),
+                        pin.ReferenceFrame.WORLD,
+                        nu,
+                    ),
                 ),
             )
             costs.addCost(
                 "{}_velimpact".format(self.rmodel.frames[i].name),
                 impact_vel_cost,
-                self.task.impact_velocity_w / self.params.dt_mpc,
+                self.task.impact_velocity_w / dt,
+                active,
             )
 
     @property
@@ -407,6 +576,14 @@ class WalkingOCPBuilder(OCPBuilder):
         base_velocity = CostModelResidual(self.state, residual_base_velocity)
         costs.addCost(name, base_velocity, self.task.base_velocity_tracking_w)
 
+    def get_handles(self, model, is_terminal=False):
+        """Return the StageHandles of a model, creating them on first use."""
+        entry = self._handles.get(id(model))
+        if entry is None:
+            entry = (model, StageHandles(self, model, is_terminal))
+            self._handles[id(model)] = entry
+        return entry[1]
+
     def update_model(
         self,
         model,
@@ -414,19 +591,52 @@ class WalkingOCPBuilder(OCPBuilder):
         base_vel_ref: Optional[pin.Motion],
         support_feet,
         is_terminal=False,
+        impact_feet=None,
     ):
-        """Update each stage of the OCP: the contact status of the dynamics and cost functions."""
-        for i in self.task.feet_ids:
-            name = self.rmodel.frames[i].name + "_contact"
-            model.differential.contacts.changeContactStatus(name, i in support_feet)
+        """
+        Update each stage of the OCP: the contact status of the dynamics and cost functions.
+        The contact and cost status are only changed if the support feet differ from the
+        last update of this model. The impact costs of a non-uniform grid are active on
+        the impact_feet (unchanged if None).
+        """
+        handles = self.get_handles(model, is_terminal)
+        support = [i in support_feet for i in self.task.feet_ids]
+        if support != handles.support:
+            contacts = model.differential.contacts
+            for name, in_support in zip(handles.contact_names, support):
+                contacts.changeContactStatus(name, in_support)
+            if not is_terminal:
+                costs = model.differential.costs
+                for names, in_support in zip(handles.swing_cost_names, support):
+                    for name in names:
+                        costs.changeCostStatus(name, not in_support)
+                for name, in_support in zip(handles.force_reg_names, support):
+                    costs.changeCostStatus(name, in_support)
+            handles.support = support
+
+        if impact_feet is not None:
+            impact = [i in impact_feet for i in self.task.feet_ids]
+            if impact != handles.impact:
+                costs = model.differential.costs
+                for names, active in zip(handles.impact_names, impact):
+                    for name in names:
+                        costs.changeCostStatus(name, active)
+                handles.impact = impact
+
         if not is_terminal:
-            self.update_tracking_costs(
-                model.differential.costs, feet_pos, base_vel_ref, support_feet
-            )
+            if handles.foot_tracking is not None:
+                index = 0
+                for residual, in_support in zip(handles.foot_tracking, support):
+                    if in_support:
+                        residual.reference = feet_pos[index]
+                        index += 1
+            if base_vel_ref is not None and handles.base_velocity is not None:
+                handles.base_velocity.reference = base_vel_ref
 
     def update_tracking_costs(
         self, costs, feet_pos: List[np.ndarray], base_vel_ref: pin.Motion, support_feet
     ):
+        """Name-based update of the costs, used when the stage is created."""
         index = 0
         for i in self.task.feet_ids:
             if self.has_foot_track_cost:
@@ -455,6 +665,48 @@ class WalkingOCPBuilder(OCPBuilder):
             costs.costs[name].cost.residual.reference = base_vel_ref
 
 
+class StageHandles:
+    """
+    What WalkingOCPBuilder.update_model needs to update a stage, resolved once: the
+    names of the contacts and costs whose status depends on the support feet, direct
+    references to the residuals whose reference is updated, and the support and impact
+    status of each foot at the last update (None if unknown).
+    """
+
+    def __init__(self, builder: WalkingOCPBuilder, model, is_terminal=False):
+        names = [builder.foot_names[i] for i in builder.task.feet_ids]
+        self.support = None
+        self.impact = None
+        self.contact_names = [name + "_contact" for name in names]
+
+        suffixes = ["_vel_zReg"]
+        if builder.has_foot_track_cost:
+            suffixes.append("_foot_tracking")
+        if builder.has_ground_collision:
+            suffixes.append("_groundCol")
+        if builder.has_fly_high:
+            suffixes.append("_flyHigh")
+        self.swing_cost_names = [[name + s for s in suffixes] for name in names]
+        self.force_reg_names = [name + "_forceReg" for name in names]
+
+        self.foot_tracking = None
+        self.base_velocity = None
+        self.impact_names = []
+        if is_terminal:
+            return
+        costs = model.differential.costs.costs
+        self.impact_names = [
+            [n for n in (name + "_altitudeimpact", name + "_velimpact") if n in costs]
+            for name in names
+        ]
+        if builder.has_foot_track_cost:
+            self.foot_tracking = [
+                costs[name + "_foot_tracking"].cost.residual for name in names
+            ]
+        if builder.has_base_vel_cost:
+            self.base_velocity = costs["base_velocity_tracking"].cost.residual
+
+
 def get_active_feet(footstep, support_feet) -> List[np.ndarray]:
     """Get the positions for all the active feet."""
     feet_pos = []
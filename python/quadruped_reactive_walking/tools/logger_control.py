@@ -1,14 +1,14 @@
 from datetime import datetime
 from time import time
 import numpy as np
-import pathlib
 from .kinematics_utils import get_translation_array
+from .utils import TEMP_DIRNAME
 from ..controller import Controller
+from ..wb_mpc import get_ocp_from_str
 from ..wb_mpc.task_spec import TaskSpec
 
 
 FIG_DPI = 100
-TEMP_DIRNAME = pathlib.Path.home() / ".tmp"
 DATE_STRFORMAT = "%Y_%m_%d_%H_%M_%S"
 
 
@@ -69,6 +69,9 @@ class LoggerControl:
         self.t_ocp_warm_start = np.full(size, np.nan)
         self.t_ocp_ddp = np.full(size, np.nan)
         self.t_ocp_solve = np.zeros(size)
+        self.t_mpc_wakeup = np.full(size, np.nan)  # async MPC worker wake-up latency
+        self.ocp_residual = np.full(size, np.nan)  # stopping criterion at exit
+        self.t_ocp_budget_left = np.full(size, np.nan)  # time left of ocp.time_budget
 
         # MPC
         self.q_estimate_rpy = np.zeros([size, self.pd.nq - 1])
@@ -78,12 +81,23 @@ class LoggerControl:
         self.v_filtered = np.zeros([size, self.pd.nv])
         MPC_WINDOW = params.window_size
         self.ocp_xs = np.zeros([size, MPC_WINDOW + 1, self.pd.nx])
-        self.ocp_us = np.zeros([size, MPC_WINDOW, self.pd.nu])
+        self.ocp_us = np.zeros([size, params.feedback_window, self.pd.nu])
         # "spot" feedback gain
         self.ocp_K = np.zeros([size, self.pd.nu, self.pd.ndx])
         self.ocp_num_iters = np.zeros([size], dtype=int)
         self.MPC_equivalent_Kp = np.zeros([size, self.pd.nu])
         self.MPC_equivalent_Kd = np.zeros([size, self.pd.nu])
+        # Whole horizons, sampled every params.horizon_log_period MPC results
+        n_horizons = 0
+        if params.horizon_log_period:
+            n_horizons = size // (params.mpc_wbc_ratio * params.horizon_log_period) + 1
+        self.i_horizon = 0
+        T = params.N_gait
+        if solver_cls_name is not None:
+            T = get_ocp_from_str(solver_cls_name).get_num_nodes(params)
+        self.horizon_k = np.zeros([n_horizons], dtype=int)
+        self.horizon_xs = np.zeros([n_horizons, T + 1, self.pd.nx])
+        self.horizon_us = np.zeros([n_horizons, T, self.pd.nu])
 
         self.target = np.zeros([size, 3])
         self.target_base_linear = np.zeros([size, 3])
@@ -144,12 +158,22 @@ class LoggerControl:
         self.v_estimate[self.i] = np.array(controller.v_estimate)
         self.q_filtered[self.i] = np.array(controller.q_filtered)
         self.v_filtered[self.i] = np.array(controller.v_filtered)
-        self.ocp_xs[self.i] = np.array(controller.mpc_result.xs)
-        self.ocp_us[self.i] = np.array(controller.mpc_result.us)
-        self.ocp_K[self.i] = controller.mpc_result.K[0]
+        self.ocp_xs[self.i] = controller.mpc_result.xs_array
+        self.ocp_us[self.i] = controller.mpc_result.us_array
+        K0 = controller.mpc_result.K_array[0]
+        self.ocp_K[self.i] = K0
         self.ocp_num_iters[self.i] = controller.mpc_result.num_iters
-        self.MPC_equivalent_Kp[self.i] = controller.mpc_result.K[0].diagonal()
-        self.MPC_equivalent_Kd[self.i] = controller.mpc_result.K[0].diagonal(3)
+        self.MPC_equivalent_Kp[self.i] = K0.diagonal()
+        self.MPC_equivalent_Kd[self.i] = K0.diagonal(3)
+        if self.params.horizon_log_period:
+            horizon = controller.mpc.get_latest_horizon()
+            if horizon is not None and self.i_horizon < len(self.horizon_k):
+                (
+                    self.horizon_k[self.i_horizon],
+                    self.horizon_xs[self.i_horizon],
+                    self.horizon_us[self.i_horizon],
+                ) = horizon
+                self.i_horizon += 1
 
         self.t_measures[self.i] = controller.t_measures
         self.t_mpc[self.i] = controller.t_mpc
@@ -181,10 +205,18 @@ class LoggerControl:
                 self.i + self.params.N_gait * self.params.mpc_wbc_ratio
             ] = controller.v_ref[:][3:]
 
-        if not self.params.asynchronous_mpc and not self.params.mpc_in_rosnode:
+        if (
+            not self.params.asynchronous_mpc
+            and not self.params.mpc_in_rosnode
+            and not self.params.mpc_remote_address
+        ):
             self.t_ocp_update[self.i] = controller.mpc.ocp.t_update
             self.t_ocp_warm_start[self.i] = controller.mpc.ocp.t_warm_start
             self.t_ocp_solve[self.i] = controller.mpc.ocp.t_solve
+            self.ocp_residual[self.i] = controller.mpc.ocp.residual
+            self.t_ocp_budget_left[self.i] = controller.mpc.ocp.t_budget_left
+        elif self.params.asynchronous_mpc and hasattr(controller.mpc, "wakeup_latency"):
+            self.t_mpc_wakeup[self.i] = controller.mpc.wakeup_latency
 
         # Logging from whole body control
         self.wbc_P[self.i] = controller.result.P
@@ -396,6 +428,15 @@ class LoggerControl:
             alpha=alpha,
             label="MPC (OCP solve)",
         )
+        if self.params.asynchronous_mpc:
+            plt.plot(
+                t_range,
+                self.t_mpc_wakeup,
+                "2",
+                c="teal",
+                alpha=alpha,
+                label="MPC (worker wake-up)",
+            )
         plt.axhline(
             y=self.params.dt_mpc,
             color="darkorange",
@@ -448,6 +489,9 @@ class LoggerControl:
             ocp_xs=self.ocp_xs,
             ocp_us=self.ocp_us,
             ocp_K=self.ocp_K,
+            horizon_k=self.horizon_k[: self.i_horizon],
+            horizon_xs=self.horizon_xs[: self.i_horizon],
+            horizon_us=self.horizon_us[: self.i_horizon],
             MPC_equivalent_Kp=self.MPC_equivalent_Kp,
             MPC_equivalent_Kd=self.MPC_equivalent_Kd,
             t_measures=self.t_measures,
@@ -458,6 +502,9 @@ class LoggerControl:
             t_ocp_warm_start=self.t_ocp_warm_start,
             t_ocp_ddp=self.t_ocp_ddp,
             t_ocp_solve=self.t_ocp_solve,
+            t_mpc_wakeup=self.t_mpc_wakeup,
+            ocp_residual=self.ocp_residual,
+            t_ocp_budget_left=self.t_ocp_budget_left,
             wbc_P=self.wbc_P,
             wbc_D=self.wbc_D,
             wbc_q_des=self.wbc_q_des,
@@ -530,6 +577,14 @@ class LoggerControl:
         self.ocp_xs = self.data["ocp_xs"]
         self.ocp_us = self.data["ocp_us"]
         self.ocp_K = self.data["ocp_K"]
+        if "ocp_residual" in self.data:
+            self.ocp_residual = self.data["ocp_residual"]
+            self.t_ocp_budget_left = self.data["t_ocp_budget_left"]
+        if "horizon_k" in self.data:
+            self.horizon_k = self.data["horizon_k"]
+            self.horizon_xs = self.data["horizon_xs"]
+            self.horizon_us = self.data["horizon_us"]
+            self.i_horizon = len(self.horizon_k)
         self.t_mpc = self.data["t_mpc"]
         self.t_send = self.data["t_send"]
         self.t_loop = self.data["t_loop"]
@@ -0,0 +1,94 @@
+"""
+Utilities to control where (CPU cores) and how (scheduling policy) the controller and
+MPC threads run. Only supported on Linux.
+"""
+import os
+import threading
+import warnings
+
+
+def set_cpu_affinity(cores, tid=0):
+    """
+    Restrict a thread to a set of cores. Threads it creates afterwards inherit the mask.
+    Does nothing if `cores` is empty.
+
+    :param cores: iterable of core ids
+    :param tid: native thread id, 0 for the calling thread
+    """
+    cores = set(int(c) for c in cores)
+    if len(cores) == 0:
+        return
+    os.sched_setaffinity(tid, cores)
+
+
+def set_realtime_priority(priority, tid=0):
+    """
+    Switch a thread to the SCHED_FIFO policy with the given priority.
+    Does nothing if `priority` is not positive, and warns if the permission is denied.
+
+    :param priority: SCHED_FIFO priority, between 1 and 99
+    :param tid: native thread id, 0 for the calling thread
+    """
+    if priority <= 0:
+        return
+    try:
+        os.sched_setscheduler(tid, os.SCHED_FIFO, os.sched_param(priority))
+    except PermissionError:
+        warnings.warn(
+            "Not allowed to use SCHED_FIFO (priority {}), keeping the default "
+            "scheduling policy. Run with CAP_SYS_NICE or adjust rtprio limits.".format(
+                priority
+            )
+        )
+
+
+def get_thread_ids(pid=None):
+    """List the native ids of all the threads of a process."""
+    pid = os.getpid() if pid is None else pid
+    return sorted(int(tid) for tid in os.listdir("/proc/{}/task".format(pid)))
+
+
+def pin_new_threads(cores, known_tids):
+    """
+    Restrict the threads of the current process that are not in `known_tids` to a set
+    of cores, e.g. the solver thread pool, with `known_tids` the threads listed before
+    the first solve. Does nothing if `cores` is empty.
+    """
+    cores = set(int(c) for c in cores)
+    if len(cores) == 0:
+        return
+    for tid in get_thread_ids():
+        if tid not in known_tids:
+            try:
+                os.sched_setaffinity(tid, cores)
+            except ProcessLookupError:
+                # the thread has exited since it was listed
+                pass
+
+
+def placement_report(name):
+    """Describe the allowed cores and scheduling policy of each thread of this process."""
+    policy_names = {
+        os.SCHED_OTHER: "OTHER",
+        os.SCHED_FIFO: "FIFO",
+        os.SCHED_RR: "RR",
+    }
+    this_tid = threading.get_native_id()
+    lines = ["[{}] pid {}:".format(name, os.getpid())]
+    for tid in get_thread_ids():
+        try:
+            cores = sorted(os.sched_getaffinity(tid))
+            policy = os.sched_getscheduler(tid)
+            priority = os.sched_getparam(tid).sched_priority
+        except ProcessLookupError:
+            continue
+        lines.append(
+            "  thread {}{}: cores {}, policy {} (priority {})".format(
+                tid,
+                " (main)" if tid == this_tid else "",
+                cores,
+                policy_names.get(policy, policy),
+                priority,
+            )
+        )
+    return "\n".join(lines)
@@ -0,0 +1,79 @@
+"""
+Packing of numpy arrays into a single flat byte buffer, used as the payload of the
+binary MPC transports.
+
+Layout (little endian):
+    uint32 number of arrays
+    for each array:
+        char dtype code, uint8 ndim, ndim x uint32 shape
+        padding up to the next multiple of ALIGNMENT bytes
+        raw array data (C order)
+
+Decoding does not copy: the arrays returned by unpack_arrays are views on the buffer.
+"""
+import struct
+import numpy as np
+
+ALIGNMENT = 8
+
+_COUNT = struct.Struct("<I")
+_HEADER = struct.Struct("<cB")
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _layout(arrays):
+    """Compute the offsets of the headers and data of each array, and the total size."""
+    offsets = []
+    offset = _COUNT.size
+    for arr in arrays:
+        header = offset
+        offset = _align(offset + _HEADER.size + 4 * arr.ndim)
+        offsets.append((header, offset))
+        offset += arr.nbytes
+    return offsets, offset
+
+
+def pack_arrays(arrays):
+    """
+    Pack a sequence of arrays into a bytearray, with a single copy of the data.
+
+    :param arrays: sequence of numpy arrays (or objects convertible to arrays, such as
+        lists of vectors of the same size)
+    """
+    arrays = [np.ascontiguousarray(a) for a in arrays]
+    offsets, size = _layout(arrays)
+    buffer = bytearray(size)
+    _COUNT.pack_into(buffer, 0, len(arrays))
+    for arr, (header, offset) in zip(arrays, offsets):
+        _HEADER.pack_into(buffer, header, arr.dtype.char.encode(), arr.ndim)
+        struct.pack_into("<%dI" % arr.ndim, buffer, header + _HEADER.size, *arr.shape)
+        out = np.frombuffer(buffer, arr.dtype, count=arr.size, offset=offset)
+        out[:] = arr.ravel()
+    return buffer
+
+
+def unpack_arrays(buffer):
+    """
+    Decode a buffer created by pack_arrays.
+    Return the list of arrays, as (read-only if the buffer is) views on the buffer.
+    """
+    (count,) = _COUNT.unpack_from(buffer, 0)
+    offset = _COUNT.size
+    arrays = []
+    for _ in range(count):
+        code, ndim = _HEADER.unpack_from(buffer, offset)
+        shape = struct.unpack_from("<%dI" % ndim, buffer, offset + _HEADER.size)
+        offset = _align(offset + _HEADER.size + 4 * ndim)
+        dtype = np.dtype(code.decode())
+        size = int(np.prod(shape))
+        arr = np.frombuffer(buffer, dtype, count=size, offset=offset).reshape(shape)
+        arrays.append(arr)
+        offset += arr.nbytes
+    if offset != len(buffer):
+        raise ValueError(
+            "Corrupted buffer: {} bytes decoded out of {}".format(offset, len(buffer))
+        )
+    return arrays
@@ -1,12 +1,24 @@
 import numpy as np
 import pinocchio as pin
 import copy
+import os
+import pathlib
+import tempfile
 
 try:
     from multiprocess.shared_memory import SharedMemory
 except ImportError:
     from multiprocessing.shared_memory import SharedMemory
 
+# Logs and plots
+TEMP_DIRNAME = pathlib.Path(tempfile.gettempdir()) / "qrw"
+# Data kept across runs (e.g. warm starts): $QRW_CACHE_DIR, or qrw in the user cache
+# directory ($XDG_CACHE_HOME, ~/.cache by default)
+_USER_CACHE = os.environ.get("XDG_CACHE_HOME") or pathlib.Path.home() / ".cache"
+CACHE_DIRNAME = pathlib.Path(
+    os.environ.get("QRW_CACHE_DIR") or pathlib.Path(_USER_CACHE) / "qrw"
+)
+
 
 def make_initial_footstep(q_init):
     import example_robot_data as erd
@@ -1,7 +1,9 @@
 from .ocp_abstract import OCPAbstract
 from .ocp_crocoddyl import CrocOCP
+from .ocp_crocoddyl_native import CrocNativeOCP
+from .ocp_crocoddyl_fixed import CrocFixedBaseOCP
 
-_OCP_TYPES = [CrocOCP]
+_OCP_TYPES = [CrocOCP, CrocNativeOCP, CrocFixedBaseOCP]
 
 try:
     from .ocp_proxddp import AlgtrOCPAbstract, AlgtrOCPProx, AlgtrOCPFDDP
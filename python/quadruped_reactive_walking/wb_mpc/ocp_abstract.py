@@ -1,8 +1,117 @@
 import abc
+import time
+
+import numpy as np
 
 import quadruped_reactive_walking as qrw
 
 
+class ResultArrays:
+    """
+    Contiguous buffers for the results of an OCP: the gait, xs (W+1, nx), us (F, nu)
+    and the feedback gains K (F, nu, ndx), with W the window size and F the feedback
+    window. They are allocated on the first fill and overwritten by the next ones.
+    """
+
+    def __init__(self):
+        self.gait = None
+        self.xs = None
+        self.us = None
+        self.K = None
+
+    def _allocate(self, gait, xs, us, K):
+        self.gait = np.empty(np.shape(gait), dtype=np.int32)
+        self.xs = np.empty((len(xs), len(xs[0])))
+        self.us = np.empty((len(us), len(us[0])))
+        self.K = np.empty((len(us),) + np.shape(K[0]))
+
+    def fill(self, gait, xs, us, K, flip_K=False):
+        """
+        Copy the results, given as sequences of vectors and matrices, in the buffers:
+        all of xs and us, and as many feedback gains as controls.
+        If flip_K is True, the sign of the feedback gains is changed during the copy.
+        """
+        if self.us is None or len(self.xs) != len(xs) or len(self.us) != len(us):
+            self._allocate(gait, xs, us, K)
+        self.gait[:] = gait
+        for i in range(len(self.xs)):
+            self.xs[i] = xs[i]
+        for i in range(len(self.us)):
+            self.us[i] = us[i]
+        if flip_K:
+            for i in range(len(self.K)):
+                np.negative(K[i], out=self.K[i])
+        else:
+            for i in range(len(self.K)):
+                self.K[i] = K[i]
+        return self.gait, self.xs, self.us, self.K
+
+
+class BudgetStop(Exception):
+    """Raised by an IterationBudget to end the solver call it is a callback of."""
+
+
+class IterationBudget:
+    """
+    Callback of a solver run within a time budget, called at the end of each iteration
+    with the stopping criterion evaluated during the iteration and the new iterate. It
+    raises BudgetStop to end the run.
+
+    The solvers evaluate the stopping criterion of an iterate at the start of the
+    iteration that steps from it, so at the end of iteration i only the criterion of
+    iterate i - 1 is known (iterate 0 being the warm start). The best iterate with a
+    known criterion is kept: it is the result of the run, and its criterion the
+    residual at exit. It is also the iterate the feedback gains of the last iteration
+    were computed at, unless the criterion increased.
+    """
+
+    # Maximum number of iterations of a run
+    MAX_ITERS = 1000
+
+    def __init__(self, budget, tol, xs, us):
+        """
+        :param budget: wall-clock budget of the run (s)
+        :param tol: the run ends once the criterion is below tol
+        :param xs, us: warm start of the run
+        """
+        self.budget = budget
+        self.tol = tol
+        self.t_start = self.t_iter = time.time()
+        self.num_iters = 0
+        # (criterion, xs, us) of the best iterate with a known criterion
+        self.best = None
+        self._last = self._copy(xs, us)
+
+    @staticmethod
+    def _copy(xs, us):
+        return [np.array(x) for x in xs], [np.array(u) for u in us]
+
+    def __call__(self, residual, xs, us):
+        """
+        Called at the end of an iteration, with the stopping criterion of the iterate
+        it started from, and the new iterate. Stop when the criterion did not
+        decrease, is below tol, or when the next iteration is not expected to end
+        within the budget (assuming it lasts as long as this one).
+        """
+        now = time.time()
+        self.num_iters += 1
+        improved = self.best is None or residual < self.best[0]
+        if improved:
+            self.best = (residual,) + self._last
+        self._last = self._copy(xs, us)
+        if (
+            not improved
+            or residual < self.tol
+            or now - self.t_start + (now - self.t_iter) > self.budget
+        ):
+            raise BudgetStop()
+        self.t_iter = now
+
+    @property
+    def time_left(self):
+        return self.budget - (time.time() - self.t_start)
+
+
 class _OCPMeta(type(qrw.IOCPAbstract), abc.ABCMeta):
     pass
 
@@ -10,6 +119,23 @@ class _OCPMeta(type(qrw.IOCPAbstract), abc.ABCMeta):
 class OCPAbstract(qrw.IOCPAbstract, metaclass=_OCPMeta):
     def __init__(self, params: qrw.Params):
         super().__init__(params)
+        self._init_python_state()
+
+    def _init_python_state(self):
+        """
+        Attributes defined in Python. Called by the constructor, or directly by the
+        subclasses that construct another C++ OCP class instead of IOCPAbstract.
+        """
+        self._result_arrays = ResultArrays()
+        # Statistics of the last solve: stopping criterion at exit, and time left of
+        # params.ocp.time_budget (nan without budget)
+        self.residual = np.nan
+        self.t_budget_left = np.nan
+
+    @classmethod
+    def get_num_nodes(cls, params):
+        """Number of running nodes of the problem built for these parameters."""
+        return params.N_gait
 
     @abc.abstractstaticmethod
     def get_type_str():
@@ -18,3 +144,54 @@ class OCPAbstract(qrw.IOCPAbstract, metaclass=_OCPMeta):
     @abc.abstractclassmethod
     def circular_append(self, model):
         pass
+
+    def solve_within_budget(self, run, tol, restore):
+        """
+        Solve from the warm start within params.ocp.time_budget, in a single solver
+        run (so that the regularization and the other solver state carry over from an
+        iteration to the next) ended by an IterationBudget, and set the best iterate
+        with a known criterion as the result.
+
+        :param run: function running the solver from the warm start for at most
+            IterationBudget.MAX_ITERS iterations, with the given IterationBudget as
+            callback
+        :param restore: function setting an iterate (xs, us) as the result of the solver
+        """
+        budget = IterationBudget(
+            self.params.ocp.time_budget, tol, self.xs_init, self.us_init
+        )
+        try:
+            run(budget)
+        except BudgetStop:
+            pass
+        self.num_iters = budget.num_iters
+        if budget.best is not None:
+            self.residual, xs, us = budget.best
+            restore(xs, us)
+        else:
+            self.residual = np.nan
+        self.t_budget_left = budget.time_left
+
+    def prepare(self, k):
+        """
+        Called once the results of iteration k have been fetched, to do the part of the
+        next solve that does not depend on the next initial state. Nothing by default.
+        """
+        pass
+
+    def get_results_arrays(self, window_size=None, feedback_window=None):
+        """
+        Same as get_results, with xs, us and K stacked in contiguous arrays of shapes
+        (W+1, nx), (F, nu) and (F, nu, ndx), where W is the window size and F the
+        feedback window (the window size by default). The arrays belong to the OCP and
+        are overwritten by the next call.
+        """
+        gait, xs, us, K, solving_duration = self.get_results(window_size)
+        return self._result_arrays.fill(gait, xs, us[:feedback_window], K) + (
+            solving_duration,
+        )
+
+    def get_horizon(self):
+        """Whole predicted trajectory of the last solve, as new (xs, us) arrays."""
+        _, xs, us, _, _ = self.get_results()
+        return np.array(xs), np.array(us)
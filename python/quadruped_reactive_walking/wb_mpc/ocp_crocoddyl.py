@@ -4,40 +4,64 @@ import numpy as np
 import time
 
 from colorama import Fore
-from .ocp_abstract import OCPAbstract
+from .ocp_abstract import OCPAbstract, IterationBudget
 from typing import Optional
 from quadruped_reactive_walking import Params
-from . import task_spec
+from .warm_start import WarmStartStore, WarmStartLibrary
 from ..ocp_defs.walking import (
     WalkingOCPBuilder,
     get_active_feet,
 )
+from ..ocp_defs.time_grid import geometric_time_grid, shift_points, shift_trajectory
 
 
-class CrocOCP(OCPAbstract):
+class _CrocBudgetCallback(crocoddyl.CallbackAbstract):
+    """Crocoddyl callback calling an IterationBudget."""
+
+    def __init__(self, budget: IterationBudget):
+        crocoddyl.CallbackAbstract.__init__(self)
+        self.budget = budget
+
+    def __call__(self, solver):
+        self.budget(solver.stop, solver.xs, solver.us)
+
+
+class CrocOCPAbstract(OCPAbstract):
     """
-    Generate a Crocoddyl OCP for the control task.
+    Common part of the OCPs solved with Crocoddyl's FDDP: the solver, the warm start
+    (also stored across runs) and the solve. The problem is built by the builder,
+    whose stages are cycled by circular_append.
     """
 
-    def __init__(self, params: Params, footsteps, base_refs):
+    def __init__(self, params: Params, builder, *ws_key_data):
+        """
+        :param ws_key_data: data the stored warm start depends on, besides the
+            parameters (see WarmStartStore.make_key)
+        """
         super().__init__(params)
-        self.task = task_spec.TaskSpec(params)
+        self._builder = builder
+        self.task = builder.task
+        self.rdata = builder.rdata
 
-        self._builder = WalkingOCPBuilder(params, footsteps, base_refs)
-        self.rdata = self._builder.rdata
-        self.current_gait = self._builder.current_gait
+        self.t_update = 0.0
+        self.t_warm_start = 0.0
 
-        # Set the problem parameters
-        self.t_problem_update = 0
-        self.t_update_last_model = 0.0
-        self.t_shift = 0.0
+        self.x0 = builder.x0
 
-        self.x0 = self.task.x0
-
-        self.croc_problem = self._builder.problem
+        self.croc_problem = builder.problem
+        self.croc_problem.nthreads = params.ocp.num_threads
         self.ddp = crocoddyl.SolverFDDP(self.croc_problem)
+        self._callbacks = []
         if params.ocp.verbose:
-            self.ddp.setCallbacks([crocoddyl.CallbackVerbose()])
+            self._callbacks.append(crocoddyl.CallbackVerbose())
+        self.ddp.setCallbacks(self._callbacks)
+
+        self._ws_store = WarmStartStore()
+        self._ws_key = self._ws_store.make_key(
+            params, type(self).get_type_str(), *ws_key_data
+        )
+        if self.warm_start_empty():
+            self.load_warm_start()
         if self.warm_start_empty():
             print(Fore.CYAN + "No warm-start found, initializing..." + Fore.RESET)
             self.xs_init = [self.x0] * (self.ddp.problem.T + 1)
@@ -47,8 +71,18 @@ class CrocOCP(OCPAbstract):
     def rmodel(self):
         return self.task.model
 
-    def get_type_str():
-        return "croc"
+    def load_warm_start(self):
+        """Use the stored solution of a previous run, if any, as warm start."""
+        T = self.croc_problem.T
+        ws = self._ws_store.load(self._ws_key, (T + 1, self.task.nx), (T, self.task.nu))
+        if ws is not None:
+            print(Fore.CYAN + "Warm-start loaded from previous runs." + Fore.RESET)
+            self.xs_init = list(ws[0])
+            self.us_init = list(ws[1])
+
+    def save_warm_start(self):
+        """Store the solution of the last solve, for the next runs."""
+        self._ws_store.save(self._ws_key, *self.get_horizon())
 
     def solve(self, k):
         t_start = time.time()
@@ -56,23 +90,117 @@ class CrocOCP(OCPAbstract):
         t_update = time.time()
         self.t_update = t_update - t_start
 
-        self._check_ws_dim()
+        self._check_ws_dim(self.croc_problem.T)
 
         t_warm_start = time.time()
         self.t_warm_start = t_warm_start - t_update
 
-        self.ddp.solve(
-            self.xs_init,
-            self.us_init,
-            self.max_iter if k > 0 else self.init_max_iters,
-            False,
-        )
+        if k > 0 and self.params.ocp.time_budget > 0:
+            self.solve_within_budget(self._ddp_run, self.ddp.th_stop, self._ddp_restore)
+        else:
+            self.ddp.solve(
+                self.xs_init,
+                self.us_init,
+                self.max_iter if k > 0 else self.init_max_iters,
+                False,
+            )
+            self.num_iters = self.ddp.iter
+            self.residual = self.ddp.stop
 
         t_ddp = time.time()
         self.t_ddp = t_ddp - t_warm_start
 
         self.t_solve = time.time() - t_start
-        self.num_iters = self.ddp.iter
+        if k == 0 and self.params.save_guess:
+            self.save_warm_start()
+
+    def _ddp_run(self, budget: IterationBudget):
+        self.ddp.setCallbacks(self._callbacks + [_CrocBudgetCallback(budget)])
+        try:
+            self.ddp.solve(self.xs_init, self.us_init, IterationBudget.MAX_ITERS, False)
+        finally:
+            self.ddp.setCallbacks(self._callbacks)
+
+    def _ddp_restore(self, xs, us):
+        self.ddp.setCandidate(xs, us, False)
+
+    def get_horizon(self):
+        return np.array(self.ddp.xs), np.array(self.ddp.us)
+
+    def circular_append(self, m):
+        d = self._builder.stages.cycle(m, lambda model: model.createData())
+        self.croc_problem.circularAppend(m, d)
+
+
+class CrocOCP(CrocOCPAbstract):
+    """
+    Generate a Crocoddyl OCP for the control task.
+
+    With ocp.time_grid_nodes > 0, the horizon is covered by that many nodes on a
+    geometric time grid (see WalkingOCPBuilder), and the warm start is moved forward
+    by dt_mpc on the grid at each push.
+    """
+
+    # Whether the OCP supports the non-uniform time grid
+    time_grid_support = True
+
+    def __init__(self, params: Params, footsteps, base_refs):
+        time_grid = None
+        if self.uses_time_grid(params):
+            time_grid = geometric_time_grid(
+                params.dt_mpc,
+                params.starting_nodes * params.dt_mpc,
+                params.ocp.time_grid_nodes,
+            )
+        builder = WalkingOCPBuilder(params, footsteps, base_refs, time_grid=time_grid)
+        ws_key_data = [builder.current_gait, base_refs[0]]
+        if time_grid is not None:
+            ws_key_data.append(time_grid)
+            self._grid_shift = shift_points(time_grid, params.dt_mpc)
+        super().__init__(params, builder, *ws_key_data)
+
+        self._library = None
+        self._last_vel_ref = None
+        # Number of nodes still to be pushed before the whole horizon follows the
+        # reference of the last jump
+        self._library_nodes = 0
+        if params.ocp.warm_start_library:
+            self._library = WarmStartLibrary.load(params, type(self).get_type_str())
+            if self._library is None:
+                print(Fore.YELLOW + "No warm-start library found." + Fore.RESET)
+
+        # Real-time iteration: iteration the problem is prepared for (None if not
+        # prepared), whether the backward pass succeeded, and references of the last
+        # pushed node
+        self.rti = params.ocp.rti
+        self._rti_k = None
+        self._rti_ready = False
+        self._rti_refs = None
+        self.t_prepare = 0.0
+
+    @property
+    def current_gait(self):
+        return self._builder.current_gait
+
+    def get_type_str():
+        return "croc"
+
+    @classmethod
+    def uses_time_grid(cls, params):
+        return params.ocp.time_grid_nodes > 0 and cls.time_grid_support
+
+    @classmethod
+    def get_num_nodes(cls, params):
+        if cls.uses_time_grid(params):
+            return params.ocp.time_grid_nodes
+        return super().get_num_nodes(params)
+
+    def solve(self, k):
+        prepared_k, self._rti_k = self._rti_k, None
+        if prepared_k == k and self._rti_ready:
+            self.feedback()
+            return
+        super().solve(k)
 
     def push_node(self, k, x0, footsteps, base_vel_ref: Optional[pin.Motion]):
         """
@@ -89,20 +217,99 @@ class CrocOCP(OCPAbstract):
 
         self.croc_problem.x0 = self.x0
 
-        if k == 0:
+        if self.rti:
+            self._rti_refs = (footsteps, base_vel_ref)
+        # the node has already been appended by prepare
+        if k == 0 or self._rti_k is not None:
             return
 
+        self._append_node(k, footsteps, base_vel_ref)
+
+    def _append_node(self, k, footsteps, base_vel_ref):
+        """
+        Append the node of iteration k to the problem and cycle the warm start (with
+        the library, if any, when the velocity reference jumps). On a non-uniform time
+        grid, the nodes are updated in place and the warm start is interpolated.
+        """
+        if self._builder.time_grid is not None:
+            self._builder.update_horizon(k, footsteps, base_vel_ref)
+            self.xs_init, self.us_init = shift_trajectory(
+                self.croc_problem.runningModels[0].state,
+                self.xs_init,
+                self.us_init,
+                self._grid_shift,
+            )
+            return
         model, support_feet, base_vel_ref = self._builder.select_next_model(
-            k, self.current_gait, base_vel_ref
+            k, base_vel_ref
         )
         active_feet_pos = get_active_feet(footsteps, support_feet)
         self._builder.update_model(model, active_feet_pos, base_vel_ref, support_feet)
         self.circular_append(model)
         self.cycle_warm_start()
+        if self._library is not None and base_vel_ref is not None:
+            self.library_warm_start(base_vel_ref)
 
-    def circular_append(self, m):
-        d = m.createData()
-        self.croc_problem.circularAppend(m, d)
+    def prepare(self, k):
+        """
+        RTI preparation phase: append the node of the next iteration (assumed to be
+        k + mpc_wbc_ratio, with the references of the last pushed node), then linearize
+        the problem around the warm start and run the backward pass. Only the forward
+        pass from the new x0 is left to the next solve.
+        """
+        if not self.rti:
+            return
+        t_start = time.time()
+        k_next = k + self.params.mpc_wbc_ratio
+        self._append_node(k_next, *self._rti_refs)
+        self._rti_k = k_next
+
+        self.ddp.setCandidate(self.xs_init, self.us_init, False)
+        self.croc_problem.calc(self.ddp.xs, self.ddp.us)
+        self.ddp.calcDiff()
+        try:
+            self.ddp.backwardPass()
+            self._rti_ready = True
+        except RuntimeError:
+            # the next solve runs the usual iterations instead
+            self._rti_ready = False
+        self.t_prepare = time.time() - t_start
+
+    def feedback(self):
+        """RTI feedback phase: full step from the new x0 along the prepared direction."""
+        t_start = time.time()
+        self.ddp.tryStep(1.0)
+        self.ddp.setCandidate(self.ddp.xs_try, self.ddp.us_try, True)
+        self.t_update = 0.0
+        self.t_warm_start = 0.0
+        self.t_ddp = self.t_solve = time.time() - t_start
+        self.num_iters = 1
+        self.residual = np.nan
+
+    def library_warm_start(self, base_vel_ref: pin.Motion):
+        """
+        When the velocity reference jumps while walking, the node just pushed is the
+        only one of the horizon with the new reference: replace its part of the warm
+        start (its control and final state) by the one of the library, which is
+        continued from the state before it. The next nodes pushed with this
+        reference are spliced in the same way, until the whole horizon follows it.
+        The nodes with the previous reference keep their warm start.
+        """
+        v = base_vel_ref.vector
+        if (
+            self._last_vel_ref is not None
+            and np.linalg.norm(v - self._last_vel_ref) > self.params.ocp.warm_start_jump
+        ):
+            self._library_nodes = self.croc_problem.T
+        self._last_vel_ref = v.copy()
+        life_index = self._builder.schedule.life_index[self._builder.node]
+        if self._library_nodes == 0 or life_index < 0:
+            return
+        self._library_nodes -= 1
+        xs, us = list(self.xs_init), list(self.us_init)
+        tail_xs, tail_us = self._library.lookup(life_index, v, xs[-2], num_nodes=1)
+        xs[-1], us[-1] = tail_xs[-1], tail_us[-1]
+        self.xs_init, self.us_init = xs, us
 
     def get_results(self, window_size=None):
         self.xs_init = self.ddp.xs
@@ -117,6 +324,18 @@ class CrocOCP(OCPAbstract):
             self.t_ddp,
         )
 
+    def get_results_arrays(self, window_size=None, feedback_window=None):
+        xs, us = self.ddp.xs, self.ddp.us
+        self.xs_init = xs
+        self.us_init = us
+        if window_size is None:
+            window_size = len(us)
+        if feedback_window is None:
+            feedback_window = window_size
+        return self._result_arrays.fill(
+            self.current_gait, xs[: window_size + 1], us[:feedback_window], self.ddp.K
+        ) + (self.t_ddp,)
+
     def get_croco_forces(self):
         d = self.ddp.problem.runningDatas[0]
         cnames = d.differential.multibody.contacts.contacts.todict().keys()
@@ -0,0 +1,63 @@
+import numpy as np
+
+from quadruped_reactive_walking import Params
+from .ocp_crocoddyl import CrocOCPAbstract
+from ..ocp_defs.fixed_base import (
+    FixedBaseOCPBuilder,
+    lift_gains,
+    lift_state,
+    reduce_state,
+)
+
+
+class CrocFixedBaseOCP(CrocOCPAbstract):
+    """
+    Crocoddyl OCP of the robot with a fixed base (e.g. on a stand), on the joint
+    state only (24 instead of 37): the feet track the footstep targets.
+
+    The OCP takes and returns free-flyer states, so that it can be used in place of
+    the walking OCPs: the base velocity of x0 is ignored, and the predicted states
+    keep the base pose of the last x0, at rest. The feedback gains on the base are
+    zero and the gait has no foot in contact.
+    """
+
+    def __init__(self, params: Params, footsteps, base_refs):
+        super().__init__(params, FixedBaseOCPBuilder(params, footsteps))
+
+        # Base pose of the predicted states
+        self.base_pose = self.task.x0[:7].copy()
+        self.current_gait = np.zeros((params.N_gait + 1, 4), dtype=np.int32)
+
+    def get_type_str():
+        return "croc-fixed"
+
+    def push_node(self, k, x0, footsteps, base_vel_ref):
+        """
+        Move the horizon forward, the new node tracking footsteps (3, 4).
+
+        :param k: current MPC iteration
+        :param x0: initial condition (free-flyer state)
+        """
+        self.base_pose = np.array(x0[:7])
+        self.x0 = reduce_state(x0)
+        self.croc_problem.x0 = self.x0
+        if k == 0:
+            return
+
+        model = self._builder.stages.front_model
+        self._builder.update_model(model, footsteps)
+        self.circular_append(model)
+        self.cycle_warm_start()
+
+    def get_results(self, window_size=None):
+        self.xs_init = self.ddp.xs
+        self.us_init = self.ddp.us
+        if window_size is None:
+            window_size = len(self.ddp.us)
+        return (
+            self.current_gait,
+            [lift_state(x, self.base_pose) for x in self.ddp.xs[: window_size + 1]],
+            self.ddp.us[:window_size],
+            [lift_gains(K) for K in self.ddp.K[:window_size]],
+            self.t_ddp,
+        )
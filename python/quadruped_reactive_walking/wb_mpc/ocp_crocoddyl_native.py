@@ -0,0 +1,73 @@
+import numpy as np
+
+import quadruped_reactive_walking as qrw
+from quadruped_reactive_walking import Params
+from ..ocp_defs.walking import WalkingOCPBuilder
+from .ocp_abstract import OCPAbstract
+from .warm_start import WarmStartStore
+
+
+class CrocNativeOCP(qrw.CrocOCPNative, OCPAbstract):
+    """
+    Same OCP as CrocOCP, with push_node, solve and get_results implemented in C++.
+    The stages are still built by the WalkingOCPBuilder, then handed over to C++
+    together with the gait schedule.
+
+    The rest of the OCPAbstract interface comes from Python. ocp.time_budget and
+    ocp.rti are not supported: the solves always run the usual iterations, and their
+    statistics (residual, t_budget_left) are not computed. The time grid is always
+    uniform (ocp.time_grid_nodes is ignored).
+    """
+
+    def __init__(self, params: Params, footsteps, base_refs):
+        # The C++ OCP creates the datas of the stages it appends itself
+        builder = WalkingOCPBuilder(
+            params, footsteps, base_refs, reserve_life_datas=False
+        )
+        schedule = builder.schedule
+        qrw.CrocOCPNative.__init__(
+            self,
+            params,
+            builder.rmodel,
+            builder.problem,
+            builder.life_rm,
+            builder.end_rm,
+            [builder.foot_names[i] for i in builder.task.feet_ids],
+            schedule.phase,
+            schedule.model_index,
+            schedule.timeline,
+        )
+        self._init_python_state()
+        self._builder = builder
+        self.task = builder.task
+
+        # The constructor always initializes the warm start, replace it if possible
+        self._ws_store = WarmStartStore()
+        self._ws_key = self._ws_store.make_key(
+            params, CrocNativeOCP.get_type_str(), self.current_gait, base_refs[0]
+        )
+        T = self.problem.T
+        ws = self._ws_store.load(self._ws_key, (T + 1, self.task.nx), (T, self.task.nu))
+        if ws is not None:
+            self.xs_init = list(ws[0])
+            self.us_init = list(ws[1])
+
+    @property
+    def rmodel(self):
+        return self.task.model
+
+    def solve(self, k):
+        qrw.CrocOCPNative.solve(self, k)
+        if k == 0 and self.params.save_guess:
+            self._ws_store.save(self._ws_key, *self.get_horizon())
+
+    def circular_append(self, model):
+        raise NotImplementedError(
+            "The stages of the native OCP are appended in C++ by push_node."
+        )
+
+    def get_horizon(self):
+        return np.array(self.ddp.xs), np.array(self.ddp.us)
+
+    def get_type_str():
+        return "croc-native"
@@ -11,7 +11,9 @@ import numpy as np
 
 from abc import abstractclassmethod
 from colorama import Fore
+from .ocp_abstract import IterationBudget
 from .ocp_crocoddyl import CrocOCP
+from ..ocp_defs.common import StageRing
 from quadruped_reactive_walking import Params
 
 
@@ -19,11 +21,25 @@ def infNorm(x):
     return np.linalg.norm(x, ord=np.inf)
 
 
+class _AlgtrBudgetCallback(aligator.BaseCallback):
+    """Aligator callback calling an IterationBudget."""
+
+    def __init__(self, budget: IterationBudget):
+        super().__init__()
+        self.budget = budget
+
+    def call(self, workspace, results):
+        residual = max(results.primal_infeas, results.dual_infeas)
+        self.budget(residual, results.xs, results.us)
+
+
 class AlgtrOCPAbstract(CrocOCP):
     """Solve the OCP using aligator."""
 
     # Must be set by child class
     solver = None  # Solver instance
+    # The stages of the aligator problem are cycled
+    time_grid_support = False
 
     @abstractclassmethod
     def get_type_str():
@@ -41,9 +57,13 @@ class AlgtrOCPAbstract(CrocOCP):
             aligator.croc.convertCrocoddylProblem(self.croc_problem)
         )
 
+        if self.rti:
+            print(Fore.YELLOW + "RTI mode is only available for croc." + Fore.RESET)
+            self.rti = False
+        if params.ocp.time_grid_nodes > 0:
+            print(Fore.YELLOW + "Time grids are only available for croc." + Fore.RESET)
+
         self.num_threads = params.ocp.num_threads
-        if hasattr(self.croc_problem, "num_threads"):
-            self.croc_problem.num_threads = self.num_threads
         self.solver.setNumThreads(self.num_threads)
 
         self.verbose = aligator.QUIET
@@ -54,6 +74,21 @@ class AlgtrOCPAbstract(CrocOCP):
         self.solver.max_iters = self.max_iter
         self.solver.setup(self.algtr_problem)
 
+        # Stage wrappers of the crocoddyl models, and ring of the stage datas given to
+        # the workspace (those created by setup are unknown, hence None)
+        self._stage_models = {}
+        T = self.croc_problem.T
+        self._stage_ring = StageRing([None] * T, [None] * T)
+        # Iterate set as the result by solve_within_budget, if not the last one
+        self._restored = None
+
+    def _get_stage_model(self, action_model):
+        key = id(action_model)
+        if key not in self._stage_models:
+            sm = aligator.croc.ActionModelWrapper(action_model)
+            self._stage_models[key] = (action_model, sm)
+        return self._stage_models[key][1]
+
     def solve(self, k):
         t_start = time.time()
         self.algtr_problem.x0_init = self.x0
@@ -61,50 +96,100 @@ class AlgtrOCPAbstract(CrocOCP):
         t_update = time.time()
         self.t_update = t_update - t_start
 
-        self._check_ws_dim()
+        self._check_ws_dim(self.croc_problem.T)
+        self._restored = None
 
         t_warm_start = time.time()
         self.t_warm_start = t_warm_start - t_update
 
-        maxiter = self.max_iter if k > 0 else self.init_max_iters
-        self.solver.max_iters = maxiter
-        self.solver.run(self.algtr_problem, self.xs_init, self.us_init)
-        # compute aligator's criteria
-        res = self.solver.results
+        if k > 0 and self.params.ocp.time_budget > 0:
+            self.solve_within_budget(
+                self._algtr_run, self.params.ocp.tol, self._algtr_restore
+            )
+        else:
+            maxiter = self.max_iter if k > 0 else self.init_max_iters
+            self.solver.max_iters = maxiter
+            self.solver.run(self.algtr_problem, self.xs_init, self.us_init)
+            # compute aligator's criteria
+            res = self.solver.results
+            self.num_iters = res.num_iters
+            self.residual = max(res.primal_infeas, res.dual_infeas)
 
         t_ddp = time.time()
         self.t_ddp = t_ddp - t_warm_start
 
         self.t_solve = time.time() - t_start
-        self.num_iters = res.num_iters
+        if k == 0 and self.params.save_guess:
+            self.save_warm_start()
+
+    def _algtr_run(self, budget: IterationBudget):
+        self.solver.max_iters = IterationBudget.MAX_ITERS
+        self.solver.registerCallback("budget", _AlgtrBudgetCallback(budget))
+        try:
+            self.solver.run(self.algtr_problem, self.xs_init, self.us_init)
+        finally:
+            self.solver.removeCallback("budget")
+            self.solver.max_iters = self.max_iter
+
+    def _algtr_restore(self, xs, us):
+        self._restored = (xs, us)
+
+    def _trajectory(self):
+        """Result trajectory (xs, us) of the last solve."""
+        if self._restored is not None:
+            return self._restored
+        res = self.solver.results
+        return res.xs, res.us
 
     def circular_append(self, action_model: crocoddyl.ActionModelAbstract):
-        d = action_model.createData()
-        self.croc_problem.circularAppend(action_model, d)
+        super().circular_append(action_model)
 
-        sm = aligator.croc.ActionModelWrapper(action_model)
+        sm = self._get_stage_model(action_model)
         self.algtr_problem.replaceStageCircular(sm)
         ws = self.solver.workspace
-        ws.cycleAppend(sm.createData())
+        ws.cycleAppend(self._stage_ring.cycle(sm, lambda model: model.createData()))
 
     def get_results(self, window_size=None):
         res = self.solver.results
-        self.xs_init = res.xs
-        self.us_init = res.us
+        xs, us = self._trajectory()
+        self.xs_init = xs
+        self.us_init = us
         if window_size is None:
-            window_size = len(res.us)
+            window_size = len(us)
         feedbacks = res.controlFeedbacks()[:window_size]
         # flip sign because controller expects Crocoddyl's convention
         feedbacks = [-K.copy() for K in feedbacks]
 
         return (
             self.current_gait.copy(),
-            res.xs[: window_size + 1],
-            res.us[:window_size],
+            xs[: window_size + 1],
+            us[:window_size],
             feedbacks,
             self.t_ddp,
         )
 
+    def get_results_arrays(self, window_size=None, feedback_window=None):
+        res = self.solver.results
+        xs, us = self._trajectory()
+        self.xs_init = xs
+        self.us_init = us
+        if window_size is None:
+            window_size = len(us)
+        if feedback_window is None:
+            feedback_window = window_size
+        # the sign of the feedbacks is flipped while copying them
+        return self._result_arrays.fill(
+            self.current_gait,
+            xs[: window_size + 1],
+            us[:feedback_window],
+            res.controlFeedbacks(),
+            flip_K=True,
+        ) + (self.t_ddp,)
+
+    def get_horizon(self):
+        xs, us = self._trajectory()
+        return np.array(xs), np.array(us)
+
 
 class AlgtrOCPFDDP(AlgtrOCPAbstract):
     """Solve the OCP using fddp."""
@@ -21,14 +21,20 @@ class TaskSpecBase:
 
         self.frozen_names = frozen_names
         self.frozen_idxs = [self.model.getJointId(id) for id in frozen_names]
+        # the free-flyer is not actuated
+        nu_frozen = sum(
+            [
+                self.model.joints[jid].nv
+                for name, jid in zip(frozen_names, self.frozen_idxs)
+                if name != "root_joint"
+            ]
+        )
         self.freeze()
-        nu_frozen = sum([self.model.joints[jid].nv for jid in self.frozen_idxs])
 
         self.nq = self.model.nq
         self.nv = self.model.nv
         self.nx = self.nq + self.nv
         self.ndx = 2 * self.nv
-        # -1 to take into account the freeflyer
         self.nu = 12 - nu_frozen
         if len(frozen_names) == 0:
             assert self.nu == 12
@@ -110,20 +116,24 @@ class TaskSpecFull(TaskSpecBase):
 
         self.useFixedBase = 1
 
+        task_pms = params.task["fixed_base"]
+
         # Cost function weights
-        self.mu = params.task["mu"]
-        self.foot_tracking_w = 1e4
-        self.friction_cone_w = 1e3
-        self.control_bound_w = 1e3
-        self.control_reg_w = 1e0
+        self.foot_tracking_w = task_pms["foot_tracking_w"]
+        self.control_bound_w = task_pms["control_bound_w"]
+        self.control_reg_w = task_pms["control_reg_w"]
         self.state_reg_w = np.array(
             [1e2] * 3 + [1e-2] * 3 + [1e2] * 6 + [1e1] * 3 + [1e0] * 3 + [1e1] * 6
         )
-        self.terminal_velocity_w = np.array([0] * 12 + [1e3] * 12)
+        self.terminal_velocity_w = np.zeros(2 * self.nv)
+        self.terminal_velocity_w[self.nv :] = task_pms["terminal_velocity_w"]
 
         self.q0_reduced = self.q0[7:]
         self.v0_reduced = np.zeros(self.nv)
         self.x0_reduced = np.concatenate([self.q0_reduced, self.v0_reduced])
 
         self.xref = self.x0_reduced
-        self.uref = self.u0
+        # gravity compensation of the legs in the reference configuration
+        self.uref = pin.computeGeneralizedGravity(
+            self.model, self.rdata, self.q0_reduced
+        ).copy()
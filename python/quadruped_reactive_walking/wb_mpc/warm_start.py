@@ -0,0 +1,178 @@
+"""
+Storage of converged OCP solutions, reused as warm starts by the next runs.
+
+Each entry is a set of .npy files (e.g. xs and us, stacked in float64 arrays), named
+after a key hashing everything the solution depends on: the walk and OCP parameters,
+the solver type, the initial gait and the initial velocity reference. The files are
+memory-mapped when loaded.
+"""
+import hashlib
+import os
+import numpy as np
+
+from ..tools.utils import CACHE_DIRNAME
+
+
+class WarmStartStore:
+    def __init__(self, dirname=CACHE_DIRNAME / "warm_starts"):
+        self.dirname = dirname
+
+    @staticmethod
+    def make_key(params, type_str, *data):
+        """
+        Key of an entry computed for the given parameters and OCP type (see
+        get_type_str), e.g. with data the initial gait and base velocity reference
+        (Motion or 6-vector) for the warm start of the first solve.
+        """
+        content = (
+            type_str,
+            params.dt_mpc,
+            params.N_gait,
+            params.h_ref,
+            params.starting_nodes,
+            params.ending_nodes,
+            params.gait_repetitions,
+            params.ocp.tol,
+            np.asarray(params.q_init).tolist(),
+            np.asarray(params.gait).tolist(),
+            repr(params.task),
+        ) + tuple(np.asarray(getattr(d, "vector", d)).tolist() for d in data)
+        return hashlib.sha1(repr(content).encode()).hexdigest()[:16]
+
+    def _path(self, key, name):
+        return self.dirname / "{}.{}.npy".format(key, name)
+
+    def load_arrays(self, key, names):
+        """
+        Return the arrays of the entry as a dict of read-only memory maps, or None if
+        one of them is missing.
+        """
+        paths = {name: self._path(key, name) for name in names}
+        if not all(path.exists() for path in paths.values()):
+            return None
+        return {name: np.load(path, mmap_mode="r") for name, path in paths.items()}
+
+    def save_arrays(self, key, **arrays):
+        """
+        Store the arrays of an entry. The files are replaced atomically, so that
+        concurrent runs never read a partially written entry.
+        """
+        self.dirname.mkdir(parents=True, exist_ok=True)
+        for name, arr in arrays.items():
+            path = self._path(key, name)
+            tmp_path = path.with_suffix(".tmp.npy")
+            np.save(tmp_path, np.asarray(arr, dtype=np.float64))
+            os.replace(tmp_path, path)
+
+    def load(self, key, xs_shape, us_shape):
+        """
+        Return the stored (xs, us) arrays, or None if there is no entry for this key or
+        if it does not have the expected shapes.
+        """
+        arrays = self.load_arrays(key, ("xs", "us"))
+        if arrays is None:
+            return None
+        xs, us = arrays["xs"], arrays["us"]
+        if xs.shape != tuple(xs_shape) or us.shape != tuple(us_shape):
+            return None
+        return xs, us
+
+    def save(self, key, xs, us):
+        """Store the trajectory (xs, us)."""
+        self.save_arrays(key, xs=xs, us=us)
+
+
+def move_base(xs, x0):
+    """
+    Copy of the trajectory xs of a free-flyer robot, moved on the ground (translation
+    along x and y, rotation around z) so that its first base placement matches the one
+    of x0. The velocities, expressed in the base frame, are left untouched.
+    """
+    xs = np.array(xs)
+    pos, quat = xs[:, :3], xs[:, 3:7]
+
+    def yaw(q):
+        x, y, z, w = q
+        return np.arctan2(2 * (w * z + x * y), 1 - 2 * (y * y + z * z))
+
+    dyaw = yaw(x0[3:7]) - yaw(quat[0])
+    c, s = np.cos(dyaw), np.sin(dyaw)
+    dxy = pos[:, :2] - pos[0, :2]
+    pos[:, 0], pos[:, 1] = (
+        x0[0] + c * dxy[:, 0] - s * dxy[:, 1],
+        x0[1] + s * dxy[:, 0] + c * dxy[:, 1],
+    )
+
+    # quat = Rz(dyaw) * quat, quaternions stored as (x, y, z, w)
+    cz, sz = np.cos(dyaw / 2), np.sin(dyaw / 2)
+    x, y, z, w = quat.T.copy()
+    quat[:, 0] = cz * x - sz * y
+    quat[:, 1] = cz * y + sz * x
+    quat[:, 2] = cz * z + sz * w
+    quat[:, 3] = cz * w - sz * z
+    return xs
+
+
+class WarmStartLibrary:
+    """
+    Converged trajectories of the walking OCP for a grid of constant base velocity
+    references, one for each row of the life gait: xs (V, L, T+1, nx) and us (V, L, T,
+    nu) for V velocities (V, 6) and a life gait of L rows. Entry (i, j) is the horizon
+    once a node using row j of the life gait has been pushed, at velocity i.
+
+    Built by examples/build_warm_start_library.py.
+    """
+
+    def __init__(self, velocities, xs, us):
+        self.velocities = velocities
+        self.xs = xs
+        self.us = us
+
+    @staticmethod
+    def make_key(params, type_str):
+        """
+        Key of the library built with the OCP type_str (see get_type_str). The
+        footstep targets, tracked when task.walk.foot_tracking_w > 0, depend on the
+        movement.
+        """
+        return WarmStartStore.make_key(params, "library", type_str, params.movement)
+
+    @classmethod
+    def load(cls, params, type_str, store=None):
+        """Library built for these parameters and OCP type, or None if there is none."""
+        store = store or WarmStartStore()
+        arrays = store.load_arrays(
+            WarmStartLibrary.make_key(params, type_str), ("velocities", "xs", "us")
+        )
+        if arrays is None:
+            return None
+        return cls(arrays["velocities"], arrays["xs"], arrays["us"])
+
+    def save(self, params, type_str, store=None):
+        store = store or WarmStartStore()
+        store.save_arrays(
+            WarmStartLibrary.make_key(params, type_str),
+            velocities=self.velocities,
+            xs=self.xs,
+            us=self.us,
+        )
+
+    def nearest(self, base_vel_ref):
+        """Index of the velocity of the library closest to base_vel_ref."""
+        v = np.asarray(getattr(base_vel_ref, "vector", base_vel_ref))
+        return int(np.argmin(np.linalg.norm(self.velocities - v, axis=1)))
+
+    def lookup(self, life_index, base_vel_ref, x0, num_nodes=None):
+        """
+        Warm start (xs, us), as lists of vectors, for the horizon once a node using row
+        life_index of the life gait has been pushed: the trajectory of the nearest
+        velocity, moved to the base placement of x0.
+
+        If num_nodes is given, only the last num_nodes nodes of the trajectory are
+        returned (num_nodes + 1 states), the first of them moved to x0.
+        """
+        i = self.nearest(base_vel_ref)
+        xs, us = self.xs[i, life_index], self.us[i, life_index]
+        if num_nodes is not None:
+            xs, us = xs[len(xs) - num_nodes - 1 :], us[len(us) - num_nodes :]
+        return list(move_base(xs, x0)), list(np.array(us))
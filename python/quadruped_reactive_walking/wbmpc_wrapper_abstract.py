@@ -29,6 +29,18 @@ class MPCWrapperAbstract(IMPCWrapper, metaclass=_MPCMeta):
     def nu(self):
         return self.pd.nu
 
+    @property
+    def FEEDBACK_WINDOW(self):
+        return self.params.feedback_window
+
+    def get_latest_horizon(self):
+        """
+        Return (k, xs, us), the whole trajectory predicted by the MPC at iteration k,
+        if one was published since the last call (every params.horizon_log_period
+        results), otherwise None.
+        """
+        return None
+
     @abc.abstractclassmethod
     def stop_parallel_loop(self):
         pass
@@ -1,16 +1,26 @@
 try:
-    from multiprocess import Process, Value, Lock
+    from multiprocess import Process, Value, Lock, Event
     from multiprocess.managers import SharedMemoryManager
 except ImportError:
-    from multiprocessing import Process, Value, Lock
+    from multiprocessing import Process, Value, Lock, Event
     from multiprocessing.managers import SharedMemoryManager
 
 
+import time
 import numpy as np
 import pinocchio as pin
 
+from colorama import Fore
+
 from .wb_mpc.ocp_abstract import OCPAbstract
 from .tools.utils import create_shared_ndarray
+from .tools.realtime import (
+    set_cpu_affinity,
+    set_realtime_priority,
+    pin_new_threads,
+    get_thread_ids,
+    placement_report,
+)
 
 from typing import Type
 
@@ -21,48 +31,144 @@ from quadruped_reactive_walking import Params, MPCResult
 class MultiprocessMPCWrapper(MPCWrapperAbstract):
     """
     Wrapper to run both types of MPC (OQSP or Crocoddyl) asynchronously in a new process
+
+    The solver process sleeps on an event between two requests instead of polling
+    the shared memory, so that it does not burn a core while waiting.
+
+    Results are exchanged through a lock-free double buffer: the solver never waits
+    for the control loop and the control loop never waits for the solver.
+
+    The worker builds the OCP and runs the initial solve as soon as it is started; the
+    constructor blocks until it is ready so that the control loop does not pay for it.
+
+    Requests that come while the worker is still busy are handled according to
+    params.ocp.overrun_policy:
+        - skip: the request is dropped and the worker finishes its current solve.
+        - queue_latest: the request replaces any pending one and is solved next.
+        - shrink_iters: like queue_latest, and the worker lowers max_iter after each
+            solve that misses its deadline (dt_mpc) until it fits in the budget again.
     """
 
+    OVERRUN_POLICIES = ("skip", "queue_latest", "shrink_iters")
+
+    # Timeout (in seconds) after which the sleeping worker checks whether it should stop
+    WAKEUP_TIMEOUT = 0.1
+    # Number of output buffers the worker alternates between
+    NUM_RESULT_SLOTS = 2
+    # Number of attempts to read a consistent result before giving up for this tick
+    MAX_READ_RETRIES = 4
+
     def __init__(
-        self, params: Params, footsteps, base_refs, solver_cls: Type[OCPAbstract]
+        self,
+        params: Params,
+        footsteps,
+        base_refs,
+        solver_cls: Type[OCPAbstract],
+        cpu_affinity=None,
     ):
+        """
+        :param cpu_affinity: cores of the worker process, defaults to
+            params.ocp.cpu_affinity_mpc
+        """
         super().__init__(params)
         self.solver_cls = solver_cls
+        if cpu_affinity is None:
+            cpu_affinity = params.ocp.cpu_affinity_mpc
+        self.cpu_affinity = cpu_affinity
+
+        self.overrun_policy = params.ocp.overrun_policy
+        if self.overrun_policy not in self.OVERRUN_POLICIES:
+            raise ValueError(
+                "Unknown overrun policy '{}', expected one of {}".format(
+                    self.overrun_policy, self.OVERRUN_POLICIES
+                )
+            )
+        self.deadline = params.dt_mpc
 
         self.footsteps_plan = footsteps
         self.base_refs = base_refs
 
         self.last_available_result: MPCResult = MPCResult(
-            self.N_gait, self.nx, self.nu, self.ndx, self.WINDOW_SIZE
+            self.N_gait,
+            self.nx,
+            self.nu,
+            self.ndx,
+            self.WINDOW_SIZE,
+            self.FEEDBACK_WINDOW,
         )
 
         # Shared memory used for multiprocessing
         self.smm = SharedMemoryManager()
         self.smm.start()
 
-        self.new_data = Value("b", False)
+        self.new_data = Event()
+        self.ready = Event()
         self.running = Value("b", True)
+        self.busy = Value("b", False, lock=False)
         self.in_k = Value("i", 0, lock=False)
+        self.in_t_request = Value("d", 0.0, lock=False)
         self.in_warm_start = Value("b", False, lock=False)
-        self.out_num_iters = Value("i", 0, lock=False)
-        self.out_solving_time = Value("d", 0.0, lock=False)
-        self.new_result = Value("b", False)
+        # Number of the last published result (0 if nothing was published yet)
+        self.out_seq = Value("q", 0, lock=False)
+        self._last_read_seq = 0
+        # Delay between the request and the worker waking up, for the last result
+        self.wakeup_latency = 0.0
+        # Iteration of the request the last result answers
+        self.last_result_k = 0
+        self.num_requests = 0
+        self.num_dropped = 0
+        self.out_startup_time = Value("d", 0.0, lock=False)
+        self.startup_time = 0.0
 
         self._shms = set()
         self.mutex = Lock()
 
         self.x0_shared = self.create_shared_ndarray(self.nx)
-        self.gait_shared = self.create_shared_ndarray((self.N_gait + 1, 4), np.int32)
-        self.xs_shared = self.create_shared_ndarray((self.WINDOW_SIZE + 1, self.nx))
-        self.us_shared = self.create_shared_ndarray((self.WINDOW_SIZE, self.nu))
-        self.Ks_shared = self.create_shared_ndarray(
-            (self.WINDOW_SIZE, self.nu, self.ndx)
-        )
         self.footstep_shared = self.create_shared_ndarray((3, 4))
         self.base_ref_shared = self.create_shared_ndarray(6)
 
+        # Output slots, see _put_shared_data_out
+        n_slots = self.NUM_RESULT_SLOTS
+        self.slot_seq = self.create_shared_ndarray(n_slots, np.int64)
+        self.gait_shared = self.create_shared_ndarray(
+            (n_slots, self.N_gait + 1, 4), np.int32
+        )
+        self.xs_shared = self.create_shared_ndarray(
+            (n_slots, self.WINDOW_SIZE + 1, self.nx)
+        )
+        self.us_shared = self.create_shared_ndarray(
+            (n_slots, self.FEEDBACK_WINDOW, self.nu)
+        )
+        self.Ks_shared = self.create_shared_ndarray(
+            (n_slots, self.FEEDBACK_WINDOW, self.nu, self.ndx)
+        )
+        # k, num_iters, solving_time, wakeup_latency
+        self.info_shared = self.create_shared_ndarray((n_slots, 4))
+        # num_solves, num_overruns (written by the worker only)
+        self.stats_shared = self.create_shared_ndarray(2, np.int64)
+        # Copy of a slot, kept only if the slot was not overwritten during the copy
+        self._slot_copy = [
+            np.empty_like(shared[0])
+            for shared in (
+                self.gait_shared,
+                self.xs_shared,
+                self.us_shared,
+                self.Ks_shared,
+            )
+        ]
+
+        # Whole horizon, published every params.horizon_log_period results
+        self.horizon_seq = Value("q", 0, lock=False)
+        self._last_horizon_seq = 0
+        if params.horizon_log_period:
+            self.horizon_k_shared = self.create_shared_ndarray(1, np.int64)
+            T = solver_cls.get_num_nodes(params)
+            self.horizon_xs_shared = self.create_shared_ndarray((T + 1, self.nx))
+            self.horizon_us_shared = self.create_shared_ndarray((T, self.nu))
+
         self.p = Process(target=self._mpc_asynchronous)
         self.p.start()
+        self._wait_until_ready()
 
     def create_shared_ndarray(self, shape, dtype=np.float64):
         """Use current smm to create a shared array."""
@@ -73,9 +179,24 @@ class MultiprocessMPCWrapper(MPCWrapperAbstract):
         self._shms.add(shm)
         return create_shared_ndarray(shape, dtype, shm)
 
+    @property
+    def num_solves(self):
+        return int(self.stats_shared[0])
+
+    @property
+    def num_overruns(self):
+        return int(self.stats_shared[1])
+
     def solve(self, k, x0, footstep, base_vel_ref: pin.Motion):
+        self.num_requests += 1
+        if self.busy.value and self.overrun_policy == "skip":
+            self.num_dropped += 1
+            return
+        if self.new_data.is_set():
+            # The previous request has not been picked up by the worker yet
+            self.num_dropped += 1
         self._put_shared_data_in(k, x0, footstep, base_vel_ref.np)
-        self.new_data.value = True
+        self.new_data.set()
 
     def get_latest_result(self):
         """
@@ -84,20 +205,9 @@ class MultiprocessMPCWrapper(MPCWrapperAbstract):
         If a new result is available, return the new result.
         Otherwise return the old result again.
         """
-        if self.new_result.value:
-            (
-                self.last_available_result.gait[:, :],
-                self.last_available_result.xs,
-                self.last_available_result.us,
-                self.last_available_result.K,
-                self.last_available_result.solving_duration,
-                self.last_available_result.num_iters,
-            ) = self._get_shared_data_out()
-
-            self.last_available_result.new_result = True
-            self.new_result.value = False
-        else:
-            self.last_available_result.new_result = False
+        self.last_available_result.new_result = False
+        if self.out_seq.value != self._last_read_seq:
+            self._get_shared_data_out()
 
         return self.last_available_result
 
@@ -105,29 +215,110 @@ class MultiprocessMPCWrapper(MPCWrapperAbstract):
         """
         Parallel process with an infinite loop that run the asynchronous MPC
         """
+        loop_ocp = self._build_solver()
+
         # Thread-local data
         x0 = np.zeros_like(self.x0_shared)
         footstep = np.zeros_like(self.footstep_shared)
         base_ref = np.zeros_like(self.base_ref_shared)
-        while self.running.value:
-            if not self.new_data.value:
-                continue
-
-            self.new_data.value = False
-
+        while self._wait_for_request():
             with self.mutex:
                 k, x0[:], footstep[:], base_ref[:] = self._get_shared_data_in()
-
-            if k == 0:
-                loop_ocp = self.solver_cls(
-                    self.params, self.footsteps_plan, self.base_refs
-                )
+                t_request = self.in_t_request.value
+            wakeup_latency = time.time() - t_request
 
             loop_ocp.push_node(k, x0, footstep, base_ref)
             loop_ocp.solve(k)
-            gait, xs, us, K, solving_time = loop_ocp.get_results(self.WINDOW_SIZE)
-            self._put_shared_data_out(gait, xs, us, K, loop_ocp.num_iters, solving_time)
-            self.new_result.value = True
+            gait, xs, us, K, solving_time = loop_ocp.get_results_arrays(
+                self.WINDOW_SIZE, self.FEEDBACK_WINDOW
+            )
+            self._put_shared_data_out(
+                k, gait, xs, us, K, loop_ocp.num_iters, solving_time, wakeup_latency
+            )
+            overrun = self._account_solve(k, t_request)
+            period = self.params.horizon_log_period
+            if period and self.num_solves % period == 0:
+                self._put_shared_horizon(k, *loop_ocp.get_horizon())
+            if self.overrun_policy == "shrink_iters":
+                self._adapt_max_iter(loop_ocp, overrun, time.time() - t_request)
+            loop_ocp.prepare(k)
+
+    def _build_solver(self):
+        """
+        Build the OCP in the worker process and run the initial solve (with
+        init_max_iters) from the default state, so that the solution is already
+        converged when the first request comes in.
+        The process is placed on its cores before, and the solver thread pool (spawned
+        by the first solve) after.
+        """
+        t_start = time.time()
+        ocp_params = self.params.ocp
+        set_cpu_affinity(self.cpu_affinity)
+        set_realtime_priority(ocp_params.rt_priority_mpc)
+
+        known_tids = set(get_thread_ids())
+        ocp = self.solver_cls(self.params, self.footsteps_plan, self.base_refs)
+        ocp.push_node(0, self.pd.x0, self.footsteps_plan[0], self.base_refs[0])
+        ocp.solve(0)
+        ocp.get_results_arrays(self.WINDOW_SIZE, self.FEEDBACK_WINDOW)
+
+        pin_new_threads(ocp_params.cpu_affinity_solver_threads, known_tids)
+        print(placement_report("MPC worker"))
+        self._signal_ready(time.time() - t_start)
+        return ocp
+
+    def _signal_ready(self, startup_time):
+        """Notify the parent process that the worker can take requests."""
+        self.out_startup_time.value = startup_time
+        self.ready.set()
+
+    def _wait_until_ready(self):
+        """Block until the worker has signaled it is ready, and report the startup time."""
+        while not self.ready.wait(self.WAKEUP_TIMEOUT):
+            if not self.p.is_alive():
+                raise RuntimeError("MPC worker process died during initialization.")
+        self.startup_time = self.out_startup_time.value
+        print(
+            Fore.CYAN
+            + "MPC worker ready (startup time: {:.3f} s)".format(self.startup_time)
+            + Fore.RESET
+        )
+
+    def _wait_for_request(self):
+        """
+        Sleep until the controller posts a new request, and mark the worker as busy.
+        Return False if the loop has been stopped in the meantime.
+        """
+        self.busy.value = False
+        while self.running.value:
+            if self.new_data.wait(self.WAKEUP_TIMEOUT):
+                self.busy.value = True
+                self.new_data.clear()
+                return bool(self.running.value)
+        return False
+
+    def _account_solve(self, k, t_request):
+        """
+        Count a finished solve, and whether it missed its deadline (the result of
+        request k is expected before request k + mpc_wbc_ratio comes in).
+        The initial request (k = 0) is not subject to the deadline.
+        Return True if the solve overran.
+        """
+        overrun = k > 0 and time.time() - t_request > self.deadline
+        self.stats_shared[0] += 1
+        if overrun:
+            self.stats_shared[1] += 1
+        return overrun
+
+    def _adapt_max_iter(self, ocp, overrun, elapsed):
+        """
+        Lower the iteration budget of the solver after an overrun, and raise it back
+        towards params.ocp.max_iter when the solves take less than half the deadline.
+        """
+        if overrun and ocp.max_iter > 1:
+            ocp.max_iter -= 1
+        elif elapsed < 0.5 * self.deadline and ocp.max_iter < self.params.ocp.max_iter:
+            ocp.max_iter += 1
 
     def _put_shared_data_in(self, k, x0, footstep, base_ref):
         """
@@ -135,6 +326,7 @@ class MultiprocessMPCWrapper(MPCWrapperAbstract):
         """
         with self.mutex:
             self.in_k.value = k
+            self.in_t_request.value = time.time()
             self.x0_shared[:] = x0
             self.footstep_shared[:] = footstep
             self.base_ref_shared[:] = base_ref
@@ -149,27 +341,84 @@ class MultiprocessMPCWrapper(MPCWrapperAbstract):
         base_ref = self.base_ref_shared
         return k, x0, footstep, base_ref
 
-    def _put_shared_data_out(self, gait, xs, us, K, num_iters, solving_time):
-        """Put data in shared memory (output of the asynchronous MPC to be retrieved)."""
+    def _put_shared_data_out(
+        self, k, gait, xs, us, K, num_iters, solving_time, wakeup_latency=0.0
+    ):
+        """
+        Put data in shared memory (output of the asynchronous MPC to be retrieved).
+
+        Result number n is written in slot n % NUM_RESULT_SLOTS. The sequence number of
+        the slot is odd while it is being written, and set to 2n once the data is in
+        place; only then is n published in out_seq.
+        """
+        n = self.out_seq.value + 1
+        slot = n % self.NUM_RESULT_SLOTS
+        self.slot_seq[slot] = 2 * n - 1
+
+        self.gait_shared[slot] = gait
+        self.xs_shared[slot] = xs
+        self.us_shared[slot] = us
+        self.Ks_shared[slot] = K
+        self.info_shared[slot] = k, num_iters, solving_time, wakeup_latency
 
+        self.slot_seq[slot] = 2 * n
+        self.out_seq.value = n
+
+    def _put_shared_horizon(self, k, xs, us):
+        """Put the whole predicted trajectory in shared memory, for the logger."""
+        with self.mutex:
+            self.horizon_k_shared[0] = k
+            self.horizon_xs_shared[:] = xs
+            self.horizon_us_shared[:] = us
+            self.horizon_seq.value += 1
+
+    def get_latest_horizon(self):
+        if self.horizon_seq.value == self._last_horizon_seq:
+            return None
         with self.mutex:
-            self.gait_shared[:] = gait
-            self.xs_shared[:] = np.stack(xs)
-            self.us_shared[:] = np.stack(us)
-            self.Ks_shared[:] = np.stack(K)
-            self.out_num_iters = num_iters
-            self.out_solving_time.value = solving_time
+            self._last_horizon_seq = self.horizon_seq.value
+            return (
+                int(self.horizon_k_shared[0]),
+                self.horizon_xs_shared.copy(),
+                self.horizon_us_shared.copy(),
+            )
 
     def _get_shared_data_out(self):
-        """Retrieve the MPC output data from the shared memory buffers."""
-        gait = self.gait_shared
-        xs = list(self.xs_shared)
-        us = list(self.us_shared)
-        K = list(self.Ks_shared)
-        num_iters = self.out_num_iters.value
-        solving_time = self.out_solving_time.value
+        """
+        Copy the latest MPC output from the shared memory buffers into
+        last_available_result.
+        The slot is first copied aside: the copy is discarded and retried if the solver
+        has started overwriting the slot in the meantime (this requires the solver to
+        publish twice during the copy), and last_available_result is left unchanged if
+        all the retries fail.
+        """
+        res = self.last_available_result
+        for _ in range(self.MAX_READ_RETRIES):
+            n = self.out_seq.value
+            slot = n % self.NUM_RESULT_SLOTS
+            seq = self.slot_seq[slot]
+            if seq != 2 * n:
+                continue
 
-        return gait, xs, us, K, solving_time, num_iters
+            gait, xs, us, K = self._slot_copy
+            gait[:] = self.gait_shared[slot]
+            xs[:] = self.xs_shared[slot]
+            us[:] = self.us_shared[slot]
+            K[:] = self.Ks_shared[slot]
+            k, num_iters, solving_time, wakeup_latency = self.info_shared[slot]
+
+            if self.slot_seq[slot] == seq:
+                res.gait = gait
+                res.xs_array = xs
+                res.us_array = us
+                res.K_array = K
+                self.last_result_k = int(k)
+                res.num_iters = int(num_iters)
+                res.solving_duration = solving_time
+                res.new_result = True
+                self.wakeup_latency = wakeup_latency
+                self._last_read_seq = n
+                return
 
     def stop_parallel_loop(self):
         """
@@ -177,5 +426,17 @@ class MultiprocessMPCWrapper(MPCWrapperAbstract):
         """
 
         self.running.value = False
+        self.new_data.set()
         self.p.join()
+        print(
+            Fore.CYAN
+            + "MPC scheduling ({}): {} requests, {} solves, {} dropped, {} overruns".format(
+                self.overrun_policy,
+                self.num_requests,
+                self.num_solves,
+                self.num_dropped,
+                self.num_overruns,
+            )
+            + Fore.RESET
+        )
         self.smm.shutdown()
@@ -7,16 +7,20 @@ from .wb_mpc.task_spec import TaskSpec
 from .wbmpc_wrapper_abstract import MPCWrapperAbstract, MPCResult
 
 from typing import Type
-from threading import Lock
+from threading import Lock, Thread
+import time
 import numpy as np
 import pinocchio as pin
 
 import rospy
+from quadruped_reactive_walking.msg import MPCStreamRequest, MPCStreamResult
 from quadruped_reactive_walking.srv import (
     MPCInit,
     MPCInitResponse,
     MPCSolve,
     MPCSolveResponse,
+    MPCSolveBinary,
+    MPCSolveBinaryResponse,
     MPCStop,
     MPCStopResponse,
 )
@@ -24,14 +28,24 @@ from .tools.ros_tools import (
     numpy_to_multiarray_float64,
     multiarray_to_numpy_float64,
     listof_numpy_to_multiarray_float64,
-    multiarray_to_listof_numpy_float64,
     AsyncServiceProxy,
 )
+from .tools.serialization import pack_arrays, unpack_arrays
+
+TRANSPORTS = ("multiarray", "binary", "stream")
 
 
 class ROSMPCWrapperClient(MPCWrapperAbstract):
     """
     Wrapper to run both types of MPC (OQSP or Crocoddyl) on a seperate node/machine using ROS as communication interface.
+
+    Depending on params.ros_transport, the solve requests and results are encoded as
+    Float64MultiArray (multiarray) or as a single packed byte payload (binary), which
+    avoids the conversions to and from Python lists.
+
+    With the stream transport, requests and results tagged with k are exchanged on
+    topics with latest-only queues instead of a service: solve never waits for the
+    network, and stale requests and results are dropped.
     """
 
     def __init__(
@@ -44,11 +58,27 @@ class ROSMPCWrapperClient(MPCWrapperAbstract):
     ):
         super().__init__(params)
         self.synchronous = synchronous
+        self.transport = params.ros_transport
+        if self.transport not in TRANSPORTS:
+            raise ValueError(
+                "Unknown ROS transport '{}', expected one of {}".format(
+                    self.transport, TRANSPORTS
+                )
+            )
+        if self.transport == "stream" and synchronous:
+            raise ValueError("The stream ROS transport requires asynchronous_mpc.")
 
         self._result_lock = Lock()
         self.new_result: bool = False
+        # Iteration of the request the last result answers
+        self.last_result_k = 0
         self.last_available_result: MPCResult = MPCResult(
-            params.N_gait, self.pd.nx, self.pd.nu, self.pd.ndx, self.WINDOW_SIZE
+            params.N_gait,
+            self.pd.nx,
+            self.pd.nu,
+            self.pd.ndx,
+            self.WINDOW_SIZE,
+            self.FEEDBACK_WINDOW,
         )
 
         base_refs_multiarray = listof_numpy_to_multiarray_float64(base_refs)
@@ -63,53 +93,119 @@ class ROSMPCWrapperClient(MPCWrapperAbstract):
         )
         assert res.success, "Error while initializing mpc on server"
 
+        if self.transport == "binary":
+            solve_srv_name, solve_srv_type = "qrw_wbmpc/solve_binary", MPCSolveBinary
+        else:
+            solve_srv_name, solve_srv_type = "qrw_wbmpc/solve", MPCSolve
+
         self.solve_solver_srv = None
-        if self.synchronous:
+        if self.transport == "stream":
+            self._request_pub = rospy.Publisher(
+                "qrw_wbmpc/request", MPCStreamRequest, queue_size=1
+            )
+            self._result_sub = rospy.Subscriber(
+                "qrw_wbmpc/result", MPCStreamResult, self._parse_result, queue_size=1
+            )
+            self._wait_for_stream_connections()
+        elif self.synchronous:
             self.solve_solver_srv = rospy.ServiceProxy(
-                "qrw_wbmpc/solve", MPCSolve, persistent=True
+                solve_srv_name, solve_srv_type, persistent=True
             )
         else:
             self.solve_solver_srv = AsyncServiceProxy(
-                "qrw_wbmpc/solve", MPCSolve, callback=self._result_cb, persistent=True
+                solve_srv_name,
+                solve_srv_type,
+                callback=self._result_cb,
+                persistent=True,
             )
 
+    def _wait_for_stream_connections(self, timeout=10.0):
+        """
+        Wait until the server is connected to both stream topics. The messages
+        published on a new topic before its subscriber connects are dropped, and the
+        first request (k = 0, solved with init_max_iters) must reach the server.
+        """
+        deadline = time.time() + timeout
+        while (
+            self._request_pub.get_num_connections() == 0
+            or self._result_sub.get_num_connections() == 0
+        ):
+            if rospy.is_shutdown() or time.time() > deadline:
+                raise RuntimeError(
+                    "The MPC server did not connect to the stream topics within "
+                    "{} s".format(timeout)
+                )
+            rospy.sleep(0.01)
+
     def solve(self, k, x0, footstep, base_ref):
-        res = self.solve_solver_srv(
-            k=k,
-            x0=numpy_to_multiarray_float64(x0),
-            footstep=numpy_to_multiarray_float64(footstep),
-            base_ref=numpy_to_multiarray_float64(base_ref),
-        )
+        if self.transport == "stream":
+            self._request_pub.publish(
+                MPCStreamRequest(k=k, data=pack_arrays((x0, footstep, base_ref)))
+            )
+            return
+        elif self.transport == "binary":
+            res = self.solve_solver_srv(k=k, data=pack_arrays((x0, footstep, base_ref)))
+        else:
+            res = self.solve_solver_srv(
+                k=k,
+                x0=numpy_to_multiarray_float64(x0),
+                footstep=numpy_to_multiarray_float64(footstep),
+                base_ref=numpy_to_multiarray_float64(base_ref),
+            )
         if self.synchronous:
-            self._parse_result(res)
+            self._parse_result(res, k)
 
     def _result_cb(self, fut):
         msg = fut.result()
         self._parse_result(msg)
 
-    def _parse_result(self, msg):
-        assert msg.run_success, "Error while runnning solver on server"
-        self.new_result = True
-        self.last_available_result.gait = multiarray_to_numpy_float64(msg.gait).astype(
-            np.int32
-        )
-        self.last_available_result.xs = multiarray_to_listof_numpy_float64(msg.xs)
-        self.last_available_result.us = multiarray_to_listof_numpy_float64(msg.us)
-        self.last_available_result.K = multiarray_to_listof_numpy_float64(msg.K)
-        self.last_available_result.solving_duration = msg.solving_duration
-        self.last_available_result.num_iters = msg.num_iters
+    def _parse_result(self, msg, k=None):
+        if self.transport == "stream":
+            if msg.k < self.last_result_k:
+                return  # Overtaken by a more recent result
+            k = msg.k
+        else:
+            assert msg.run_success, "Error while runnning solver on server"
+
+        with self._result_lock:
+            if k is not None:
+                self.last_result_k = k
+            self.new_result = True
+            if self.transport == "multiarray":
+                self.last_available_result.gait = multiarray_to_numpy_float64(
+                    msg.gait
+                ).astype(np.int32)
+                self.last_available_result.xs_array = multiarray_to_numpy_float64(
+                    msg.xs
+                )
+                self.last_available_result.us_array = multiarray_to_numpy_float64(
+                    msg.us
+                )
+                self.last_available_result.K_array = multiarray_to_numpy_float64(msg.K)
+            else:
+                gait, xs, us, K = unpack_arrays(msg.data)
+                self.last_available_result.gait = gait
+                self.last_available_result.xs_array = xs
+                self.last_available_result.us_array = us
+                self.last_available_result.K_array = K
+            self.last_available_result.solving_duration = msg.solving_duration
+            self.last_available_result.num_iters = msg.num_iters
 
     def get_latest_result(self):
         """
         If a new result is available, return the new result.
         Otherwise return the old result again.
         """
-        self.last_available_result.new_result = self.new_result
-        self.new_result = False
+        with self._result_lock:
+            self.last_available_result.new_result = self.new_result
+            self.new_result = False
 
         return self.last_available_result
 
     def stop_parallel_loop(self):
+        if self.transport == "stream":
+            self._result_sub.unregister()
+            self._request_pub.unregister()
         stop_solver_srv = rospy.ServiceProxy("qrw_wbmpc/stop", MPCStop)
         res = stop_solver_srv()
         assert (
@@ -127,9 +223,21 @@ class ROSMPCWrapperServer:
         self._solve_service = rospy.Service(
             "qrw_wbmpc/solve", MPCSolve, self._trigger_solve
         )
+        self._solve_binary_service = rospy.Service(
+            "qrw_wbmpc/solve_binary", MPCSolveBinary, self._trigger_solve_binary
+        )
         self._stop_service = rospy.Service(
             "qrw_wbmpc/stop", MPCStop, self._trigger_stop
         )
+        self._request_sub = rospy.Subscriber(
+            "qrw_wbmpc/request",
+            MPCStreamRequest,
+            self._trigger_stream_request,
+            queue_size=1,
+        )
+        self._result_pub = rospy.Publisher(
+            "qrw_wbmpc/result", MPCStreamResult, queue_size=1
+        )
         rospy.loginfo("Initializing MPC server.")
 
     def _trigger_init(self, msg):
@@ -140,11 +248,11 @@ class ROSMPCWrapperServer:
         self.params = Params.create_from_str(msg.params)
         self.WINDOW_SIZE = self.params.window_size
         self.pd = TaskSpec(self.params)
-        self.T = self.params.N_gait
         self.nu = self.pd.nu
         self.nx = self.pd.nx
         self.ndx = self.pd.ndx
         self.solver_cls = get_ocp_from_str(msg.solver_type)
+        self.T = self.solver_cls.get_num_nodes(self.params)
 
         footsteps = multiarray_to_numpy_float64(msg.footsteps)
         base_refs = [
@@ -154,36 +262,99 @@ class ROSMPCWrapperServer:
         self.ocp = self.solver_cls(self.params, footsteps, base_refs)
 
         self.last_available_result: MPCResult = MPCResult(
-            self.params.N_gait, self.pd.nx, self.pd.nu, self.pd.ndx, self.WINDOW_SIZE
+            self.params.N_gait,
+            self.pd.nx,
+            self.pd.nu,
+            self.pd.ndx,
+            self.WINDOW_SIZE,
+            self.params.feedback_window,
         )
 
+        self._prepare_thread = None
+
         rospy.loginfo("Initializing MPC.")
         self.is_init = True
         return MPCInitResponse(True)
 
+    def _run_solver(self, k, x0, footstep, base_ref):
+        if self._prepare_thread is not None:
+            self._prepare_thread.join()
+            self._prepare_thread = None
+        self.ocp.push_node(k, x0, footstep, pin.Motion(base_ref))
+        self.ocp.solve(k)
+        return self.ocp.get_results_arrays(
+            self.WINDOW_SIZE, self.params.feedback_window
+        )
+
+    def _prepare_after_reply(self, k):
+        """
+        Prepare the next solve (see OCPAbstract.prepare) in the background, while the
+        service response is sent, instead of delaying it. The next request waits for
+        the preparation to finish. The result buffers are not modified by it.
+        """
+        self._prepare_thread = Thread(target=self.ocp.prepare, args=(k,))
+        self._prepare_thread.start()
+
     def _trigger_solve(self, msg):
         if not self.is_init:
             return MPCSolveResponse(run_success=False)
 
-        self.ocp.push_node(
+        gait, xs, us, Ks, solving_duration = self._run_solver(
             msg.k,
             multiarray_to_numpy_float64(msg.x0),
             multiarray_to_numpy_float64(msg.footstep),
-            pin.Motion(multiarray_to_numpy_float64(msg.base_ref)),
+            multiarray_to_numpy_float64(msg.base_ref),
         )
 
-        self.ocp.solve(msg.k)
-
-        gait, xs, us, Ks, solving_duration = self.ocp.get_results(self.WINDOW_SIZE)
-
-        return MPCSolveResponse(
+        res = MPCSolveResponse(
             run_success=True,
             gait=numpy_to_multiarray_float64(gait),
             xs=listof_numpy_to_multiarray_float64(xs),
             us=listof_numpy_to_multiarray_float64(us),
             K=listof_numpy_to_multiarray_float64(Ks),
             solving_duration=solving_duration,
+            num_iters=self.ocp.num_iters,
+        )
+        self._prepare_after_reply(msg.k)
+        return res
+
+    def _trigger_solve_binary(self, msg):
+        if not self.is_init:
+            return MPCSolveBinaryResponse(run_success=False)
+
+        x0, footstep, base_ref = unpack_arrays(msg.data)
+        gait, xs, us, Ks, solving_duration = self._run_solver(
+            msg.k, x0, footstep, base_ref
+        )
+
+        res = MPCSolveBinaryResponse(
+            run_success=True,
+            data=pack_arrays((gait, xs, us, Ks)),
+            solving_duration=solving_duration,
+            num_iters=self.ocp.num_iters,
+        )
+        self._prepare_after_reply(msg.k)
+        return res
+
+    def _trigger_stream_request(self, msg):
+        if not self.is_init:
+            rospy.logwarn("[MPCStream] MPC was not initialized.")
+            return
+
+        x0, footstep, base_ref = unpack_arrays(msg.data)
+        gait, xs, us, Ks, solving_duration = self._run_solver(
+            msg.k, x0, footstep, base_ref
+        )
+
+        self._result_pub.publish(
+            MPCStreamResult(
+                k=msg.k,
+                data=pack_arrays((gait, xs, us, Ks)),
+                solving_duration=solving_duration,
+                num_iters=self.ocp.num_iters,
+            )
         )
+        self.ocp.prepare(msg.k)
 
     def _trigger_stop(self, msg):
         if not self.is_init:
@@ -1,6 +1,7 @@
 from .wbmpc_wrapper_ros import ROSMPCWrapperClient
 from .wbmpc_wrapper_multiprocess import MultiprocessMPCWrapper
 
+import time
 import numpy as np
 
 from .wb_mpc.ocp_abstract import OCPAbstract
@@ -25,24 +26,31 @@ class ROSMPCAsyncClient(MultiprocessMPCWrapper):
         super().__init__(params, footsteps, base_refs, solver_cls)
 
     def _mpc_asynchronous(self):
+        # The OCP lives on the server, which was initialized by the ROS client.
+        self._signal_ready(0.0)
+
         x0 = np.zeros_like(self.x0_shared)
         footstep = np.zeros_like(self.footstep_shared)
         base_ref = np.zeros_like(self.base_ref_shared)
-        while self.running.value:
-            if not self.new_data.value:
-                continue
-
-            self.new_data.value = False
-
+        while self._wait_for_request():
             with self.mutex:
                 k, x0[:], footstep[:], base_ref[:] = self._get_shared_data_in()
+                t_request = self.in_t_request.value
+            wakeup_latency = time.time() - t_request
 
             self.ros_client.solve(k, x0, footstep, base_ref)
             res: MPCResult = self.ros_client.get_latest_result()
             self._put_shared_data_out(
-                res.gait, res.xs, res.us, res.K, res.num_iters, res.solving_duration
+                k,
+                res.gait,
+                res.xs_array,
+                res.us_array,
+                res.K_array,
+                res.num_iters,
+                res.solving_duration,
+                wakeup_latency,
             )
-            self.new_result.value = True
+            self._account_solve(k, t_request)
 
     def stop_parallel_loop(self):
         self.ros_client.stop_parallel_loop()
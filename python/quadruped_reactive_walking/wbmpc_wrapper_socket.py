@@ -0,0 +1,282 @@
+"""
+Run the MPC in another process or on another machine without ROS, by exchanging
+frames over a TCP or UNIX socket.
+
+Each frame is a fixed header (frame type, iteration k, payload size) followed by a
+payload of arrays packed with tools/serialization.py. The client sends INIT (solver
+type, raw parameters, footsteps, base references), then SOLVE requests, and finally
+STOP. The server answers INIT and STOP with ACK, and each SOLVE with a RESULT tagged
+with the k of the request. Requests that queue up while the server is solving are
+dropped, only the most recent one is solved.
+
+Start a server with:
+    python -m quadruped_reactive_walking.wbmpc_wrapper_socket tcp://0.0.0.0:5555
+"""
+import os
+import select
+import socket
+import struct
+import threading
+
+import numpy as np
+import pinocchio as pin
+
+from typing import Type
+
+from .wb_mpc import get_ocp_from_str
+from .wb_mpc.ocp_abstract import OCPAbstract
+from .wbmpc_wrapper_abstract import MPCWrapperAbstract, MPCResult
+from .tools.serialization import pack_arrays, unpack_arrays
+from quadruped_reactive_walking import Params
+
+FRAME_INIT = 1
+FRAME_SOLVE = 2
+FRAME_RESULT = 3
+FRAME_STOP = 4
+FRAME_ACK = 5
+
+_FRAME_HEADER = struct.Struct("<BqI")
+
+
+def parse_address(address):
+    """
+    Parse an address of the form tcp://host:port or unix:///path/to/socket.
+    Return the socket family and the address to bind or connect to.
+    """
+    if address.startswith("tcp://"):
+        host, _, port = address[len("tcp://") :].rpartition(":")
+        return socket.AF_INET, (host, int(port))
+    elif address.startswith("unix://"):
+        return socket.AF_UNIX, address[len("unix://") :]
+    raise ValueError(
+        "Unsupported MPC address '{}', expected tcp://host:port or unix://path".format(
+            address
+        )
+    )
+
+
+def _configure(sock):
+    if sock.family == socket.AF_INET:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+def _recv_exactly(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:])
+        if n == 0:
+            raise ConnectionError("MPC socket closed by the peer.")
+        received += n
+    return buffer
+
+
+def encode_str(s):
+    return np.frombuffer(s.encode(), dtype=np.uint8)
+
+
+def decode_str(arr):
+    return arr.tobytes().decode()
+
+
+def send_frame(sock, kind, k=0, arrays=()):
+    payload = pack_arrays(arrays)
+    sock.sendall(_FRAME_HEADER.pack(kind, k, len(payload)) + payload)
+
+
+def recv_frame(sock):
+    """Return the type, iteration and arrays of the next frame."""
+    kind, k, size = _FRAME_HEADER.unpack(_recv_exactly(sock, _FRAME_HEADER.size))
+    return kind, k, unpack_arrays(_recv_exactly(sock, size))
+
+
+class SocketMPCWrapperClient(MPCWrapperAbstract):
+    """
+    Wrapper to run both types of MPC (OQSP or Crocoddyl) on a separate process/machine
+    using a socket as communication interface (see SocketMPCServer).
+
+    In synchronous mode, solve waits for the result. Otherwise it only sends the request
+    and the results are received by a background thread.
+    The server address defaults to params.mpc_remote_address.
+    """
+
+    def __init__(
+        self,
+        params: Params,
+        footsteps,
+        base_refs,
+        solver_cls: Type[OCPAbstract],
+        synchronous=True,
+        address=None,
+    ):
+        super().__init__(params)
+        self.synchronous = synchronous
+
+        self._result_lock = threading.Lock()
+        self.new_result: bool = False
+        # Iteration of the request the last result answers
+        self.last_result_k = 0
+        self.last_available_result: MPCResult = MPCResult(
+            params.N_gait,
+            self.pd.nx,
+            self.pd.nu,
+            self.pd.ndx,
+            self.WINDOW_SIZE,
+            self.FEEDBACK_WINDOW,
+        )
+
+        if address is None:
+            address = params.mpc_remote_address
+        family, sockaddr = parse_address(address)
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.connect(sockaddr)
+        _configure(self.sock)
+
+        send_frame(
+            self.sock,
+            FRAME_INIT,
+            0,
+            (
+                encode_str(solver_cls.get_type_str()),
+                encode_str(params.raw_str),
+                np.array(footsteps),
+                np.array([base_ref.np for base_ref in base_refs]),
+            ),
+        )
+        kind, _, _ = recv_frame(self.sock)
+        assert kind == FRAME_ACK, "Error while initializing mpc on server"
+
+        self._receiver = None
+        if not self.synchronous:
+            self._receiver = threading.Thread(target=self._receive_results, daemon=True)
+            self._receiver.start()
+
+    def solve(self, k, x0, footstep, base_ref):
+        send_frame(self.sock, FRAME_SOLVE, k, (x0, footstep, base_ref))
+        if self.synchronous:
+            kind, k, arrays = recv_frame(self.sock)
+            self._parse_result(k, arrays)
+
+    def _receive_results(self):
+        while True:
+            kind, k, arrays = recv_frame(self.sock)
+            if kind != FRAME_RESULT:
+                return
+            self._parse_result(k, arrays)
+
+    def _parse_result(self, k, arrays):
+        gait, xs, us, K, info = arrays
+        with self._result_lock:
+            self.last_result_k = k
+            self.new_result = True
+            self.last_available_result.gait = gait
+            self.last_available_result.xs_array = xs
+            self.last_available_result.us_array = us
+            self.last_available_result.K_array = K
+            self.last_available_result.solving_duration = info[0]
+            self.last_available_result.num_iters = int(info[1])
+
+    def get_latest_result(self):
+        """
+        If a new result is available, return the new result.
+        Otherwise return the old result again.
+        """
+        with self._result_lock:
+            self.last_available_result.new_result = self.new_result
+            self.new_result = False
+
+        return self.last_available_result
+
+    def stop_parallel_loop(self):
+        send_frame(self.sock, FRAME_STOP)
+        if self._receiver is not None:
+            self._receiver.join()
+        else:
+            recv_frame(self.sock)
+        self.sock.close()
+        print("Stopped MPC server.")
+
+
+class SocketMPCServer:
+    """
+    Solve the MPC for the clients that connect to the given address, one at a time.
+    """
+
+    def __init__(self, address):
+        family, self.address = parse_address(address)
+        if family == socket.AF_UNIX and os.path.exists(self.address):
+            os.unlink(self.address)
+        self.listener = socket.socket(family, socket.SOCK_STREAM)
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind(self.address)
+        self.listener.listen(1)
+        self.ocp = None
+        self.num_dropped = 0
+
+    def serve_forever(self):
+        while True:
+            self.serve_one()
+
+    def serve_one(self):
+        """Serve a single client until it sends STOP or disconnects."""
+        conn, _ = self.listener.accept()
+        _configure(conn)
+        with conn:
+            try:
+                while self._handle(conn, *self._next_request(conn)):
+                    pass
+            except ConnectionError:
+                print("MPC client disconnected.")
+        self.ocp = None
+
+    def _next_request(self, conn):
+        """
+        Receive the next frame, skipping the solve requests that have already been
+        superseded by another frame.
+        """
+        kind, k, arrays = recv_frame(conn)
+        while kind == FRAME_SOLVE and select.select([conn], [], [], 0.0)[0]:
+            kind, k, arrays = recv_frame(conn)
+            self.num_dropped += 1
+        return kind, k, arrays
+
+    def _handle(self, conn, kind, k, arrays):
+        """Process a frame. Return False when the client is done."""
+        if kind == FRAME_INIT:
+            solver_type, raw_params, footsteps, base_refs = arrays
+            self.params = Params.create_from_str(decode_str(raw_params))
+            self.solver_cls = get_ocp_from_str(decode_str(solver_type))
+            self.ocp = self.solver_cls(
+                self.params,
+                list(footsteps),
+                [pin.Motion(base_ref) for base_ref in base_refs],
+            )
+            print("Initialized MPC ({}).".format(self.solver_cls.get_type_str()))
+            send_frame(conn, FRAME_ACK)
+        elif kind == FRAME_SOLVE:
+            x0, footstep, base_ref = arrays
+            self.ocp.push_node(k, x0, footstep, pin.Motion(base_ref))
+            self.ocp.solve(k)
+            gait, xs, us, K, solving_duration = self.ocp.get_results_arrays(
+                self.params.window_size, self.params.feedback_window
+            )
+            info = np.array([solving_duration, self.ocp.num_iters])
+            send_frame(conn, FRAME_RESULT, k, (gait, xs, us, K, info))
+            self.ocp.prepare(k)
+        elif kind == FRAME_STOP:
+            print("Shutting down MPC ({} requests dropped).".format(self.num_dropped))
+            send_frame(conn, FRAME_ACK)
+            return False
+        return True
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="MPC server over a socket.")
+    parser.add_argument(
+        "address", help="address to listen on (tcp://host:port or unix://path)"
+    )
+    args = parser.parse_args()
+    SocketMPCServer(args.address).serve_forever()
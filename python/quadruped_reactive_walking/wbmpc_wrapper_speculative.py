@@ -0,0 +1,112 @@
+import numpy as np
+import pinocchio as pin
+
+from .wb_mpc.ocp_abstract import OCPAbstract
+from .wbmpc_wrapper_abstract import MPCWrapperAbstract, MPCResult
+from .wbmpc_wrapper_multiprocess import MultiprocessMPCWrapper
+
+from typing import Type
+
+from quadruped_reactive_walking import Params
+
+
+def speculative_velocities(params: Params, count):
+    """
+    Pick the base velocity references solved in advance: the distinct columns of
+    v_switch, in the order in which the joystick reaches them.
+    """
+    velocities = []
+    for v in np.asarray(params.v_switch).T:
+        if not any(np.allclose(v, u) for u in velocities):
+            velocities.append(v.copy())
+    return velocities[:count]
+
+
+class SpeculativeMPCWrapper(MPCWrapperAbstract):
+    """
+    Run a pool of asynchronous MPC workers: the main worker solves the actual requests
+    and each speculative worker solves the same requests with its own fixed base
+    velocity reference, taken from v_switch.
+
+    When the velocity command switches to one of the speculative velocities, the result
+    of the corresponding worker can be used right away, instead of waiting for the main
+    worker to converge on the new reference. Each worker keeps solving the same problem,
+    so its warm start stays consistent.
+    """
+
+    # Distance between the command and a speculative velocity below which they match
+    MATCH_TOLERANCE = 1e-2
+
+    def __init__(
+        self, params: Params, footsteps, base_refs, solver_cls: Type[OCPAbstract]
+    ):
+        super().__init__(params)
+        self.solver_cls = solver_cls
+
+        self.velocities = speculative_velocities(
+            params, params.ocp.num_speculative_workers
+        )
+        self.main_worker = MultiprocessMPCWrapper(
+            params, footsteps, base_refs, solver_cls
+        )
+        cores = list(params.ocp.cpu_affinity_speculative)
+        self.speculative_workers = []
+        for i in range(len(self.velocities)):
+            cpu_affinity = [cores[i % len(cores)]] if cores else None
+            self.speculative_workers.append(
+                MultiprocessMPCWrapper(
+                    params, footsteps, base_refs, solver_cls, cpu_affinity
+                )
+            )
+
+        self.command = np.zeros(6)
+        self.branch = 0
+        self.num_switches = 0
+        self.last_result_k = 0
+        self.wakeup_latency = 0.0
+        self.last_available_result: MPCResult = None
+
+    @property
+    def workers(self):
+        return [self.main_worker] + self.speculative_workers
+
+    def solve(self, k, x0, footstep, base_vel_ref: pin.Motion):
+        self.command[:] = base_vel_ref.np
+        self.main_worker.solve(k, x0, footstep, base_vel_ref)
+        for worker, v in zip(self.speculative_workers, self.velocities):
+            worker.solve(k, x0, footstep, pin.Motion(v))
+
+    def _matching_branches(self):
+        """Indices of the workers whose velocity reference is the current command."""
+        branches = [0]
+        for i, v in enumerate(self.velocities):
+            if np.linalg.norm(v - self.command) < self.MATCH_TOLERANCE:
+                branches.append(i + 1)
+        return branches
+
+    def get_latest_result(self):
+        """
+        Return the most recent result among the workers that solve the current
+        velocity command (the main worker always does).
+        new_result is also set when the selected worker changes.
+        """
+        results = [worker.get_latest_result() for worker in self.workers]
+        workers = self.workers
+        branch = max(
+            self._matching_branches(), key=lambda i: (workers[i].last_result_k, -i)
+        )
+        result = results[branch]
+        if branch != self.branch:
+            result.new_result = True
+            self.num_switches += 1
+            self.branch = branch
+
+        self.last_result_k = workers[branch].last_result_k
+        self.wakeup_latency = workers[branch].wakeup_latency
+        self.last_available_result = result
+        return result
+
+    def stop_parallel_loop(self):
+        for worker in self.workers:
+            worker.stop_parallel_loop()
+        print("Speculative MPC: {} branch switches".format(self.num_switches))
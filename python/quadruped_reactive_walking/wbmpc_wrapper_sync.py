@@ -1,3 +1,6 @@
+import time
+
+from colorama import Fore
 from .wb_mpc.ocp_abstract import OCPAbstract
 
 from typing import Type
@@ -17,25 +20,47 @@ class SyncMPCWrapper(MPCWrapperAbstract):
         super().__init__(params)
         self.solver_cls = solver_cls
 
+        t_start = time.time()
         self.ocp = solver_cls(params, footsteps, base_refs)
+        self.startup_time = time.time() - t_start
+        print(
+            Fore.CYAN
+            + "MPC ready (startup time: {:.3f} s)".format(self.startup_time)
+            + Fore.RESET
+        )
 
         self.last_available_result: MPCResult = MPCResult(
-            self.params.N_gait, self.pd.nx, self.pd.nu, self.pd.ndx, self.WINDOW_SIZE
+            self.params.N_gait,
+            self.pd.nx,
+            self.pd.nu,
+            self.pd.ndx,
+            self.WINDOW_SIZE,
+            self.FEEDBACK_WINDOW,
         )
         self.new_result = False
+        self.num_results = 0
+        self._horizon = None
 
     def solve(self, k, x0, footstep, base_vel_ref):
         self.ocp.push_node(k, x0, footstep, base_vel_ref)
         self.ocp.solve(k)
 
-        gait, xs, us, K, solving_duration = self.ocp.get_results(self.WINDOW_SIZE)
+        gait, xs, us, K, solving_duration = self.ocp.get_results_arrays(
+            self.WINDOW_SIZE, self.FEEDBACK_WINDOW
+        )
         self.last_available_result.gait = gait
-        self.last_available_result.xs = xs
-        self.last_available_result.us = us
-        self.last_available_result.K = K
+        self.last_available_result.xs_array = xs
+        self.last_available_result.us_array = us
+        self.last_available_result.K_array = K
         self.last_available_result.solving_duration = solving_duration
         self.new_result = True
 
+        self.num_results += 1
+        period = self.params.horizon_log_period
+        if period and self.num_results % period == 0:
+            self._horizon = (k,) + self.ocp.get_horizon()
+        self.ocp.prepare(k)
+
     def get_latest_result(self):
         """
         Return the desired contact forces that have been computed by the last iteration
@@ -51,5 +76,9 @@ class SyncMPCWrapper(MPCWrapperAbstract):
 
         return self.last_available_result
 
+    def get_latest_horizon(self):
+        horizon, self._horizon = self._horizon, None
+        return horizon
+
     def stop_parallel_loop(self):
         pass  # Do nothing since it is single threaded
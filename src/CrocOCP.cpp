@@ -0,0 +1,231 @@
+#include "qrw/CrocOCP.hpp"
+
+#include <chrono>
+#include <iostream>
+
+#include <pinocchio/algorithm/frames.hpp>
+#include <pinocchio/algorithm/kinematics.hpp>
+#include <crocoddyl/core/integ-action-base.hpp>
+#include <crocoddyl/core/utils/callbacks.hpp>
+#include <crocoddyl/multibody/actions/contact-fwddyn.hpp>
+
+namespace qrw {
+
+namespace {
+double elapsed(std::chrono::steady_clock::time_point const &since) {
+  return std::chrono::duration<double>(std::chrono::steady_clock::now() - since)
+      .count();
+}
+}  // namespace
+
+CrocOCP::CrocOCP(Params const &params, pinocchio::Model const &model,
+                 boost::shared_ptr<crocoddyl::ShootingProblem> problem,
+                 std::vector<ModelPtr> const &life_models,
+                 std::vector<ModelPtr> const &end_models,
+                 std::vector<std::string> const &foot_names,
+                 VectorNi const &phase, VectorNi const &model_index,
+                 MatrixN4i const &timeline)
+    : IOCPAbstract(params),
+      problem(problem),
+      ddp(boost::make_shared<crocoddyl::SolverFDDP>(problem)),
+      rmodel(model),
+      rdata(model),
+      x0(problem->get_x0()),
+      life_models_(life_models),
+      end_models_(end_models),
+      foot_names_(foot_names),
+      phase_(phase),
+      model_index_(model_index),
+      timeline_(timeline),
+      horizon_(timeline.rows() - phase.size()) {
+  problem->set_nthreads((int)params_.ocp.num_threads);
+  for (std::string const &name : foot_names_) {
+    contact_names_.push_back(name + "_contact");
+    force_reg_names_.push_back(name + "_forceReg");
+  }
+
+  if (params_.ocp.verbose) {
+    std::vector<boost::shared_ptr<crocoddyl::CallbackAbstract>> callbacks;
+    callbacks.push_back(boost::make_shared<crocoddyl::CallbackVerbose>());
+    ddp->setCallbacks(callbacks);
+  }
+
+  auto const &models = problem->get_runningModels();
+  auto const &datas = problem->get_runningDatas();
+  for (std::size_t i = 0; i < models.size(); i++) {
+    stages_.emplace_back(models[i], datas[i]);
+  }
+  // The life models enter the horizon first: create their data beforehand
+  for (ModelPtr const &m : life_models_) {
+    free_[m.get()].push_back(m->createData());
+  }
+
+  if (warm_start_empty()) {
+    std::cout << "No warm-start found, initializing..." << std::endl;
+    const std::size_t T = problem->get_T();
+    xs_init.assign(T + 1, x0);
+    us_init.clear();
+    for (ModelPtr const &m : models) {
+      us_init.push_back(VectorN::Zero(m->get_nu()));
+    }
+    problem->quasiStatic(
+        us_init, std::vector<VectorN>(xs_init.begin(), xs_init.end() - 1));
+  }
+}
+
+void CrocOCP::push_node(uint k, const ConstVecRefN &x0, Matrix34 footsteps,
+                        Motion base_vel_ref) {
+  this->x0 = x0;
+  pinocchio::forwardKinematics(rmodel, rdata, x0.head(rmodel.nq));
+  pinocchio::updateFramePlacements(rmodel, rdata);
+
+  problem->set_x0(this->x0);
+
+  if (k == 0) return;
+
+  const Eigen::Index t = std::min<Eigen::Index>(
+      (Eigen::Index)k / params_.mpc_wbc_ratio - 1, phase_.size() - 1);
+  ModelPtr model;
+  Motion const *ref = &base_vel_ref;
+  switch (phase_[t]) {
+    case START:
+      model = life_models_[(std::size_t)model_index_[t]];
+      break;
+    case LIFE:
+      model = stages_.front().first;
+      break;
+    default:
+      // with or without impact
+      model = end_models_[(std::size_t)model_index_[t]];
+      ref = nullptr;
+  }
+  t_last_ = t;
+
+  const std::size_t num_feet = foot_names_.size();
+  std::vector<bool> support(num_feet);
+  for (std::size_t j = 0; j < num_feet; j++) {
+    support[j] = timeline_(t + horizon_, (Eigen::Index)j) == 1;
+  }
+  update_model(model, footsteps, ref, support);
+  problem->circularAppend(model, cycle_stage(model));
+  cycle_warm_start();
+}
+
+void CrocOCP::solve(std::size_t k) {
+  auto t_start = std::chrono::steady_clock::now();
+  t_update = elapsed(t_start);
+
+  _check_ws_dim(problem->get_T());
+  t_warm_start = elapsed(t_start) - t_update;
+
+  ddp->solve(xs_init, us_init, k > 0 ? max_iter : init_max_iters, false);
+  t_ddp = elapsed(t_start) - t_update - t_warm_start;
+
+  t_solve = elapsed(t_start);
+  num_iters_ = (uint)ddp->get_iter();
+}
+
+MatrixN4i CrocOCP::current_gait() const {
+  return timeline_.middleRows(t_last_ + 1, horizon_);
+}
+
+CrocOCP::StageHandles &CrocOCP::get_handles(ModelPtr const &model) {
+  auto it = handles_.find(model.get());
+  if (it != handles_.end()) return it->second;
+
+  auto integrated =
+      boost::dynamic_pointer_cast<crocoddyl::IntegratedActionModelAbstract>(
+          model);
+  boost::shared_ptr<crocoddyl::DifferentialActionModelContactFwdDynamics> diff;
+  if (integrated != nullptr) {
+    diff = boost::dynamic_pointer_cast<
+        crocoddyl::DifferentialActionModelContactFwdDynamics>(
+        integrated->get_differential());
+  }
+  if (diff == nullptr) {
+    throw std::runtime_error(
+        "Stages must integrate a DifferentialActionModelContactFwdDynamics.");
+  }
+
+  StageHandles &handles = handles_[model.get()];
+  handles.contacts = diff->get_contacts();
+  handles.costs = diff->get_costs();
+  auto const &costs = handles.costs->get_costs();
+  auto residual = [&costs](std::string const &name)
+      -> boost::shared_ptr<crocoddyl::ResidualModelAbstract> {
+    auto item = costs.find(name);
+    if (item == costs.end()) return nullptr;
+    return item->second->cost->get_residual();
+  };
+
+  for (std::string const &name : foot_names_) {
+    std::vector<std::string> names;
+    for (const char *suffix :
+         {"_vel_zReg", "_foot_tracking", "_groundCol", "_flyHigh"}) {
+      if (costs.count(name + suffix)) names.push_back(name + suffix);
+    }
+    handles.swing_cost_names.push_back(names);
+
+    auto foot_tracking =
+        boost::dynamic_pointer_cast<crocoddyl::ResidualModelFrameTranslation>(
+            residual(name + "_foot_tracking"));
+    if (foot_tracking != nullptr)
+      handles.foot_tracking.push_back(foot_tracking);
+  }
+  handles.base_velocity =
+      boost::dynamic_pointer_cast<crocoddyl::ResidualModelFrameVelocity>(
+          residual("base_velocity_tracking"));
+  return handles;
+}
+
+void CrocOCP::update_model(ModelPtr const &model, Matrix34 const &footsteps,
+                           Motion const *base_vel_ref,
+                           std::vector<bool> const &support) {
+  StageHandles &handles = get_handles(model);
+  if (support != handles.support) {
+    for (std::size_t j = 0; j < foot_names_.size(); j++) {
+      handles.contacts->changeContactStatus(contact_names_[j], support[j]);
+      for (std::string const &name : handles.swing_cost_names[j]) {
+        handles.costs->changeCostStatus(name, !support[j]);
+      }
+      handles.costs->changeCostStatus(force_reg_names_[j], support[j]);
+    }
+    handles.support = support;
+  }
+
+  if (!handles.foot_tracking.empty()) {
+    Eigen::Index index = 0;
+    for (std::size_t j = 0; j < foot_names_.size(); j++) {
+      if (support[j]) {
+        handles.foot_tracking[j]->set_reference(footsteps.col(index));
+        index++;
+      }
+    }
+  }
+  if (base_vel_ref != nullptr && handles.base_velocity != nullptr) {
+    handles.base_velocity->set_reference(*base_vel_ref);
+  }
+}
+
+CrocOCP::DataPtr CrocOCP::cycle_stage(ModelPtr const &model) {
+  auto old_stage = stages_.front();
+  stages_.pop_front();
+  DataPtr data;
+  if (old_stage.first == model) {
+    data = old_stage.second;
+  } else {
+    free_[old_stage.first.get()].push_back(old_stage.second);
+    std::vector<DataPtr> &free = free_[model.get()];
+    if (!free.empty()) {
+      data = free.back();
+      free.pop_back();
+    } else {
+      data = model->createData();
+      num_created++;
+    }
+  }
+  stages_.emplace_back(model, data);
+  return data;
+}
+
+}  // namespace qrw
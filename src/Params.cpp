@@ -8,7 +8,19 @@ std::ostream &operator<<(std::ostream &oss, const OCPParams &p) {
   oss << "OCPParams {"
       << "\n\tnum_threads:\t" << p.num_threads << "\n\tmax_iter:\t"
       << p.max_iter << "\n\tinit_max_iters:\t" << p.init_max_iters
-      << "\n\tverbose:\t" << p.verbose << "\n}";
+      << "\n\tverbose:\t" << p.verbose << "\n\tcpu_affinity_controller:\t"
+      << p.cpu_affinity_controller.transpose() << "\n\tcpu_affinity_mpc:\t"
+      << p.cpu_affinity_mpc.transpose() << "\n\tcpu_affinity_solver_threads:\t"
+      << p.cpu_affinity_solver_threads.transpose()
+      << "\n\trt_priority_controller:\t" << p.rt_priority_controller
+      << "\n\trt_priority_mpc:\t" << p.rt_priority_mpc
+      << "\n\toverrun_policy:\t" << p.overrun_policy
+      << "\n\tnum_speculative_workers:\t" << p.num_speculative_workers
+      << "\n\tcpu_affinity_speculative:\t"
+      << p.cpu_affinity_speculative.transpose() << "\n\twarm_start_library:\t"
+      << p.warm_start_library << "\n\twarm_start_jump:\t" << p.warm_start_jump
+      << "\n\trti:\t" << p.rti << "\n\ttime_budget:\t" << p.time_budget
+      << "\n\ttime_grid_nodes:\t" << p.time_grid_nodes << "\n}";
   return oss;
 }
 
@@ -33,6 +45,11 @@ Params::Params()
       use_qualisys(false),
       asynchronous_mpc(false),
       mpc_in_rosnode(false),
+      ros_transport("multiarray"),
+      mpc_remote_address(""),
+      delay_compensation(false),
+      feedback_window(0),
+      horizon_log_period(0),
 
       q_init(12),  // Fill with zeros, will be filled with values later
       dt_wbc(0.0),
@@ -126,6 +143,21 @@ bool convert<OCPParams>::decode(const Node &node, OCPParams &rhs) {
   rhs.init_max_iters = node["init_max_iters"].as<uint>();
   rhs.verbose = node["verbose"].as<bool>();
   rhs.tol = node["tol"].as<double>();
+  rhs.cpu_affinity_controller = node["cpu_affinity_controller"].as<VectorNi>();
+  rhs.cpu_affinity_mpc = node["cpu_affinity_mpc"].as<VectorNi>();
+  rhs.cpu_affinity_solver_threads =
+      node["cpu_affinity_solver_threads"].as<VectorNi>();
+  rhs.rt_priority_controller = node["rt_priority_controller"].as<int>();
+  rhs.rt_priority_mpc = node["rt_priority_mpc"].as<int>();
+  rhs.overrun_policy = node["overrun_policy"].as<std::string>();
+  rhs.num_speculative_workers = node["num_speculative_workers"].as<uint>();
+  rhs.cpu_affinity_speculative =
+      node["cpu_affinity_speculative"].as<VectorNi>();
+  rhs.warm_start_library = node["warm_start_library"].as<bool>();
+  rhs.warm_start_jump = node["warm_start_jump"].as<double>();
+  rhs.rti = node["rti"].as<bool>();
+  rhs.time_budget = node["time_budget"].as<double>();
+  rhs.time_grid_nodes = node["time_grid_nodes"].as<uint>();
   return true;
 }
 
@@ -164,6 +196,16 @@ bool convert<Params>::decode(const Node &robot_node, Params &rhs) {
   assert_yaml_parsing(robot_node, "robot", "window_size");
   rhs.window_size = robot_node["window_size"].as<uint>();
 
+  assert_yaml_parsing(robot_node, "robot", "feedback_window");
+  rhs.feedback_window = robot_node["feedback_window"].as<uint>();
+  if (rhs.feedback_window < 1 || rhs.feedback_window > rhs.window_size) {
+    throw std::runtime_error(
+        "feedback_window should be between 1 and window_size.");
+  }
+
+  assert_yaml_parsing(robot_node, "robot", "horizon_log_period");
+  rhs.horizon_log_period = robot_node["horizon_log_period"].as<uint>();
+
   assert_yaml_parsing(robot_node, "robot", "dt_mpc");
   rhs.dt_mpc = robot_node["dt_mpc"].as<Scalar>();
 
@@ -188,6 +230,15 @@ bool convert<Params>::decode(const Node &robot_node, Params &rhs) {
   assert_yaml_parsing(robot_node, "robot", "mpc_in_rosnode");
   rhs.mpc_in_rosnode = robot_node["mpc_in_rosnode"].as<bool>();
 
+  assert_yaml_parsing(robot_node, "robot", "ros_transport");
+  rhs.ros_transport = robot_node["ros_transport"].as<std::string>();
+
+  assert_yaml_parsing(robot_node, "robot", "mpc_remote_address");
+  rhs.mpc_remote_address = robot_node["mpc_remote_address"].as<std::string>();
+
+  assert_yaml_parsing(robot_node, "robot", "delay_compensation");
+  rhs.delay_compensation = robot_node["delay_compensation"].as<bool>();
+
   assert_yaml_parsing(robot_node, "robot", "perfect_estimator");
   rhs.perfect_estimator = robot_node["perfect_estimator"].as<bool>();
 
@@ -0,0 +1,27 @@
+from quadruped_reactive_walking.ocp_defs.fixed_base import (
+    lift_gains,
+    lift_state,
+    reduce_state,
+)
+import numpy as np
+
+# Free-flyer state: base pose (7), joints (12), base velocity (6), joints (12)
+x = np.arange(37.0)
+x_reduced = reduce_state(x)
+assert np.array_equal(x_reduced, np.concatenate([x[7:19], x[25:]]))
+
+# The lifted state keeps the base pose, at rest
+base_pose = np.array([0.1, 0.2, 0.3, 0.0, 0.0, 0.0, 1.0])
+x_lifted = lift_state(x_reduced, base_pose)
+assert x_lifted.shape == (37,)
+assert np.array_equal(x_lifted[:7], base_pose)
+assert np.array_equal(x_lifted[19:25], np.zeros(6))
+assert np.array_equal(reduce_state(x_lifted), x_reduced)
+
+# The gains act on the joints of the state difference (36) only
+K_reduced = np.random.rand(12, 24)
+K = lift_gains(K_reduced)
+assert K.shape == (12, 36)
+dx = np.random.rand(36)
+dx_reduced = np.concatenate([dx[6:18], dx[24:]])
+assert np.allclose(K @ dx, K_reduced @ dx_reduced)
@@ -0,0 +1,50 @@
+from quadruped_reactive_walking.ocp_defs.gait_schedule import (
+    GaitSchedule,
+    START,
+    LIFE,
+    END,
+)
+import numpy as np
+
+S = 4  # starting nodes
+R = 3  # gait repetitions
+life_gait = np.array(
+    [[1, 0, 0, 1]] * 3 + [[1, 1, 1, 1]] + [[0, 1, 1, 0]] * 3 + [[1, 1, 1, 1]],
+    dtype=np.int32,
+)
+L = len(life_gait)
+starting_gait = np.ones((S, 4), dtype=np.int32)
+ending_gait = np.ones((3, 4), dtype=np.int32)
+schedule = GaitSchedule(life_gait, starting_gait, ending_gait, R)
+
+# Reference: rolling the gait and the horizon at each node
+rolling_gait = life_gait.copy()
+current_gait = np.append(starting_gait, ending_gait[:1], axis=0)
+assert np.array_equal(schedule.current_gait(-1), current_gait)
+for t in range(S + L * R + 2 * len(current_gait)):
+    i = schedule.clamp(t)
+    if t < S:
+        row, phase, model = life_gait[t], START, t
+    elif t < S + L * R:
+        rolling_gait = np.roll(rolling_gait, -1, axis=0)
+        row, phase, model = rolling_gait[-1], LIFE, -1
+    else:
+        model = 0 if t == S + L * R else 1
+        row, phase = ending_gait[model], END
+    switched = np.any(row != current_gait[-1])
+    current_gait = np.append(current_gait[1:], row.reshape(1, -1), axis=0)
+
+    assert schedule.phase[i] == phase
+    assert schedule.model_index[i] == model
+    assert schedule.life_index[i] == ((t - S) % L if phase == LIFE else -1)
+    assert np.array_equal(schedule.rows[i], row)
+    assert np.array_equal(schedule.support[i], row == 1)
+    assert schedule.switch[i] == switched
+    assert np.array_equal(schedule.current_gait(i), current_gait)
+
+# should raise ValueError
+try:
+    GaitSchedule(life_gait, np.ones((L + 1, 4), dtype=np.int32), ending_gait, R)
+    assert False
+except ValueError:
+    pass
@@ -0,0 +1,32 @@
+from quadruped_reactive_walking.wb_mpc.ocp_abstract import BudgetStop, IterationBudget
+import numpy as np
+
+
+def run(budget, residuals):
+    """Run fake iterations, iterate i being [i], with the given criteria."""
+    try:
+        for i, residual in enumerate(residuals):
+            budget(residual, [np.array([i + 1.0])], [np.array([i + 1.0])])
+    except BudgetStop:
+        return i + 1
+    return len(residuals)
+
+
+# The criterion of iterate i is given at the end of iteration i + 1: when it
+# increases, the previous iterate is kept
+budget = IterationBudget(1.0, 1e-9, [np.zeros(1)], [np.zeros(1)])
+assert run(budget, [3.0, 2.0, 1.0, 1.5, 0.5]) == 4
+residual, xs, us = budget.best
+assert residual == 1.0 and xs[0][0] == 2.0 and us[0][0] == 2.0
+assert budget.num_iters == 4
+
+# Stop below the tolerance, on the iterate reaching it
+budget = IterationBudget(1.0, 1e-3, [np.zeros(1)], [np.zeros(1)])
+assert run(budget, [1.0, 1e-4, 1e-5]) == 2
+assert budget.best[0] == 1e-4 and budget.best[1][0][0] == 1.0
+
+# A zero budget stops after the first iteration, on the warm start
+budget = IterationBudget(0.0, 1e-9, [np.zeros(1)], [np.zeros(1)])
+assert run(budget, [1.0, 0.5]) == 1
+assert budget.best[0] == 1.0 and budget.best[1][0][0] == 0.0
+assert budget.time_left <= 0.0
@@ -13,3 +13,35 @@ try:
     assert False
 except ValueError:
     pass
+
+# The arrays are views of the storage of the lists
+assert res.us_array.shape == (ng, 2)
+assert np.allclose(res.us_array, us)
+res.us_array[0] = 1.0
+assert np.allclose(res.us[0], 1.0)
+
+K = np.random.randn(ng, 2, 4)
+res.K_array = K
+assert res.K_array.shape == (ng, 2, 4)
+assert np.allclose(res.K[1], K[1])
+res.K = list(-K)
+assert np.allclose(res.K_array, -K)
+
+xs = res.xs_array
+xs[:] = 2.0
+assert np.allclose(res.xs, 2.0)
+
+# should raise ValueError
+try:
+    res.xs_array = np.zeros((ng, 4))
+    assert False
+except ValueError:
+    pass
+
+# Controls and gains are only sent for the first feedback_window nodes
+res = MPCResult(ng, 4, 2, 4, ng, 2)
+assert res.window_size == ng
+assert res.feedback_window == 2
+assert res.xs_array.shape == (ng + 1, 4)
+assert res.us_array.shape == (2, 2)
+assert res.K_array.shape == (2, 2, 4)
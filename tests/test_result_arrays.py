@@ -0,0 +1,28 @@
+from quadruped_reactive_walking.wb_mpc.ocp_abstract import ResultArrays
+import numpy as np
+
+N, nx, nu, ndx = 5, 6, 3, 5
+gait = np.ones((N + 1, 4), dtype=np.int32)
+xs = [np.random.randn(nx) for _ in range(N + 1)]
+us = [np.random.randn(nu) for _ in range(N)]
+K = [np.random.randn(nu, ndx) for _ in range(N)]
+
+arrays = ResultArrays()
+_, xs_arr, us_arr, K_arr = arrays.fill(gait, xs, us, K)
+assert xs_arr.shape == (N + 1, nx) and xs_arr.flags.c_contiguous
+assert us_arr.shape == (N, nu)
+assert K_arr.shape == (N, nu, ndx)
+assert np.allclose(xs_arr, xs) and np.allclose(us_arr, us) and np.allclose(K_arr, K)
+
+# The buffers are reused, the sign of K can be flipped during the copy
+_, xs_arr2, _, K_arr2 = arrays.fill(gait, xs, us, K, flip_K=True)
+assert xs_arr2 is xs_arr and K_arr2 is K_arr
+assert np.allclose(K_arr, -np.stack(K))
+
+# Smaller windows: only the first stages are copied
+_, xs_arr3, us_arr3, K_arr3 = arrays.fill(gait, xs[:3], us[:2], K)
+assert xs_arr3.shape == (3, nx) and us_arr3.shape == (2, nu)
+assert np.allclose(K_arr3, K[:2])
+_, xs_arr4, us_arr4, K_arr4 = arrays.fill(gait, xs[:3], us[:1], K)
+assert xs_arr4.shape == (3, nx) and us_arr4.shape == (1, nu)
+assert K_arr4.shape == (1, nu, ndx)
@@ -0,0 +1,36 @@
+import quadruped_reactive_walking as qrw
+from quadruped_reactive_walking.wb_mpc import CrocOCP
+from quadruped_reactive_walking.wb_mpc.target import Target, make_footsteps_and_refs
+import numpy as np
+
+params = qrw.Params.create_from_file()
+footsteps, base_refs = make_footsteps_and_refs(params, Target(params))
+ratio = params.mpc_wbc_ratio
+
+
+def make_ocp(rti):
+    ocp = CrocOCP(params, footsteps, base_refs)
+    ocp.rti = rti
+    ocp.max_iter = 1
+    ocp.push_node(0, ocp.task.x0, footsteps[0], base_refs[0])
+    ocp.solve(0)
+    ocp.get_results()
+    return ocp
+
+
+# The feedback phase after prepare gives the same step as one iteration of the usual
+# solve (the full step is accepted by the line search here), for the same node and x0
+rti_ocp = make_ocp(True)
+ocp = make_ocp(False)
+x0 = ocp.task.x0
+for k in range(ratio, 4 * ratio, ratio):
+    rti_ocp.prepare(k - ratio)
+    for o in [rti_ocp, ocp]:
+        o.push_node(k, x0, footsteps[0], base_refs[0])
+        o.solve(k)
+    assert rti_ocp.num_iters == ocp.num_iters == 1
+    assert np.allclose(rti_ocp.ddp.xs, ocp.ddp.xs, atol=1e-6)
+    assert np.allclose(rti_ocp.ddp.us, ocp.ddp.us, atol=1e-6)
+    assert np.allclose(rti_ocp.ddp.K, ocp.ddp.K, atol=1e-6)
+    rti_ocp.get_results()
+    ocp.get_results()
@@ -0,0 +1,25 @@
+from quadruped_reactive_walking.tools.serialization import pack_arrays, unpack_arrays
+import numpy as np
+
+W = 2
+gait = np.ones((13, 4), dtype=np.int32)
+xs = [np.random.randn(37) for _ in range(W + 1)]
+us = [np.random.randn(12) for _ in range(W)]
+K = [np.random.randn(12, 36) for _ in range(W)]
+
+buffer = bytes(pack_arrays((gait, xs, us, K)))
+gait2, xs2, us2, K2 = unpack_arrays(buffer)
+
+assert gait2.dtype == np.int32
+assert np.array_equal(gait2, gait)
+assert np.array_equal(xs2, xs)
+assert np.array_equal(us2, us)
+assert np.array_equal(K2, K)
+assert K2.shape == (W, 12, 36)
+
+# should raise ValueError
+try:
+    unpack_arrays(buffer + b"\x00" * 8)
+    assert False
+except ValueError:
+    pass
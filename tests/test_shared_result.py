@@ -0,0 +1,65 @@
+from quadruped_reactive_walking import MPCResult
+from quadruped_reactive_walking.wbmpc_wrapper_multiprocess import (
+    MultiprocessMPCWrapper,
+)
+from types import SimpleNamespace
+import numpy as np
+
+N, nx, nu, ndx, W, F = 4, 5, 3, 4, 2, 2
+n_slots = MultiprocessMPCWrapper.NUM_RESULT_SLOTS
+
+
+class MovingSeq(np.ndarray):
+    """Sequence numbers of the slots, moved forward by the writer after every read."""
+
+    def __getitem__(self, index):
+        value = super().__getitem__(index)
+        self.view(np.ndarray)[index] += 1
+        return value
+
+
+def make_reader():
+    shared = SimpleNamespace(
+        NUM_RESULT_SLOTS=n_slots,
+        MAX_READ_RETRIES=MultiprocessMPCWrapper.MAX_READ_RETRIES,
+        last_available_result=MPCResult(N, nx, nu, ndx, W, F),
+        out_seq=SimpleNamespace(value=1),
+        slot_seq=np.zeros(n_slots, dtype=np.int64),
+        gait_shared=np.ones((n_slots, N + 1, 4), dtype=np.int32),
+        xs_shared=np.ones((n_slots, W + 1, nx)),
+        us_shared=np.ones((n_slots, F, nu)),
+        Ks_shared=np.ones((n_slots, F, nu, ndx)),
+        info_shared=np.ones((n_slots, 4)),
+        last_result_k=0,
+        wakeup_latency=0.0,
+        _last_read_seq=0,
+    )
+    shared._slot_copy = [
+        np.empty_like(shared.gait_shared[0]),
+        np.empty_like(shared.xs_shared[0]),
+        np.empty_like(shared.us_shared[0]),
+        np.empty_like(shared.Ks_shared[0]),
+    ]
+    # result 1 is in slot 1
+    shared.slot_seq[1] = 2
+    return shared
+
+
+# Consistent slot: the result is read
+reader = make_reader()
+reader.last_available_result.new_result = False
+MultiprocessMPCWrapper._get_shared_data_out(reader)
+res = reader.last_available_result
+assert res.new_result and reader.last_result_k == 1 and reader._last_read_seq == 1
+assert np.allclose(res.xs_array, 1.0) and np.allclose(res.K_array, 1.0)
+
+# The slot is overwritten during every copy: the previous result is kept
+reader = make_reader()
+reader.slot_seq = reader.slot_seq.view(MovingSeq)
+res = reader.last_available_result
+res.new_result = False
+MultiprocessMPCWrapper._get_shared_data_out(reader)
+assert not res.new_result
+assert reader.last_result_k == 0 and reader._last_read_seq == 0
+assert np.allclose(res.gait, 0) and np.allclose(res.xs_array, 0.0)
+assert np.allclose(res.us_array, 0.0) and np.allclose(res.K_array, 0.0)
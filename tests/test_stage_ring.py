@@ -0,0 +1,78 @@
+import quadruped_reactive_walking as qrw
+from quadruped_reactive_walking.ocp_defs.common import StageRing
+from quadruped_reactive_walking.wb_mpc import _OCP_TYPES, CrocOCP
+from quadruped_reactive_walking.wb_mpc.target import Target, make_footsteps_and_refs
+import numpy as np
+import tracemalloc
+
+
+class Model:
+    def createData(self):
+        return [0.0] * 100
+
+
+def create_data(model):
+    return model.createData()
+
+
+T = 40
+start_models = [Model() for _ in range(T)]
+life_models = [Model() for _ in range(T)]
+ring = StageRing(start_models, [m.createData() for m in start_models])
+for m in life_models:
+    ring.release(m, m.createData())
+
+# Start phase: the life models enter the horizon
+for m in life_models:
+    ring.cycle(m, create_data)
+assert ring.num_created == 0
+
+# Life phase: the first model goes back at the end of the horizon
+ring.cycle(ring.front_model, create_data)
+tracemalloc.start()
+snapshot = tracemalloc.take_snapshot()
+for _ in range(10000):
+    ring.cycle(ring.front_model, create_data)
+growth = sum(
+    stat.size_diff
+    for stat in tracemalloc.take_snapshot().compare_to(snapshot, "lineno")
+)
+tracemalloc.stop()
+
+assert ring.num_created == 0
+assert len(ring) == T
+assert growth < 10000, growth
+
+# End phase: the same model is pushed repeatedly, each stage needs its own data
+end_model = Model()
+for _ in range(T):
+    ring.cycle(end_model, create_data)
+assert ring.num_created == T
+for _ in range(T):
+    ring.cycle(end_model, create_data)
+assert ring.num_created == T
+
+
+# Real OCPs: pushing the nodes of the start phase and of a few gait periods through
+# push_node does not create any stage data
+params = qrw.Params.create_from_file()
+footsteps, base_refs = make_footsteps_and_refs(params, Target(params))
+S, L = params.starting_nodes, len(params.gait)
+for OCP in _OCP_TYPES:
+    if not issubclass(OCP, CrocOCP):
+        continue
+    ocp = OCP(params, footsteps, base_refs)
+    x0 = ocp.task.x0
+    ocp.push_node(0, x0, footsteps[0], base_refs[0])
+    aligator_ring = getattr(ocp, "_stage_ring", None)
+    T = ocp.croc_problem.T
+    for t in range(max(S, T) + 2 * L):
+        if t == T and aligator_ring is not None:
+            # the aligator stage datas created by setup are unknown: they are only
+            # replaced once the first horizon has left
+            num_created = aligator_ring.num_created
+        k = (t + 1) * params.mpc_wbc_ratio
+        ocp.push_node(k, x0, np.zeros((3, 4)), base_refs[0])
+    assert ocp._builder.stages.num_created == 0, OCP.get_type_str()
+    if aligator_ring is not None:
+        assert aligator_ring.num_created == num_created, OCP.get_type_str()
@@ -0,0 +1,83 @@
+import quadruped_reactive_walking as qrw
+from quadruped_reactive_walking.ocp_defs.time_grid import (
+    geometric_time_grid,
+    node_rows,
+    node_times,
+    resample_gait,
+    shift_points,
+)
+from quadruped_reactive_walking.ocp_defs.walking import WalkingOCPBuilder
+from quadruped_reactive_walking.wb_mpc.ocp_crocoddyl import CrocOCP
+from quadruped_reactive_walking.wb_mpc.target import Target, make_footsteps_and_refs
+import numpy as np
+
+dt, N = 0.01, 40
+duration = N * dt
+
+# Fewer, growing steps over the same duration
+grid = geometric_time_grid(dt, duration, N // 2)
+assert len(grid) == N // 2
+assert np.isclose(grid[0], dt)
+assert np.isclose(grid.sum(), duration)
+assert np.all(np.diff(grid) > 0)
+assert np.allclose(geometric_time_grid(dt, duration, N), dt)
+
+# The gait is sampled at the start time of the nodes
+gait = np.repeat(np.arange(N), 4).reshape(N, 4)
+rows = resample_gait(gait, grid, dt)
+assert np.array_equal(rows[:, 0], np.round(node_times(grid) / dt).astype(int))
+assert np.array_equal(resample_gait(gait, np.full(N, dt), dt), gait)
+
+# should raise ValueError
+try:
+    geometric_time_grid(dt, duration, N + 1)
+    assert False
+except ValueError:
+    pass
+
+# Shifting by dt moves a uniform grid by one node (the last state is held)
+index, alpha = shift_points(np.full(N, dt), dt)
+assert np.array_equal(index, np.append(np.arange(1, N), [N - 1, N - 1]))
+assert np.allclose(alpha, np.append(np.zeros(N - 1), [1.0, 1.0]))
+
+# On the growing steps, the start of each node moves by a fraction of its step
+index, alpha = shift_points(grid, dt)
+times = np.append(node_times(grid), duration) + dt
+ends = np.append(node_times(grid), duration)[index] + alpha * grid[index]
+assert np.allclose(ends[:-1], times[:-1]) and index[0] == 1 and alpha[-1] == 1.0
+
+
+# Receding horizon on a grid: the nodes keep their step, and take the support feet
+# of the gait at their start time
+params = qrw.Params.create_from_file()
+footsteps, base_refs = make_footsteps_and_refs(params, Target(params))
+S, dt = params.starting_nodes, params.dt_mpc
+grid = geometric_time_grid(dt, S * dt, S // 2)
+builder = WalkingOCPBuilder(params, footsteps, base_refs, time_grid=grid)
+names = [builder.foot_names[i] + "_contact" for i in builder.task.feet_ids]
+timeline = np.append(np.ones((S, 4)), builder.schedule.rows, axis=0)
+for t in range(S + 2 * len(params.gait)):
+    builder.update_horizon((t + 1) * params.mpc_wbc_ratio, np.zeros((3, 4)), None)
+    rows = timeline[t + 1 + node_rows(grid, dt)]
+    for j, model in enumerate(builder.problem.runningModels):
+        contacts = model.differential.contacts.contacts
+        assert np.isclose(model.dt, grid[j])
+        assert [contacts[n].active for n in names] == list(rows[j] == 1)
+
+# The MPC runs on a grid with another number of nodes than N_gait
+n = S // 2 if S // 2 != params.N_gait else S // 2 + 1
+grid_params = qrw.Params.create_from_str(
+    params.raw_str.replace("time_grid_nodes: 0", "time_grid_nodes: {}".format(n))
+)
+assert grid_params.ocp.time_grid_nodes == n
+assert CrocOCP.get_num_nodes(grid_params) == n
+ocp = CrocOCP(grid_params, footsteps, base_refs)
+assert ocp.croc_problem.T == n
+x0 = ocp.task.x0
+for t in range(2 * len(params.gait)):
+    k = t * params.mpc_wbc_ratio
+    ocp.push_node(k, x0, footsteps[0], base_refs[0])
+    ocp.solve(k)
+    _, xs, us, K, _ = ocp.get_results()
+    assert len(xs) == n + 1 and len(us) == n and len(K) == n
+    assert ocp.get_horizon()[0].shape == (n + 1, len(x0))
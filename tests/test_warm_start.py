@@ -0,0 +1,55 @@
+from quadruped_reactive_walking.wb_mpc.warm_start import (
+    WarmStartStore,
+    WarmStartLibrary,
+    move_base,
+)
+import numpy as np
+import pathlib
+import tempfile
+
+T, nx, nu = 4, 37, 12
+xs = np.random.randn(T + 1, nx)
+us = np.random.randn(T, nu)
+
+store = WarmStartStore(pathlib.Path(tempfile.mkdtemp()) / "warm_starts")
+assert store.load("key", xs.shape, us.shape) is None
+
+store.save("key", xs, list(us))
+xs2, us2 = store.load("key", xs.shape, us.shape)
+assert isinstance(xs2, np.memmap)
+assert np.array_equal(xs2, xs)
+assert np.array_equal(us2, us)
+
+# Entries with other dimensions are ignored
+assert store.load("key", (T + 2, nx), us.shape) is None
+
+# Library: trajectory of the nearest velocity, moved to the base placement of x0
+V, L = 3, 2
+velocities = np.zeros((V, 6))
+velocities[:, 0] = [-0.2, 0.0, 0.2]
+lib_xs = np.random.randn(V, L, T + 1, nx)
+lib_xs[..., 3:7] = [0.0, 0.0, 0.0, 1.0]
+lib_us = np.random.randn(V, L, T, nu)
+library = WarmStartLibrary(velocities, lib_xs, lib_us)
+assert library.nearest(np.array([0.15, 0.0, 0.0, 0.0, 0.0, 0.1])) == 2
+
+x0 = np.random.randn(nx)
+x0[3:7] = [0.0, 0.0, np.sin(np.pi / 4), np.cos(np.pi / 4)]  # yaw of pi / 2
+ws_xs, ws_us = library.lookup(1, velocities[0], x0)
+assert len(ws_xs) == T + 1 and len(ws_us) == T
+assert np.allclose(ws_us, lib_us[0, 1])
+assert np.allclose(ws_xs[0][:2], x0[:2])
+assert np.allclose(ws_xs[0][3:7], x0[3:7])
+assert np.allclose(ws_xs[0][7:], lib_xs[0, 1, 0, 7:])
+d = lib_xs[0, 1, 1, :2] - lib_xs[0, 1, 0, :2]
+assert np.allclose(ws_xs[1][:2] - ws_xs[0][:2], [-d[1], d[0]])
+
+# Tail of the trajectory, continued from a given state
+tail_xs, tail_us = library.lookup(1, velocities[0], x0, num_nodes=1)
+assert len(tail_xs) == 2 and len(tail_us) == 1
+assert np.allclose(tail_us[0], lib_us[0, 1, -1])
+assert np.allclose(tail_xs[0][:2], x0[:2])
+assert np.allclose(tail_xs[1][7:], lib_xs[0, 1, -1, 7:])
+
+# Moving a trajectory to its own first state does not change it
+assert np.allclose(move_base(lib_xs[2, 0], lib_xs[2, 0, 0]), lib_xs[2, 0])